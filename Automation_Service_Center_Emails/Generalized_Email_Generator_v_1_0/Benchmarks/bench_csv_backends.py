@@ -0,0 +1,103 @@
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+from typing import List, Dict, Final, Callable, Iterator
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from file_loader import iter_csv_records
+from columnar_loader import iter_csv_records_columnar
+from field_transformers import create_transformer_functions
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_row_count:  Final[int] = 500000
+csv_headers:        Final[List[str]] = ["Emplid", "Employee Name", "Department", "Annual Salary", "Bonus", "Notes", "employee-name"]
+first_names:        Final[List[str]] = ["maria", "JAMES", "li", "o'brien", "ana-sofia", "Robert", "fatima", "d'angelo", "ÉLODIE", "straße", "  ", "!!!"]
+last_names:         Final[List[str]] = ["smith", "GARCIA", "nguyen", "van der berg", "o'connor", "Johnson", "mcdonald", "\tjr.", "ǆemal"]
+currency_values:    Final[List[str]] = ["", "  ", "abc", "1.2.3", "-", ".", "5.", ".5", "-0", "(1,234.50)", "1e5", "$ 12", "٣٤", "99999999999", "-99999999999", "1" * 60]
+#-------------------------------------------------------------------------------------------------------------------
+
+# Writes a csv of employee rows; edge_cases adds short and long rows, blank and whitespace-only lines, quoted newlines and
+# unparseable currencies (bench_csv_parallel checks its reader against those)
+def generate_csv(path: str, row_count: int, edge_cases: bool) -> None:
+    random.seed(7)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(csv_headers)
+        for index in range(row_count):
+            row = [
+                f"{index + 1:07d}",
+                f" {random.choice(first_names)} {random.choice(last_names)} ",
+                f"D{random.randint(1, 400):04d}",
+                f"${random.randint(20000, 250000):,}.{random.randint(0, 99):02d}",
+                f"{random.uniform(-100, 5000):.3f}",
+                random.choice(["", "on leave", "new hire", ""]),
+                random.choice(["", "alias"]),
+            ]
+            if edge_cases:
+                choice = random.random()
+                if choice < 0.05:
+                    row[3] = random.choice(currency_values)
+                    row[4] = random.choice(currency_values)
+                elif choice < 0.07:
+                    row = row[:random.randint(1, len(row) - 1)]
+                elif choice < 0.09:
+                    row = row + ["extra", "fields"]
+                elif choice < 0.10:
+                    row[5] = "line one\nline two, \"quoted\""
+                elif choice < 0.11:
+                    file.write("\n" if random.random() < 0.5 else " ,  , ,,,,\n")
+                    continue
+            writer.writerow(row)
+
+def selected_transformers() -> Dict[str, Callable[[str], str]]:
+    available = create_transformer_functions(lambda text: None)
+    return {
+        "employee_name":    available["capitalize"],
+        "annual_salary":    available["currency_with_symbol"],
+        "bonus":            available["currency"],
+        "department":       str.lower, # a transformer the columnar backend has no column operation for
+    }
+
+def silent(text: str) -> None:
+    pass
+
+# Returns (records, seconds) for one pass over the file in batches, as the submit pipeline reads it
+def measure(records: Iterator[List[Dict[str, str]]]) -> tuple:
+    start_time = time.perf_counter()
+    count = 0
+    for batch in records:
+        count += len(batch)
+    return count, time.perf_counter() - start_time
+
+# Rows/second of both backends; tests/test_csv_backend_parity.py holds the pandas backend to the row-by-row reader's output
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rows/second of the row-by-row and pandas csv backends.")
+    parser.add_argument("--rows", type=int, default=default_row_count)
+    arguments = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"bench_csv_backends_{arguments.rows}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {arguments.rows} rows at {path}...")
+        generate_csv(path, arguments.rows, edge_cases=False)
+
+    # A one-off cost per process, kept out of the timed passes
+    start_time = time.perf_counter()
+    import pandas, pyarrow.compute
+    print(f"pandas and pyarrow imported in {time.perf_counter() - start_time:.2f}s")
+
+    print(f"\n{'backend':<10} | {'batches':<8} | {'records':>8} | {'seconds':>8} | {'rows/second':>12} | {'speed-up':>8}")
+    print("-" * 71)
+    # Table batches are what the submit pipeline reads; dict batches are what the other callers get
+    for as_table in (True, False):
+        batches = "tables" if as_table else "dicts"
+        python_records, python_seconds = measure(iter_csv_records(silent, path, custom_transformers=selected_transformers(), batch_size=1000, as_table=as_table))
+        pandas_records, pandas_seconds = measure(iter_csv_records_columnar(silent, path, custom_transformers=selected_transformers(), batch_size=1000, as_table=as_table))
+        print(f"{'python':<10} | {batches:<8} | {python_records:>8} | {python_seconds:>8.2f} | {python_records / python_seconds:>12,.0f} | {1:>7.2f}x")
+        print(f"{'pandas':<10} | {batches:<8} | {pandas_records:>8} | {pandas_seconds:>8.2f} | {pandas_records / pandas_seconds:>12,.0f} | {python_seconds / pandas_seconds:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+from typing import List, Dict, Final, Callable, Iterator, Any
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from file_loader import iter_csv_records
+from parallel_loader import iter_csv_records_parallel
+from field_transformers import create_transformer_functions
+from bench_csv_backends import generate_csv
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_row_count:  Final[int] = 2000000
+parity_row_count:   Final[int] = 20000
+parity_chunk_bytes: Final[int] = 64 * 1024 # small chunks so the parity file is split at many record boundaries
+#-------------------------------------------------------------------------------------------------------------------
+
+# Built-in transformers only: those are the ones the worker processes can rebuild
+def selected_transformers(printer_function: Callable[[str], None] = lambda text: None) -> Dict[str, Callable[[str], str]]:
+    available = create_transformer_functions(printer_function)
+    return {
+        "employee_name":    available["capitalize"],
+        "annual_salary":    available["currency_with_symbol"],
+        "bonus":            available["currency"],
+    }
+
+# Returns (output, printed messages) of one read; the transformers print to the same list, so the messages include their warnings
+def read_with_messages(reader: Callable[..., Iterator[Any]], path: str, extra_transformers: Dict[str, Callable[[str], str]] = {}, **options: Any) -> tuple:
+    messages: List[str] = []
+    transformers = {**selected_transformers(messages.append), **extra_transformers}
+    output = [batch.to_records() if hasattr(batch, 'to_records') else batch for batch in reader(messages.append, path, custom_transformers=transformers, **options)]
+    return output, messages
+
+# Compares the serial and parallel readers (records, batches and messages) for several batch sizes and row limits;
+# returns the number of mismatches
+def check_parity(path: str) -> int:
+    mismatches = 0
+    for batch_size, max_rows, as_table in [(None, None, False), (7, None, False), (1000, None, True), (None, 12345, False), (64, 999, True), (None, None, True)]:
+        options: Dict[str, Any] = {'batch_size': batch_size, 'max_rows': max_rows, 'as_table': as_table}
+        expected, expected_messages = read_with_messages(iter_csv_records, path, **options)
+        actual, actual_messages = read_with_messages(iter_csv_records_parallel, path, workers=2, chunk_bytes=parity_chunk_bytes, **options)
+
+        label = f"batch_size={batch_size}, max_rows={max_rows}, as_table={as_table}"
+        if expected != actual:
+            mismatches += 1
+            print(f"\u274C records differ: {label}")
+        elif expected_messages != actual_messages:
+            mismatches += 1
+            first = next((index for index, pair in enumerate(zip(expected_messages, actual_messages)) if pair[0] != pair[1]), None)
+            print(f"\u274C messages differ: {label} ({len(expected_messages)} vs {len(actual_messages)}, first at {first})")
+        else:
+            print(f"identical: {label} ({len(expected)} {'batches' if batch_size or as_table else 'records'}, {len(expected_messages)} messages)")
+
+    # A transformer the workers cannot rebuild falls back to the serial reader
+    expected, _ = read_with_messages(iter_csv_records, path, {"department": str.lower})
+    actual, messages = read_with_messages(iter_csv_records_parallel, path, {"department": str.lower}, workers=2, chunk_bytes=parity_chunk_bytes)
+    if expected != actual or not any("serially" in message for message in messages):
+        mismatches += 1
+        print("\u274C custom transformer fallback")
+    else:
+        print("identical: custom transformer (read serially)")
+    return mismatches
+
+def silent(text: str) -> None:
+    pass
+
+# Returns (records, seconds) for one pass over the file in batches, as the submit pipeline reads it
+def measure(records: Iterator[List[Dict[str, str]]]) -> tuple:
+    start_time = time.perf_counter()
+    count = 0
+    for batch in records:
+        count += len(batch)
+    return count, time.perf_counter() - start_time
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parity check and rows/second of the serial and process-pool csv readers.")
+    parser.add_argument("--rows", type=int, default=default_row_count)
+    parser.add_argument("--workers", type=int, nargs="*", default=None, help="worker counts to time (default: 2, 4, ... up to the core count)")
+    parser.add_argument("--parity-only", action="store_true")
+    arguments = parser.parse_args()
+
+    parity_path = os.path.join(tempfile.gettempdir(), f"bench_csv_parallel_parity_{parity_row_count}.csv")
+    generate_csv(parity_path, parity_row_count, edge_cases=True)
+    mismatches = check_parity(parity_path)
+    if mismatches or arguments.parity_only:
+        sys.exit(1 if mismatches else 0)
+
+    path = os.path.join(tempfile.gettempdir(), f"bench_csv_parallel_{arguments.rows}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {arguments.rows} rows at {path}...")
+        generate_csv(path, arguments.rows, edge_cases=False)
+
+    core_count = os.cpu_count() or 1
+    if core_count < 2:
+        print("\u26A0 Warning: this host has one core, so the worker rows show pool overhead only, not a speed-up.")
+    worker_counts = arguments.workers or [count for count in (2, 4, 8, 16, 32) if count <= max(2, core_count)]
+
+    serial_records, serial_seconds = measure(iter_csv_records(silent, path, custom_transformers=selected_transformers(), batch_size=1000, as_table=True))
+    print(f"\n{core_count} core{'s' if core_count > 1 else ''}, {os.path.getsize(path) / 1048576:.0f}MB")
+    print(f"{'reader':<12} | {'records':>8} | {'seconds':>8} | {'rows/second':>12} | {'speed-up':>8}")
+    print("-" * 62)
+    print(f"{'serial':<12} | {serial_records:>8} | {serial_seconds:>8.2f} | {serial_records / serial_seconds:>12,.0f} | {1:>7.2f}x")
+
+    for workers in worker_counts:
+        records, seconds = measure(iter_csv_records_parallel(silent, path, custom_transformers=selected_transformers(), batch_size=1000, as_table=True, workers=workers))
+        print(f"{f'{workers} workers':<12} | {records:>8} | {seconds:>8.2f} | {records / seconds:>12,.0f} | {serial_seconds / seconds:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
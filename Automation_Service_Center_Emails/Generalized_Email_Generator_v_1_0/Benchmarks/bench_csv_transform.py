@@ -0,0 +1,135 @@
+import os
+import re
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+from typing import List, Dict, Final, Callable, Iterator
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from file_loader import iter_csv_records, normalize_field_for_matching
+from field_transformers import create_transformer_functions
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_row_count:  Final[int] = 500000
+csv_headers:        Final[List[str]] = ["Emplid", "Employee Name", "Department", "Annual Salary", "Imputed Income", "Notes"]
+first_names:        Final[List[str]] = ["maria", "JAMES", "li", "o'brien", "ana-sofia", "Robert", "fatima", "d'angelo"]
+last_names:         Final[List[str]] = ["smith", "GARCIA", "nguyen", "van der berg", "o'connor", "Johnson", "mcdonald"]
+#-------------------------------------------------------------------------------------------------------------------
+
+def generate_csv(path: str, row_count: int) -> None:
+    random.seed(42)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(csv_headers)
+        for index in range(row_count):
+            writer.writerow([
+                f"{index + 1:07d}",
+                f" {random.choice(first_names)} {random.choice(last_names)} ",
+                f"D{random.randint(1, 400):04d}",
+                f"${random.randint(20000, 250000):,}",
+                f"{random.uniform(0, 5000):.3f}",
+                random.choice(["", "on leave", "new hire", ""]),
+            ])
+
+# The transformers as the window built them before: closures with inline re.sub, rebuilt for every selected field
+def legacy_transformer_functions() -> Dict[str, Callable[[str], str]]:
+
+    def capitalize_name(value: str) -> str:
+        if not value or not value.strip():
+            return value
+        if len(value) > 500:
+            value = value[:500]
+        value = re.sub(r'[^\w\s-]', '', value)
+        return ' '.join(word.capitalize() for word in value.split())
+
+    def currency_format(value: str) -> str:
+        if not value or not value.strip():
+            return "0.00"
+        if len(value) > 50:
+            value = value[:50]
+        cleaned = re.sub(r'[^\d.-]', '', value.strip())
+        try:
+            number = float(cleaned) if cleaned else 0.0
+            if number > 999999999.99:
+                number = 999999999.99
+            elif number < -999999999.99:
+                number = -999999999.99
+            return f"{number:.2f}"
+        except ValueError:
+            return "0.00"
+
+    return {"capitalize": capitalize_name, "currency": currency_format}
+
+# The row loop as read_csv_file ran it before: DictReader plus a dict lookup, callable() check and try/except per cell
+def legacy_iter_records(filename: str, custom_transformers: Dict[str, Callable[[str], str]]) -> Iterator[Dict[str, str]]:
+    with open(filename, 'r', encoding='utf-8', newline='') as file:
+        csv_reader = csv.DictReader(file)
+        processed_headers = {header: normalize_field_for_matching(header.strip('\ufeff\ufffe\x00').strip()) for header in (csv_reader.fieldnames or [])}
+
+        for row_count, row in enumerate(csv_reader, start=1):
+            record: Dict[str, str] = {}
+            for original_header, processed_header in processed_headers.items():
+                raw_value: str = row.get(original_header, '').strip()
+                if custom_transformers and processed_header in custom_transformers:
+                    try:
+                        transformer = custom_transformers[processed_header]
+                        if not callable(transformer):
+                            processed_value = str(raw_value).strip()
+                        else:
+                            processed_value = transformer(raw_value)
+                    except Exception:
+                        processed_value = raw_value
+                else:
+                    processed_value = str(raw_value).strip()
+                record[processed_header] = processed_value
+
+            if any(value.strip() for value in record.values()):
+                yield record
+
+def legacy_selected_transformers() -> Dict[str, Callable[[str], str]]:
+    selected = {"employee_name": "capitalize", "annual_salary": "currency", "imputed_income": "currency"}
+    return {field: legacy_transformer_functions()[kind] for field, kind in selected.items()}
+
+def compiled_selected_transformers() -> Dict[str, Callable[[str], str]]:
+    available = create_transformer_functions(print)
+    return {"employee_name": available["capitalize"], "annual_salary": available["currency"], "imputed_income": available["currency"]}
+
+# Returns (rows, seconds) for one pass that only consumes the records
+def measure(records: Iterator[Dict[str, str]]) -> tuple:
+    start_time = time.perf_counter()
+    rows = 0
+    for _ in records:
+        rows += 1
+    return rows, time.perf_counter() - start_time
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rows/second of the csv transform loop before and after the compiled column plan.")
+    parser.add_argument("--rows", type=int, default=default_row_count)
+    arguments = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"bench_csv_transform_{arguments.rows}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {arguments.rows} rows at {path}...")
+        generate_csv(path, arguments.rows)
+
+    def silent(text: str) -> None:
+        pass
+
+    before_rows, before_seconds = measure(legacy_iter_records(path, legacy_selected_transformers()))
+    after_rows, after_seconds = measure(iter_csv_records(silent, path, custom_transformers=compiled_selected_transformers()))
+
+    # Untimed parity pass: both loops must produce the same records
+    identical = all(before == after for before, after in zip(legacy_iter_records(path, legacy_selected_transformers()),
+                                                            iter_csv_records(silent, path, custom_transformers=compiled_selected_transformers())))
+
+    print(f"\n{'path':<28} | {'rows':>8} | {'seconds':>8} | {'rows/second':>12}")
+    print("-" * 66)
+    print(f"{'before (DictReader per cell)':<28} | {before_rows:>8} | {before_seconds:>8.2f} | {before_rows / before_seconds:>12,.0f}")
+    print(f"{'after (compiled column plan)':<28} | {after_rows:>8} | {after_seconds:>8.2f} | {after_rows / after_seconds:>12,.0f}")
+    print(f"\nSpeed-up: {before_seconds / after_seconds:.2f}x, identical output: {identical and before_rows == after_rows}")
+
+if __name__ == "__main__":
+    main()
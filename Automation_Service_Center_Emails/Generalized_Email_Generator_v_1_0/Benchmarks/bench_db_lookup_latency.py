@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+from typing import List, Dict, Final
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from constants import env_values
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+lookup_sizes:   Final[List[int]] = [100, 1000, 20000]
+#-------------------------------------------------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the email lookup path against the fake oracledb driver.")
+    parser.add_argument("--employees", type=int, default=50000, help="employees seeded in the stand-in database")
+    parser.add_argument("--latency-ms", type=float, default=20, help="injected latency per round trip")
+    parser.add_argument("--logon-ms", type=float, default=300, help="injected latency per new session")
+    arguments = parser.parse_args()
+
+    # Point the database layer at the stand-in before it is imported
+    env_values.update({
+        'db_driver':            'fake',
+        'ds':                   'stand-in',
+        'fake_db_path':         os.path.join(tempfile.gettempdir(), f"bench_fake_oracle_{arguments.employees}.sqlite3"),
+        'fake_db_employees':    str(arguments.employees),
+        'fake_db_latency_ms':   str(arguments.latency_ms),
+        'fake_db_logon_ms':     str(arguments.logon_ms),
+        'email_cache_mode':     'off',
+    })
+
+    import fake_oracledb
+    import db_utilities
+    import db_async_utilities
+
+    def silent(text: str) -> None:
+        pass
+
+    # Seeded before the table is printed; the driver would otherwise seed on the first connection, inside the timings
+    if not os.path.exists(env_values['fake_db_path']):
+        print(f"Seeding {arguments.employees} employees...")
+        fake_oracledb.generate_fake_database(env_values['fake_db_path'], arguments.employees, printer_function=silent)
+
+    print(f"Stand-in: {arguments.employees} employees, {arguments.latency_ms} ms per round trip, {arguments.logon_ms} ms per logon\n")
+    print(f"{'emplids':>8} | {'path':<18} | {'round trips':>11} | {'wall time':>10}")
+    print("-" * 58)
+
+    worker = db_async_utilities.get_async_database_worker()
+
+    for lookup_size in lookup_sizes:
+        emplids = [f"{index + 1:07d}" for index in range(min(lookup_size, arguments.employees))]
+
+        for path_name in ("sync (cold pool)", "sync (warm pool)", "async (warm pool)"):
+            if path_name == "sync (cold pool)":
+                db_utilities.close_connection_pool()
+            elif path_name == "async (warm pool)":
+                # Untimed run of the same lookup, so the pool already holds a connection for every concurrent chunk
+                worker.submit(db_async_utilities.lookup_emails_async(silent, emplids, username="bench", password="bench")).result()
+
+            employees: List[Dict[str, str]] = [{'emplid': emplid} for emplid in emplids]
+            trips_before = fake_oracledb.round_trips
+            start_time = time.perf_counter()
+
+            if path_name.startswith("sync"):
+                db_utilities.query_db_for_busn_emails_from_emplid(silent, employees, 'emplid', username="bench", password="bench")
+            else:
+                worker.submit(db_async_utilities.lookup_emails_async(silent, emplids, username="bench", password="bench")).result()
+
+            elapsed = time.perf_counter() - start_time
+            print(f"{len(emplids):>8} | {path_name:<18} | {fake_oracledb.round_trips - trips_before:>11} | {elapsed * 1000:>7.1f} ms")
+
+    db_utilities.close_connection_pool()
+    db_async_utilities.stop_async_database_worker()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+from typing import List, Dict, Final, Set
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from db_utilities import busn_email_lookup_statement, default_emplid_chunk_size
+from statement_registry import get_statement_registry
+
+busn_email_lookup_sql: str = get_statement_registry().get(busn_email_lookup_statement).sql
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+employee_count:     Final[int] = 25000
+lookup_sizes:       Final[List[int]] = [100, 1000, 20000]
+runs_per_size:      Final[int] = 5
+oracle_in_limit:    Final[int] = 1000 # ORA-01795: maximum number of expressions in a list is 1000
+#-------------------------------------------------------------------------------------------------------------------
+
+# Local stand-in for the Oracle shared pool: a statement text seen for the first time counts as a hard parse
+class StandInDatabase:
+    def __init__(self) -> None:
+        self.connection = sqlite3.connect(":memory:")
+        self.seen_statements: Set[str] = set()
+        self.hard_parses: int = 0
+        self.executions: int = 0
+
+        self.connection.execute("create table ps_email_addresses (emplid text, e_addr_type text, email_addr text)")
+        self.connection.executemany(
+            "insert into ps_email_addresses values (?, 'BUSN', ?)",
+            ((f"{index:07d}", f"employee{index}@example.org") for index in range(employee_count))
+        )
+        self.connection.execute("create index ps_email_addresses_idx on ps_email_addresses (emplid, e_addr_type)")
+
+    def reset_counters(self) -> None:
+        self.seen_statements.clear()
+        self.hard_parses = 0
+        self.executions = 0
+
+    def execute(self, sql_query: str, parameters: Dict[str, str]) -> List[tuple]:
+        if sql_query not in self.seen_statements:
+            self.seen_statements.add(sql_query)
+            self.hard_parses += 1
+        self.executions += 1
+        return self.connection.execute(sql_query, parameters).fetchall()
+
+# Old behaviour: the emplids are spliced into the IN list, so every run produces a new statement text
+def legacy_lookup(database: StandInDatabase, emplids: List[str]) -> Dict[str, str]:
+    legacy_sql = re.sub(r"\(select column_value from table\(:emplids\)\)", "(:emplids)", busn_email_lookup_sql)
+    str_delimited_emplids = ", ".join("'" + str(emplid) + "'" for emplid in emplids)
+    return dict(database.execute(legacy_sql.replace(":emplids", str_delimited_emplids), {}))
+
+# New behaviour: a constant statement text with the emplids bound as a collection in fixed-size chunks
+def array_bind_lookup(database: StandInDatabase, emplids: List[str]) -> Dict[str, str]:
+    # SQLite has no table() collection operator; json_each() over a bound JSON array plays the same role
+    stand_in_sql = busn_email_lookup_sql.replace("select column_value from table(:emplids)", "select value from json_each(:emplids)")
+    results: Dict[str, str] = {}
+    for start in range(0, len(emplids), default_emplid_chunk_size):
+        results.update(database.execute(stand_in_sql, {"emplids": json.dumps(emplids[start:start + default_emplid_chunk_size])}))
+    return results
+
+def main() -> None:
+    database = StandInDatabase()
+    all_emplids = [f"{index:07d}" for index in range(employee_count)]
+    random.seed(42)
+
+    print(f"{'emplids':>8} | {'strategy':<11} | {'hard parses':>11} | {'executions':>10} | {'wall time':>10}")
+    print("-" * 63)
+
+    for lookup_size in lookup_sizes:
+        samples = [random.sample(all_emplids, lookup_size) for _ in range(runs_per_size)]
+
+        for strategy_name, strategy in (("spliced IN", legacy_lookup), ("array bind", array_bind_lookup)):
+            if strategy is legacy_lookup and lookup_size > oracle_in_limit:
+                print(f"{lookup_size:>8} | {strategy_name:<11} | {'ORA-01795: more than 1000 IN list expressions':>37}")
+                continue
+
+            database.reset_counters()
+            start_time = time.perf_counter()
+            for sample in samples:
+                found = strategy(database, sample)
+                assert len(found) == lookup_size
+            elapsed = time.perf_counter() - start_time
+
+            print(f"{lookup_size:>8} | {strategy_name:<11} | {database.hard_parses:>11} | {database.executions:>10} | {elapsed / runs_per_size * 1000:>7.2f} ms")
+
+    print(f"\n{runs_per_size} runs per size, wall time is per run. Chunk size: {default_emplid_chunk_size}")
+
+if __name__ == "__main__":
+    main()
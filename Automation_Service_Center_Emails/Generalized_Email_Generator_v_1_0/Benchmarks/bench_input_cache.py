@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+from typing import List, Final, Callable, Iterator
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from file_loader import iter_csv_records
+from record_table import RecordTable
+import input_cache
+from input_cache import ParsedInputCache, iter_cached_record_batches
+from bench_csv_parallel import selected_transformers
+from bench_csv_backends import generate_csv
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_row_count:  Final[int] = 1000000
+batch_size:         Final[int] = 1000 # the submit pipeline's default batch
+#-------------------------------------------------------------------------------------------------------------------
+
+def silent(text: str) -> None:
+    pass
+
+# Returns (records, seconds to the first batch, seconds for the whole pass) for one read in batches, as the pipeline reads it
+def measure(batches: Callable[[], Iterator[RecordTable]]) -> tuple:
+    start_time = time.perf_counter()
+    first_batch_seconds = 0.0
+    count = 0
+    for batch in batches():
+        if not count:
+            first_batch_seconds = time.perf_counter() - start_time
+        count += len(batch)
+    return count, first_batch_seconds, time.perf_counter() - start_time
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Full parse versus a rerun served from the parsed input cache.")
+    parser.add_argument("--rows", type=int, default=default_row_count)
+    arguments = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"bench_input_cache_{arguments.rows}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {arguments.rows} rows at {path}...")
+        generate_csv(path, arguments.rows, edge_cases=True)
+
+    # A throwaway cache folder, so the benchmark never touches the application's cache
+    input_cache._parsed_input_cache = ParsedInputCache(tempfile.mkdtemp(prefix="bench_input_cache_"))
+    transformers = selected_transformers()
+
+    def parse() -> Iterator[RecordTable]:
+        return iter_csv_records(silent, path, custom_transformers=transformers, batch_size=batch_size, as_table=True)
+
+    def cached() -> Iterator[RecordTable]:
+        return iter_cached_record_batches(silent, path, parse, batch_size=batch_size, custom_transformers=transformers)
+
+    results: List[tuple] = [
+        ("parse only", *measure(parse)),
+        ("miss + store", *measure(cached)),
+        ("cache hit", *measure(cached)),
+    ]
+
+    expected = [table.to_records() for table in parse()]
+    actual = [table.to_records() for table in cached()]
+    print(f"\nCached records {'identical to' if expected == actual else 'DIFFERENT from'} a fresh parse")
+
+    print(f"\n{'read':<14} | {'records':>8} | {'first batch':>11} | {'seconds':>8}")
+    print("-" * 52)
+    for name, records, first_batch_seconds, seconds in results:
+        print(f"{name:<14} | {records:>8} | {first_batch_seconds * 1000:>9.1f}ms | {seconds:>8.2f}")
+    print(f"\nRerun: {results[0][3] / results[2][3]:.1f}x faster")
+    input_cache.get_parsed_input_cache().clear()
+
+if __name__ == "__main__":
+    main()
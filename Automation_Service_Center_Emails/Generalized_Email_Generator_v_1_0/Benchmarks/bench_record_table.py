@@ -0,0 +1,99 @@
+import os
+import gc
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from typing import List, Dict, Final, Callable, Any
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from file_loader import iter_csv_records
+from record_table import RecordTable
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_row_count:  Final[int] = 100000
+csv_headers:        Final[List[str]] = ["Emplid", "First Name", "Last Name", "Department", "Job Title", "Location",
+                                        "Supervisor", "Annual Salary", "Hire Date", "Status", "Benefit Plan", "Notes"]
+#-------------------------------------------------------------------------------------------------------------------
+
+def generate_csv(path: str, row_count: int) -> None:
+    random.seed(11)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(csv_headers)
+        for index in range(row_count):
+            writer.writerow([
+                f"{index + 1:07d}",
+                random.choice(["Maria", "James", "Li", "Ana", "Robert", "Fatima"]),
+                random.choice(["Smith", "Garcia", "Nguyen", "Johnson", "O'Connor"]),
+                f"D{random.randint(1, 400):04d}",
+                random.choice(["Analyst", "Lecturer", "Coordinator", "Technician"]),
+                random.choice(["Main Campus", "Downtown", "Remote"]),
+                f"{random.randint(1, 5000):07d}",
+                f"{random.randint(20000, 250000)}.00",
+                f"20{random.randint(0, 24):02d}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}",
+                random.choice(["A", "L", "P"]),
+                random.choice(["MED1", "MED2", "DEN1"]),
+                random.choice(["", "", "on leave"]),
+            ])
+
+# Loads the file with the given loader, adds the email column the way the submit path does, and returns
+# (records, bytes still allocated, peak bytes, seconds)
+def measure(load: Callable[[], Any], add_emails: Callable[[Any], None]) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+
+    records = load()
+    add_emails(records)
+
+    seconds = time.perf_counter() - start_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(records), current, peak, seconds
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory of the loaded records as a dict per row versus a RecordTable.")
+    parser.add_argument("--rows", type=int, default=default_row_count)
+    arguments = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"bench_record_table_{arguments.rows}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {arguments.rows} rows at {path}...")
+        generate_csv(path, arguments.rows)
+
+    def silent(text: str) -> None:
+        pass
+
+    # Roughly what the lookup returns: most employees have an address
+    emails: Dict[str, str] = {f"{index:07d}": f"employee{index}@example.edu" for index in range(1, arguments.rows + 1) if index % 20}
+
+    def load_dicts() -> List[Dict[str, str]]:
+        return list(iter_csv_records(silent, path))
+
+    def add_emails_to_dicts(records: List[Dict[str, str]]) -> None:
+        for record in records:
+            record['email'] = emails.get(record['emplid'], '')
+
+    def load_table() -> RecordTable:
+        return next(iter_csv_records(silent, path, as_table=True))
+
+    def add_emails_to_table(table: RecordTable) -> None:
+        table.set_column('email', [emails.get(emplid, '') for emplid in table.column('emplid')])
+
+    results = [
+        ("dict per record", *measure(load_dicts, add_emails_to_dicts)),
+        ("RecordTable", *measure(load_table, add_emails_to_table)),
+    ]
+
+    print(f"\n{'representation':<16} | {'records':>8} | {'retained MB':>11} | {'peak MB':>8} | {'seconds':>8}")
+    print("-" * 64)
+    for name, records, current, peak, seconds in results:
+        print(f"{name:<16} | {records:>8} | {current / 1048576:>11.1f} | {peak / 1048576:>8.1f} | {seconds:>8.2f}")
+    print(f"\nRetained memory: {results[0][2] / results[1][2]:.2f}x smaller with RecordTable")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from typing import List, Dict, Final, Tuple
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+from template_renderer import CompiledTemplate, sanitize_replacement_value, clean_placeholder_name
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_recipient_count:    Final[int] = 200
+default_body_kb:            Final[int] = 200
+placeholder_count:          Final[int] = 30
+extra_record_keys:          Final[int] = 10 # csv columns no placeholder uses, as in a real export
+#-------------------------------------------------------------------------------------------------------------------
+
+# The replacement the renderer supersedes: one re.sub per record key over the whole text, then a rescan for leftovers
+def replace_per_key(text: str, replacements: Dict[str, str]) -> Tuple[str, List[str]]:
+    for key, value in replacements.items():
+        pattern = r'\{\{[^{}]*' + re.escape(str(key)) + r'[^{}]*\}\}'
+        text = re.sub(pattern, sanitize_replacement_value(value).replace('\\', '\\\\'), text)
+    unreplaced = [clean_placeholder_name(inner) for inner in re.findall(r'\{\{([^{}]+)\}\}', text)]
+    return text, list(dict.fromkeys(name for name in unreplaced if name))
+
+# Returns an HTML body of about body_kb kilobytes with the placeholders spread through it; a few are split by
+# formatting tags the way Outlook saves them, and one is left without a csv column
+def generate_body(body_kb: int, placeholders: List[str]) -> str:
+    random.seed(11)
+    paragraph = "<p style=\"margin:0in;font-family:Calibri,sans-serif\">Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>\n"
+    paragraph_count = body_kb * 1024 // len(paragraph)
+    slots = sorted(random.sample(range(paragraph_count), len(placeholders)))
+    parts: List[str] = []
+    for index in range(paragraph_count):
+        parts.append(paragraph)
+        if slots and slots[0] == index:
+            slots.pop(0)
+            name = placeholders[len(placeholders) - len(slots) - 1]
+            parts.append(f"<p>{{{{<span lang=EN-US>{name}</span>}}}}</p>\n" if index % 3 == 0 else f"<p>{{{{ {name} }}}}</p>\n")
+    parts.append("<p>{{not_in_the_csv}}</p>\n")
+    return ''.join(parts)
+
+def generate_records(count: int, placeholders: List[str]) -> List[Dict[str, str]]:
+    keys = placeholders + [f"unused_column_{index:02d}" for index in range(extra_record_keys)]
+    return [{key: f"{key} value {row}" for key in keys} for row in range(count)]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-key re.sub replacement versus the compiled template renderer.")
+    parser.add_argument("--recipients", type=int, default=default_recipient_count)
+    parser.add_argument("--body-kb", type=int, default=default_body_kb)
+    arguments = parser.parse_args()
+
+    # Distinct names that are not substrings of one another, so both approaches must produce the same text
+    placeholders = [f"field_{chr(ord('a') + index % 26)}{index:02d}" for index in range(placeholder_count)]
+    subject = "Payment for {{field_a00}} - {{field_b01}}"
+    body = generate_body(arguments.body_kb, placeholders)
+    records = generate_records(arguments.recipients, placeholders)
+    print(f"{len(body) / 1024:.0f}KB body, {placeholder_count} placeholders, {len(records[0])} record keys, {len(records)} recipients")
+
+    start_time = time.perf_counter()
+    expected = []
+    for record in records:
+        subject_text, subject_unreplaced = replace_per_key(subject, record)
+        body_text, body_unreplaced = replace_per_key(body, record)
+        expected.append((subject_text, body_text, list(dict.fromkeys(subject_unreplaced + body_unreplaced))))
+    per_key_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    subject_template = CompiledTemplate(subject)
+    body_template = CompiledTemplate(body)
+    compile_seconds = time.perf_counter() - start_time
+    actual = []
+    for record in records:
+        subject_result = subject_template.render(record)
+        body_result = body_template.render(record)
+        actual.append((subject_result.text, body_result.text, list(dict.fromkeys(subject_result.unreplaced + body_result.unreplaced))))
+    compiled_seconds = time.perf_counter() - start_time
+
+    print(f"Rendered drafts {'identical' if expected == actual else 'DIFFERENT'}; unreplaced: {actual[0][2]}")
+    print(f"\n{'renderer':<14} | {'seconds':>8} | {'ms/recipient':>12}")
+    print("-" * 42)
+    print(f"{'per-key re.sub':<14} | {per_key_seconds:>8.3f} | {per_key_seconds * 1000 / len(records):>12.3f}")
+    print(f"{'compiled':<14} | {compiled_seconds:>8.3f} | {compiled_seconds * 1000 / len(records):>12.3f}   (compile {compile_seconds * 1000:.1f}ms)")
+    print(f"\n{per_key_seconds / compiled_seconds:.0f}x faster")
+
+if __name__ == "__main__":
+    main()
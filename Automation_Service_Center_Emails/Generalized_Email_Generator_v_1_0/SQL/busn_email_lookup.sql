@@ -0,0 +1,10 @@
+-- binds: emplids
+-- Business email address for each emplid in the bound SYS.ODCIVARCHAR2LIST collection
+select
+      a.emplid
+    , a.email_addr
+from
+    ps_email_addresses a
+where
+        a.emplid in (select column_value from table(:emplids))
+    and a.e_addr_type = 'BUSN'
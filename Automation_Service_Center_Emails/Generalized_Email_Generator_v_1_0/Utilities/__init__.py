@@ -5,23 +5,106 @@ from .package_checker import install_required_libraries, is_package_installed
 # get_confidential_csv_file() -> List[Dict[str, str]]: retrieves a list of all csv files in a specified directory key=filename value=full_path
 # get_confidential_email_templates() -> List[Dict[str, str]]: retrieves email templates from a specified directory key=filename value=full_path
 # read_csv_file(filename: Optional[str]) -> List[Dict[str, str]]: reads a CSV file and returns its content in a listed key-value format
-# select_csv_file() -> str: allows the user to select a CSV file from a dialog
+# open_csv_file(printer_function, filename) -> TextIO: opens a CSV in one pass with the encoding detected from a bounded sample
+# get_confidential_csv_index() / get_confidential_template_index() -> DirectoryIndex: the scandir indexes behind the two get_confidential_* lists
+# get_csv_file_info(filename) -> CsvFileInfo: encoding, raw/cleaned headers, field names and approximate rows, cached by (path, size, mtime_ns)
+# iter_csv_records(printer_function, filename, ..., batch_size: Optional[int] = None, as_table: bool = False) -> Iterator: streams transformed records (or batches, or RecordTable batches) with bounded memory
+# iter_workbook_records(printer_function, filename, sheet_name: Optional[str] = None, ...) -> Iterator: the same records from one .xlsx/.xlsm sheet, streamed with openpyxl's read-only mode
+# iter_input_records(printer_function, filename, sheet_name=None, **reader_options) -> Iterator: iter_workbook_records for workbooks, iter_csv_records otherwise
+# get_input_file_info(filename, sheet_name: Optional[str] = None) -> CsvFileInfo: get_csv_file_info, or a workbook sheet's headers, sheet names and approximate rows
+# select_csv_file() -> str: allows the user to select a CSV file or Excel workbook from a dialog
 # select_email_file() -> str: allows the user to select an email template file from a dialog
-from .file_loader import get_confidential_csv_files, get_confidential_email_templates, read_csv_file, select_csv_file, select_email_file, normalize_field_for_matching
+from .file_loader import get_confidential_csv_files, get_confidential_email_templates, get_confidential_csv_index, get_confidential_template_index, read_csv_file, iter_csv_records, iter_workbook_records, iter_input_records, open_csv_file, get_csv_file_info, get_input_file_info, is_workbook_file, clear_csv_file_info_cache, CsvFileInfo, select_csv_file, select_email_file, normalize_field_for_matching
+
+# DirectoryIndex - scandir index of one folder's files whose refresh() returns a DirectoryDiff of added/removed files
+# DirectoryWatcher - background thread polling DirectoryIndex objects and reporting each non-empty diff
+from .directory_index import DirectoryIndex, DirectoryDiff, DirectoryWatcher
+
+# RecordTable - employee records stored by column (shared keys, one list per key); rows are read through dict-like RecordView objects
+from .record_table import RecordTable, RecordView
+
+# create_transformer_functions(printer_function) -> Dict[str, Callable[[str], str]]: capitalize / currency / currency_with_symbol with precompiled regexes
+# rebind_transformers(transformers, printer_function): the same transformers with the built-in ones reporting through printer_function
+from .field_transformers import create_transformer_functions, rebind_transformers
+
+# iter_csv_records_columnar(printer_function, filename, ...): same records and batches as iter_csv_records, parsed with pandas and transformed column by column with pyarrow
+# select_csv_record_iterator(printer_function): returns iter_csv_records, or iter_csv_records_columnar when the .env file sets csv_backend=pandas
+from .columnar_loader import iter_csv_records_columnar, select_csv_record_iterator, get_csv_backend
+
+# iter_csv_records_parallel(printer_function, filename, ..., workers=None, chunk_bytes=None): same records as iter_csv_records, parsed in quote-aware byte-range chunks across a process pool
+from .parallel_loader import iter_csv_records_parallel
 
 # env_values: Final[Dict[str, str]] is a dictionary containing environment variables
+# env_int(key, default) -> int: the .env value for key as an int, default when it is missing or not a number
+# env_bool(key) -> bool: True when the .env value for key is 1, true, yes or on
 # color_scheme: Final[Dict[str, str]] is a dictionary containing color codes from the tech_future scheme for the application
-from .constants import env_values, color_scheme
+from .constants import env_values, env_int, env_bool, color_scheme
 
 from .color_constants import create_hover_color, ModernColors, ColorPalettes
 
 # query_db_for_busn_emails_from_emplid(employees: List[Dict[str, str]]) -> List[Dict[str, str]] retrieves business emails from the key 'emplid' in a list of dictionaries
 # query_db(sql_query: str, username: Optional[str] = None, password: Optional[str] = None): queries the database and returns all results as a list of dictionaries
+# query_db_iter(printer_function, sql_query: str, ..., batch_size: Optional[int] = None, as_dicts: bool = False): yields rows (or row batches) without materialising the full result
 # test_connection(username: Optional[str] = None, password: Optional[str] = None) -> bool: tests the database connection with optional credentials
-from .db_utilities import query_db_for_busn_emails_from_emplid, query_db, test_connection
+# close_connection_pool() -> None: closes the session-wide connection pool shared by all database calls
+# collect_unique_emplids(printer_function, employees, emplid_field) -> Optional[List[str]]: returns the unique emplids found in the records
+# apply_emails_to_employees(printer_function, employees, emplid_field, emails: Dict[str, str]) -> List[Dict[str, str]]: stores looked up addresses under the key 'email'
+from .db_utilities import query_db_for_busn_emails_from_emplid, query_db, query_db_iter, test_connection, close_connection_pool, collect_unique_emplids, apply_emails_to_employees
+
+# AsyncDatabaseWorker - event loop thread owning the async pool; submit() returns a concurrent future the GUI can poll
+# get_async_database_worker() -> AsyncDatabaseWorker: returns the shared worker, starting it on first use
+# test_connection_async / query_db_async / lookup_emails_async: coroutines to submit to the worker
+# close_async_connection_pool() / stop_async_database_worker(): tear down the async pool / the worker thread
+# acquire_connection_async(pool) -> AsyncConnection: a pooled connection; raises PoolLogonError (pool discarded) when the logon is rejected
+from .db_async_utilities import AsyncDatabaseWorker, PoolLogonError, get_async_database_worker, acquire_connection_async, test_connection_async, query_db_async, lookup_emails_async, close_async_connection_pool, stop_async_database_worker
+
+# StatementRegistry - named SQL statements loaded from the SQL folder, with per-statement executions, rows and time
+# get_statement_registry() -> StatementRegistry: returns the shared registry, loading the .sql files on first use
+from .statement_registry import StatementRegistry, get_statement_registry
+
+# QueryMetrics - connect/execute/fetch spans, rows, round trips and bytes summed per call name; each call optionally logged as a JSON line
+# get_query_metrics() -> QueryMetrics: returns the shared collector whose format_report() feeds the run summary
+from .query_metrics import QueryMetrics, QueryCall, CallTotals, get_query_metrics
+
+# ParsedInputCache - on-disk cache of transformed input records keyed by file sha256 plus reader settings, memory-mapped on load
+# iter_cached_record_batches(printer_function, filename, read_batches, batch_size, ...) -> Iterator[RecordTable]: cached batches, or read_batches() stored for next time
+# get_input_cache_enabled() -> bool: True when the .env file sets input_cache=true
+from .input_cache import ParsedInputCache, CachedRecords, get_parsed_input_cache, iter_cached_record_batches, get_input_cache_enabled
+
+# DuplicateReport - records in/out and the repeated emplids; DuplicateEmplidError is raised by the reject policy
+# deduplicate_employees(printer_function, employees, emplid_field, policy=None, aggregate_columns=None) -> (records, DuplicateReport): one record per emplid
+# iter_deduplicated_batches(printer_function, batches, emplid_field, batch_size=None, policy=None, ...) -> Iterator[RecordTable]: the same across a batched load
+# get_duplicate_policy() -> str: keep_first, keep_last, aggregate, reject or keep_all from duplicate_emplid_policy in the .env file
+from .duplicate_emplids import DuplicateEmplidError, DuplicateReport, deduplicate_employees, iter_deduplicated_batches, get_duplicate_policy
+
+# EmailLookupCache - on-disk emplid -> email cache with per-entry TTL used by query_db_for_busn_emails_from_emplid
+# get_email_lookup_cache() -> EmailLookupCache: returns the shared cache, whose hits/misses/expired describe the last lookup
+from .email_cache import EmailLookupCache, get_email_lookup_cache
+
+# resolve_enrichment_placeholders(placeholders: List[str]) -> Dict[str, str]: maps unmatched placeholders to whitelisted PeopleSoft columns
+# fetch_enrichment_async(printer_function, emplids, catalogue_keys, ...): coroutine fetching every requested column for every emplid in one batched query
+# apply_enrichment_to_employees(printer_function, employees, emplid_field, placeholder_keys, enrichment) -> List[Dict[str, str]]: stores the values under the placeholder text
+from .enrichment import resolve_enrichment_placeholders, fetch_enrichment_async, apply_enrichment_to_employees
+
+# SubmitPipeline - overlaps CSV parsing, batched email/enrichment lookups and draft creation through bounded queues
+from .submit_pipeline import SubmitPipeline, PipelineError
+
+# TemplateCache - placeholders and Outlook's compiled subject / body per template sha256, found from the (path, size, mtime) stamp; placeholders on disk too with template_cache=true
+# get_template_cache() -> TemplateCache: the instance get_template_placeholders() and OutlookSession.open() read and fill
+from .template_cache import TemplateCache, CachedTemplate, get_template_cache
+
+# read_msg_file(filename: str) -> MsgTemplate(subject, html_body, rtf_body, text_body, recipients): reads an Outlook .msg without Outlook (olefile)
+# MsgFormatError - raised for a file that is not a .msg compound file or whose RTF body cannot be decompressed
+from .msg_reader import read_msg_file, MsgTemplate, MsgRecipient, MsgFormatError
+
+# CompiledTemplate(text) - a template tokenised once into literal and placeholder segments
+# CompiledTemplate.render(replacements) -> RenderResult(text, unreplaced): fills every slot with one join and lists the placeholders left unfilled
+from .template_renderer import CompiledTemplate, RenderResult
 
 # create_draft_email_individual_to(template_msg_path: str, replacements: Dict[str, str]) -> bool: creates a draft email in Outlook to an individual recipient and returns True if successful
-from .outlook_utilities import create_draft_email_individual_to, create_draft_email_bcc_all, get_template_placeholders
+# OutlookSession(printer_function, template_msg_path) - context manager: one Outlook dispatch and parsed template for a batch of drafts,
+# passed to create_draft_email_individual_to(..., session=session); COM references are released on exit
+from .outlook_utilities import create_draft_email_individual_to, create_draft_email_bcc_all, get_template_placeholders, OutlookSession
 
 # SecurecredentialManager - class to manage credentials more securely
 from .secure_credentials import SecureCredentialManager, SecurePasswordContext
\ No newline at end of file
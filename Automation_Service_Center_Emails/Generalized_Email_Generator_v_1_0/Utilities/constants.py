@@ -63,6 +63,19 @@ class ColorPalette:
     }
 
 env_values: Final[Dict[str, str | None]] = dotenv_values()
+
+# Returns the .env value for key as an int, or default when it is missing or not a number
+def env_int(key: str, default: int) -> int:
+    try:
+        value = env_values.get(key)
+        return int(value) if value else default
+    except (TypeError, ValueError):
+        return default
+
+# Returns True when the .env value for key is 1, true, yes or on (any case); anything else, or no value, is False
+def env_bool(key: str) -> bool:
+    return (env_values.get(key) or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
 color_scheme: Final[Dict[str, str]] = ColorPalette.custom_combination
 
 class ConnectionState(Enum):
@@ -0,0 +1,262 @@
+import time
+import asyncio
+import threading
+import concurrent.futures
+from typing import List, Dict, Final, Optional, Any, Coroutine
+
+try: # importing env_values and the .env integer helper
+    from .constants import env_values, env_int
+except ImportError:
+    from constants import env_values, env_int # type: ignore
+
+try: # importing the shared pool settings, lookup SQL and helpers from the synchronous layer
+    from .db_utilities import (
+        oracledb, _credentials_key, _chunked,
+        busn_email_lookup_statement, emplid_collection_type, default_stmt_cache_size,
+        default_pool_min, default_pool_max, default_pool_increment,
+        default_emplid_chunk_size, default_fetch_arraysize, default_fetch_prefetchrows
+    )
+except ImportError:
+    from db_utilities import ( # type: ignore
+        oracledb, _credentials_key, _chunked,
+        busn_email_lookup_statement, emplid_collection_type, default_stmt_cache_size,
+        default_pool_min, default_pool_max, default_pool_increment,
+        default_emplid_chunk_size, default_fetch_arraysize, default_fetch_prefetchrows
+    )
+
+try: # importing the named SQL statements
+    from .statement_registry import get_statement_registry
+except ImportError:
+    from statement_registry import get_statement_registry # type: ignore
+
+try: # importing the per-call timing spans
+    from .query_metrics import QueryCall, get_query_metrics, estimate_fetch_round_trips, estimate_row_bytes
+except ImportError:
+    from query_metrics import QueryCall, get_query_metrics, estimate_fetch_round_trips, estimate_row_bytes # type: ignore
+
+try: # importing the emplid -> email lookup cache
+    from .email_cache import read_email_cache, write_email_cache
+except ImportError:
+    from email_cache import read_email_cache, write_email_cache # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+worker_thread_name: Final[str] = "oracledb-asyncio"
+#-------------------------------------------------------------------------------------------------------------------
+
+class PoolLogonError(Exception):
+    """Raised when the async pool cannot open a connection; the pool has already been closed and forgotten."""
+
+class AsyncDatabaseWorker:
+    """
+    Runs an asyncio event loop on a dedicated daemon thread and owns the async connection pool.
+    The GUI submits coroutines with submit() and receives concurrent.futures.Future objects back,
+    so several lookups can be in flight at once without blocking the Tk main loop.
+    """
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name=worker_thread_name, daemon=True)
+        self._pool: Optional[oracledb.AsyncConnectionPool] = None
+        self._pool_credentials_key: Optional[str] = None
+        self._pool_lock: asyncio.Lock = asyncio.Lock()
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coroutine: Coroutine[Any, Any, Any]) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    # Returns the async pool, creating it (or recreating it for new credentials) on first use. Runs on the loop thread.
+    async def get_pool(self, username: Optional[str], password: Optional[str]) -> oracledb.AsyncConnectionPool:
+        credentials_key = _credentials_key(username, password)
+
+        async with self._pool_lock:
+            if self._pool is not None and self._pool_credentials_key == credentials_key:
+                return self._pool
+
+            await self._close_pool()
+
+            pool_min = max(0, env_int('pool_min', default_pool_min))
+            pool_max = max(1, pool_min, env_int('pool_max', default_pool_max))
+            pool_increment = max(1, env_int('pool_increment', default_pool_increment))
+
+            self._pool = oracledb.create_pool_async(
+                user        = username,
+                password    = password,
+                dsn         = env_values['ds'],
+                min         = pool_min,
+                max         = pool_max,
+                increment   = pool_increment,
+                stmtcachesize = max(0, env_int('stmt_cache_size', default_stmt_cache_size))
+            )
+            self._pool_credentials_key = credentials_key
+
+            return self._pool
+
+    async def _close_pool(self) -> None:
+        if self._pool is not None:
+            try:
+                await self._pool.close(force=True)
+            except oracledb.Error:
+                pass
+        self._pool = None
+        self._pool_credentials_key = None
+
+    async def close_pool(self) -> None:
+        async with self._pool_lock:
+            await self._close_pool()
+
+    # Closes the pool only if it is still the current one, so a pool created meanwhile for other credentials survives
+    async def discard_pool(self, pool: oracledb.AsyncConnectionPool) -> None:
+        async with self._pool_lock:
+            if self._pool is pool:
+                await self._close_pool()
+
+    # Closes the pool and stops the event loop thread
+    def stop(self, timeout_seconds: float = 5) -> None:
+        if not self._loop.is_running():
+            return
+        try:
+            self.submit(self.close_pool()).result(timeout=timeout_seconds)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=timeout_seconds)
+
+# Global instance shared by the window and the async helpers
+_async_database_worker: Optional[AsyncDatabaseWorker] = None
+_worker_lock: Final[threading.Lock] = threading.Lock()
+
+def get_async_database_worker() -> AsyncDatabaseWorker:
+    global _async_database_worker
+    with _worker_lock:
+        if _async_database_worker is None:
+            _async_database_worker = AsyncDatabaseWorker()
+        return _async_database_worker
+
+# Closes the async connection pool in the background but keeps the event loop running for the next login
+def close_async_connection_pool() -> None:
+    if _async_database_worker is not None:
+        _async_database_worker.submit(_async_database_worker.close_pool())
+
+# Stops the event loop thread and closes the async connection pool
+def stop_async_database_worker() -> None:
+    global _async_database_worker
+    with _worker_lock:
+        if _async_database_worker is not None:
+            _async_database_worker.stop()
+            _async_database_worker = None
+
+# Returns a connection from the pool. Creating the pool does not log on, so a rejected login first shows up here: the
+# pool is closed and forgotten, as the synchronous path does, and PoolLogonError is raised.
+async def acquire_connection_async(pool: oracledb.AsyncConnectionPool) -> oracledb.AsyncConnection:
+    try:
+        return await pool.acquire()
+    except oracledb.Error as error:
+        await get_async_database_worker().discard_pool(pool)
+        raise PoolLogonError(str(error)) from error
+
+# Returns Connection successful True/False
+async def test_connection_async(username: Optional[str], password: Optional[str]) -> bool:
+    pool = await get_async_database_worker().get_pool(username, password)
+    try:
+        async with await acquire_connection_async(pool):
+            return True
+    except PoolLogonError:
+        return False
+
+# Returns all rows (tuples, or dicts when as_dicts is set) from a query run of a given SQL statement
+async def query_db_async(printer_function, sql_query: str,
+                         username: Optional[str] = None,
+                         password: Optional[str] = None,
+                         bind_values: Optional[Dict[str, Any]] = None,
+                         as_dicts: bool = False) -> List[Any]:
+    query_metrics = get_query_metrics()
+    call = query_metrics.start_call('query_db')
+    try:
+        start_time = time.perf_counter()
+        pool = await get_async_database_worker().get_pool(username, password)
+        connection = await acquire_connection_async(pool)
+        call.add_connect(time.perf_counter() - start_time)
+
+        async with connection:
+            with connection.cursor() as cursor:
+                cursor.arraysize = max(1, env_int('fetch_arraysize', default_fetch_arraysize))
+                cursor.prefetchrows = max(0, env_int('fetch_prefetchrows', default_fetch_prefetchrows))
+
+                start_time = time.perf_counter()
+                await cursor.execute(sql_query, bind_values or {})
+                call.add_execute(time.perf_counter() - start_time)
+
+                if as_dicts:
+                    column_names = [column[0].lower() for column in cursor.description]
+                    cursor.rowfactory = lambda *row: dict(zip(column_names, row))
+
+                start_time = time.perf_counter()
+                rows = await cursor.fetchall()
+                call.add_fetch(time.perf_counter() - start_time, len(rows), estimate_fetch_round_trips(len(rows), cursor.arraysize, cursor.prefetchrows), estimate_row_bytes(rows))
+                return rows
+
+    except PoolLogonError:
+        printer_function("Login cancelled or invalid credentials provided")
+        return []
+    except oracledb.Error as error:
+        printer_function(f"Error querying the database: {error}")
+        raise
+    finally:
+        query_metrics.finish_call(call)
+
+# Runs one emplid chunk on its own pooled connection
+async def _fetch_busn_email_chunk(pool: oracledb.AsyncConnectionPool, emplid_chunk: List[str], call: QueryCall) -> Dict[str, str]:
+    start_time = time.perf_counter()
+    async with await acquire_connection_async(pool) as connection:
+        emplid_list_type = await connection.gettype(emplid_collection_type)
+        call.add_connect(time.perf_counter() - start_time, round_trips=1)
+        with connection.cursor() as cursor:
+            cursor.arraysize = len(emplid_chunk)
+            cursor.prefetchrows = len(emplid_chunk) + 1
+            rows = await get_statement_registry().fetch_all_async(cursor, busn_email_lookup_statement, {'emplids': emplid_list_type.newobject(emplid_chunk)}, call)
+            return dict(rows)
+
+# Returns emplid -> business email for the given emplids. Chunks run concurrently on separate pooled connections.
+# Returns None when the credentials are rejected, which the first chunk to open a connection finds out. report=False skips the per-lookup progress lines, for callers that
+# look up one batch at a time and print the totals themselves.
+async def lookup_emails_async(printer_function, emplids: List[str],
+                              username: Optional[str] = None,
+                              password: Optional[str] = None,
+                              cache_mode: Optional[str] = None,
+                              reset_cache_stats: bool = True,
+                              report: bool = True) -> Optional[Dict[str, str]]:
+    unique_emplids: List[str] = list(dict.fromkeys(str(emplid) for emplid in emplids))
+    results, to_query, cache_mode = await asyncio.to_thread(read_email_cache, printer_function, unique_emplids, cache_mode, reset_cache_stats, report)
+
+    if not to_query:
+        return results
+
+    pool = await get_async_database_worker().get_pool(username, password)
+
+    chunk_size: int = max(1, env_int('emplid_chunk_size', default_emplid_chunk_size))
+    if report:
+        printer_function(f"\U0001F50D Querying database for {len(to_query)} employee email addresses...")
+
+    query_metrics = get_query_metrics()
+    call = query_metrics.start_call(busn_email_lookup_statement)
+
+    fetched: Dict[str, str] = {}
+    try:
+        for chunk_results in await asyncio.gather(*(_fetch_busn_email_chunk(pool, chunk, call) for chunk in _chunked(to_query, chunk_size))):
+            fetched.update(chunk_results)
+    except PoolLogonError:
+        printer_function("Login cancelled or invalid credentials provided")
+        return None
+    except oracledb.Error as error:
+        printer_function(f"Error querying the database: {error}")
+        raise
+    finally:
+        query_metrics.finish_call(call)
+
+    await asyncio.to_thread(write_email_cache, printer_function, fetched, to_query, cache_mode)
+
+    results.update(fetched)
+    return results
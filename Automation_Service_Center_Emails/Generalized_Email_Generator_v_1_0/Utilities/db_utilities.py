@@ -1,101 +1,332 @@
 import os
-from typing import List, Dict, Final, Optional
+import time
+import hashlib
+import threading
+from typing import List, Dict, Final, Optional, Any, Iterator
 
-try: # importing env_values
-    from .constants import env_values, ConnectionState
+try: # importing env_values, the .env integer helper and ConnectionState
+    from .constants import env_values, env_int, ConnectionState
 except ImportError:
-    from constants import env_values, ConnectionState # type: ignore
+    from constants import env_values, env_int, ConnectionState # type: ignore
     
+try: # importing the emplid -> email lookup cache
+    from .email_cache import read_email_cache, write_email_cache
+except ImportError:
+    from email_cache import read_email_cache, write_email_cache # type: ignore
+
+try: # importing the named SQL statements
+    from .statement_registry import get_statement_registry, default_stmt_cache_size
+except ImportError:
+    from statement_registry import get_statement_registry, default_stmt_cache_size # type: ignore
+
+try: # importing the per-call timing spans
+    from .query_metrics import QueryCall, get_query_metrics, estimate_fetch_round_trips, estimate_row_bytes
+except ImportError:
+    from query_metrics import QueryCall, get_query_metrics, estimate_fetch_round_trips, estimate_row_bytes # type: ignore
+
+try: # importing the columnar record store
+    from .record_table import RecordTable, EmployeeRecords
+except ImportError:
+    from record_table import RecordTable, EmployeeRecords # type: ignore
+
+try: # importing the duplicate emplid policies applied before a lookup
+    from .duplicate_emplids import deduplicate_employees
+except ImportError:
+    from duplicate_emplids import deduplicate_employees # type: ignore
+
 try: # importing install_required_libraries()
     from .package_checker import install_required_libraries
 except ImportError:
     from package_checker import install_required_libraries
     
-install_required_libraries({'oracledb'})
-import oracledb
+# db_driver=fake in the .env file swaps in the local SQLite-backed stand-in (see fake_oracledb.py)
+if (env_values.get('db_driver') or '').strip().lower() == 'fake':
+    try:
+        from . import fake_oracledb as oracledb
+    except ImportError:
+        import fake_oracledb as oracledb # type: ignore
+else:
+    install_required_libraries({'oracledb'})
+    import oracledb
+
+#-- CONNECTION POOL ------------------------------------------------------------------------------------------------
+# Pool sizing is read from the .env file (pool_min, pool_max, pool_increment) and falls back to these defaults
+default_pool_min:       Final[int] = 1
+default_pool_max:       Final[int] = 4
+default_pool_increment: Final[int] = 1
+
+_connection_pool:       Optional[oracledb.ConnectionPool] = None
+_pool_credentials_key:  Optional[str] = None
+_pool_lock:             Final[threading.Lock] = threading.Lock()
+
+# Rows fetched per round trip; prefetchrows lets the execute round trip return the first batch as well
+default_fetch_arraysize:    Final[int] = 1000
+default_fetch_prefetchrows: Final[int] = 1000
+
+# Emplids are bound as a SYS.ODCIVARCHAR2LIST collection in fixed-size chunks so the statement text never changes
+default_emplid_chunk_size:   Final[int] = 1000
+emplid_collection_type:      Final[str] = "SYS.ODCIVARCHAR2LIST"
+busn_email_lookup_statement: Final[str] = "busn_email_lookup" # SQL/busn_email_lookup.sql
+#-------------------------------------------------------------------------------------------------------------------
+
+# Fingerprints the credentials so the pool can be rebuilt when they change without keeping the password around
+def _credentials_key(username: Optional[str], password: Optional[str]) -> str:
+    return hashlib.sha256(f"{username or ''}\x00{password or ''}".encode('utf-8')).hexdigest()
+
+# Returns the session-wide connection pool, creating it (or recreating it for new credentials) on first use
+def get_connection_pool(username: Optional[str], password: Optional[str]) -> oracledb.ConnectionPool:
+    global _connection_pool, _pool_credentials_key
+
+    credentials_key = _credentials_key(username, password)
+
+    with _pool_lock:
+        if _connection_pool is not None and _pool_credentials_key == credentials_key:
+            return _connection_pool
+
+        if _connection_pool is not None:
+            _close_pool(_connection_pool)
+            _connection_pool = None
+
+        pool_min = max(0, env_int('pool_min', default_pool_min))
+        pool_max = max(1, pool_min, env_int('pool_max', default_pool_max))
+        pool_increment = max(1, env_int('pool_increment', default_pool_increment))
+
+        _connection_pool = oracledb.create_pool(
+            user        = username,
+            password    = password,
+            dsn         = env_values['ds'],
+            min         = pool_min,
+            max         = pool_max,
+            increment   = pool_increment,
+            stmtcachesize = max(0, env_int('stmt_cache_size', default_stmt_cache_size))
+        )
+        _pool_credentials_key = credentials_key
+
+        return _connection_pool
+
+# Yields consecutive slices of at most chunk_size values
+def _chunked(values: List[str], chunk_size: int):
+    for start in range(0, len(values), chunk_size):
+        yield values[start:start + chunk_size]
+
+def _close_pool(pool: oracledb.ConnectionPool) -> None:
+    try:
+        pool.close(force=True)
+    except oracledb.Error:
+        pass
+
+# Closes the session-wide connection pool and all of its connections
+def close_connection_pool() -> None:
+    global _connection_pool, _pool_credentials_key
+
+    with _pool_lock:
+        if _connection_pool is not None:
+            _close_pool(_connection_pool)
+        _connection_pool = None
+        _pool_credentials_key = None
 
 # Returns Connection successful True/False
 def test_connection(username, password) -> bool:
     try:
-        connection = oracledb.connect(user=username, password=password, dsn=env_values['ds'])
-        connection.close()
-        return True
+        with get_connection_pool(username, password).acquire():
+            return True
     except oracledb.Error as error:
+        close_connection_pool()
         return False
 
+# Returns a pooled connection, or None (after reporting it) when the credentials are rejected. Acquire time is the connect span.
+def _acquire_connection(printer_function, username: Optional[str], password: Optional[str], call: Optional[QueryCall] = None) -> Optional[oracledb.Connection]:
+    start_time = time.perf_counter()
+    try:
+        connection = get_connection_pool(username, password).acquire()
+        if call is not None:
+            call.add_connect(time.perf_counter() - start_time)
+        return connection
+    except oracledb.Error as error:
+        close_connection_pool()
+        printer_function("Login cancelled or invalid credentials provided")
+        return None
+
+# Applies arraysize/prefetchrows to a cursor, falling back to the .env values (fetch_arraysize, fetch_prefetchrows)
+def _configure_cursor(cursor: oracledb.Cursor, arraysize: Optional[int] = None, prefetchrows: Optional[int] = None) -> None:
+    cursor.arraysize = max(1, arraysize or env_int('fetch_arraysize', default_fetch_arraysize))
+    cursor.prefetchrows = max(0, prefetchrows if prefetchrows is not None else env_int('fetch_prefetchrows', default_fetch_prefetchrows))
+
+# Yields rows (or lists of rows when batch_size is set) from a query run of a given SQL statement without holding the full result
+# A database error is reported and raised to the caller, which may be partway through the rows
+def query_db_iter(printer_function, sql_query: str,
+                  username: Optional[str] = None,
+                  password: Optional[str] = None,
+                  bind_values: Optional[Dict[str, Any]] = None,
+                  batch_size: Optional[int] = None,
+                  arraysize: Optional[int] = None,
+                  prefetchrows: Optional[int] = None,
+                  as_dicts: bool = False) -> Iterator[Any]:
+    query_metrics = get_query_metrics()
+    call = query_metrics.start_call('query_db')
+
+    # The call is finished whatever happens, so a rejected logon is recorded too
+    try:
+        connection = _acquire_connection(printer_function, username, password, call)
+        if connection is None:
+            return
+
+        with connection:
+            printer_function("Successfully connected to the database")
+
+            with connection.cursor() as cursor:
+                _configure_cursor(cursor, arraysize=arraysize or batch_size, prefetchrows=prefetchrows)
+
+                start_time = time.perf_counter()
+                cursor.execute(sql_query, bind_values or {})
+                call.add_execute(time.perf_counter() - start_time)
+
+                if as_dicts:
+                    column_names = [column[0].lower() for column in cursor.description]
+                    cursor.rowfactory = lambda *row: dict(zip(column_names, row))
+
+                # Rows are pulled one arraysize batch at a time so the fetch span excludes the caller's time
+                rows_fetched = 0
+                fetch_seconds = 0.0
+                byte_count = 0
+                try:
+                    while True:
+                        start_time = time.perf_counter()
+                        rows = cursor.fetchmany(batch_size or cursor.arraysize)
+                        fetch_seconds += time.perf_counter() - start_time
+                        if not rows:
+                            break
+                        rows_fetched += len(rows)
+                        byte_count += estimate_row_bytes(rows)
+                        if batch_size:
+                            yield rows
+                        else:
+                            yield from rows
+                finally:
+                    call.add_fetch(fetch_seconds, rows_fetched, estimate_fetch_round_trips(rows_fetched, cursor.arraysize, cursor.prefetchrows), byte_count)
+
+    except oracledb.Error as error:
+        printer_function(f"Error connecting to the database: {error}")
+        raise
+    finally:
+        query_metrics.finish_call(call)
+
 # Returns all rows from a query run of a given SQL statement
 def query_db(printer_function,sql_query, username: Optional[str] = None, password: Optional[str] = None):
-    if not test_connection(username=username, password=password):
-        printer_function("Login cancelled or invalid credentials provided")
-        return []
-        
+    return list(query_db_iter(printer_function=printer_function, sql_query=sql_query, username=username, password=password))
+
+# Returns emplid -> business email for the given unique emplids, or None (after reporting it) when the credentials are rejected
+# or the lookup fails
+def _fetch_busn_emails(printer_function, emplids: List[str],
+                       username: Optional[str] = None,
+                       password: Optional[str] = None) -> Optional[Dict[str, str]]:
+    chunk_size: int = max(1, env_int('emplid_chunk_size', default_emplid_chunk_size))
+
+    printer_function(f"\U0001F50D Querying database for {len(emplids)} employee email addresses...")
+
+    query_metrics = get_query_metrics()
+    call = query_metrics.start_call(busn_email_lookup_statement)
+
+    results: Dict[str, str] = {}
     try:
-        with oracledb.connect(user=username, password=password, dsn=env_values['ds']) as connection:
+        connection = _acquire_connection(printer_function, username, password, call)
+        if connection is None:
+            return None
+
+        with connection:
             printer_function("Successfully connected to the database")
 
+            statement_registry = get_statement_registry()
+
+            start_time = time.perf_counter()
+            emplid_list_type = connection.gettype(emplid_collection_type)
+            call.add_connect(time.perf_counter() - start_time, round_trips=1)
+
             with connection.cursor() as cursor:
-                cursor.execute(sql_query)
-                results = cursor.fetchall()
+                # Each chunk returns at most one row per emplid, so one prefetch covers it in a single round trip
+                _configure_cursor(cursor, arraysize=chunk_size, prefetchrows=chunk_size + 1)
+                for emplid_chunk in _chunked(emplids, chunk_size):
+                    for emplid, email_addr in statement_registry.iter_rows(cursor, busn_email_lookup_statement, {'emplids': emplid_list_type.newobject(emplid_chunk)}, call):
+                        results[emplid] = email_addr
 
-        return results
-    
     except oracledb.Error as error:
         printer_function(f"Error connecting to the database: {error}")
-        quit()
+        return None
+    finally:
+        query_metrics.finish_call(call)
 
-# Customized query run to pull business emails from a list of emplid's and stores them in the list with the key 'email'
-def query_db_for_busn_emails_from_emplid(printer_function, # -> List[Dict[str, str]]
-                                         employees: List[Dict[str, str]], 
-                                         emplid_field: str,
-                                         username: Optional[str] = None, 
-                                         password: Optional[str] = None) -> List[Dict[str,str]]:
-    sql_query = \
-    '''
-        select
-              a.emplid
-            , a.email_addr
-        from
-            ps_email_addresses a
-        where
-                a.emplid in (:emplids)
-            and a.e_addr_type = 'BUSN'
-    '''
+    return results
 
+# Returns the unique emplids found under emplid_field, or None (after reporting it) when there are none
+def collect_unique_emplids(printer_function, employees: EmployeeRecords, emplid_field: str) -> Optional[List[str]]:
     try:
-        emplids = [employee[emplid_field] for employee in employees if emplid_field in employee]
+        if isinstance(employees, RecordTable):
+            emplids = employees.column(emplid_field) if emplid_field in employees else []
+        else:
+            emplids = [employee[emplid_field] for employee in employees if emplid_field in employee]
 
         if not emplids:
             printer_function(f"\u26A0 Warning: No emplids found in field '{emplid_field}'")
-            return employees
+            return None
         
-        printer_function(f"Found {len(emplids)} emplids in field '{emplid_field}'")
+        unique_emplids = list(dict.fromkeys(str(emplid) for emplid in emplids))
+        repeated = f" ({len(unique_emplids)} unique)" if len(unique_emplids) != len(emplids) else ""
+        printer_function(f"Found {len(emplids)} emplids in field '{emplid_field}'{repeated}")
         
     except KeyError as e:
         printer_function(f"\u274C Error: Field '{emplid_field}' not found in employee records")
-        return employees
-
-    if not emplids:
-        printer_function("\u26A0 Warning: No emplids provided to query")
-        return employees
-    
-    str_delimited_emplids = ", ".join("'" + str(emplid) + "'" for emplid in emplids)
-    sql_query = sql_query.replace(":emplids", str_delimited_emplids)
+        return None
 
-    printer_function(f"\U0001F50D Querying database for {len(emplids)} employee email addresses...")
-
-    results = dict(query_db(printer_function=printer_function,sql_query=sql_query,username=username,password=password)) # type: ignore
+    return unique_emplids
 
+# Stores the looked up addresses in each employee record under the key 'email' (a whole 'email' column for a RecordTable).
+# report=False skips the count line, for callers that apply one batch at a time and print the total themselves.
+def apply_emails_to_employees(printer_function, employees: EmployeeRecords, emplid_field: str, emails: Dict[str, str],
+                              report: bool = True) -> EmployeeRecords:
     emails_found = 0
-    for employee in employees:
-        if emplid_field in employee:
-            employee_id = employee[emplid_field]
-            email = results.get(employee_id, '')
-            employee['email'] = email
-            if email:
-                emails_found += 1
+    if isinstance(employees, RecordTable):
+        if emplid_field in employees:
+            email_column = [emails.get(employee_id, '') for employee_id in employees.column(emplid_field)]
         else:
-            employee['email'] = ''
+            email_column = [''] * len(employees)
+        employees.set_column('email', email_column)
+        emails_found = sum(1 for email in email_column if email)
+    else:
+        for employee in employees:
+            if emplid_field in employee:
+                employee_id = employee[emplid_field]
+                email = emails.get(employee_id, '')
+                employee['email'] = email
+                if email:
+                    emails_found += 1
+            else:
+                employee['email'] = ''
+
+    if report:
+        printer_function(f"\U0001F4E7 Found {emails_found} email addresses for {len(employees)} employees")
 
-    printer_function(f"\U0001F4E7 Found {emails_found} email addresses for {len(employees)} employees")
+    return employees
+
+# Customized query run to pull business emails from a list of emplid's and stores them in the list with the key 'email'
+def query_db_for_busn_emails_from_emplid(printer_function, # -> List[Dict[str, str]]
+                                         employees: List[Dict[str, str]], 
+                                         emplid_field: str,
+                                         username: Optional[str] = None, 
+                                         password: Optional[str] = None,
+                                         cache_mode: Optional[str] = None,
+                                         duplicate_policy: Optional[str] = None) -> List[Dict[str,str]]:
+    employees, _ = deduplicate_employees(printer_function, employees, emplid_field, duplicate_policy)
+    unique_emplids = collect_unique_emplids(printer_function, employees, emplid_field)
+    if not unique_emplids:
+        return employees
+
+    results, to_query, cache_mode = read_email_cache(printer_function, unique_emplids, cache_mode)
+
+    if to_query:
+        fetched = _fetch_busn_emails(printer_function, to_query, username=username, password=password)
+        if fetched is None:
+            return employees
+        results.update(fetched)
+        write_email_cache(printer_function, fetched, to_query, cache_mode)
 
-    return employees
\ No newline at end of file
+    return apply_emails_to_employees(printer_function, employees, emplid_field, results)
@@ -0,0 +1,114 @@
+import os
+import threading
+from typing import List, Dict, Final, Optional, Callable, NamedTuple, Sequence, Tuple
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_poll_seconds:       Final[float] = 5.0
+# Directory mtimes are coarse or lag on some shares (FAT, SMB caching); rescan anyway every this many polls
+full_rescan_every_polls:    Final[int] = 12
+#-------------------------------------------------------------------------------------------------------------------
+
+class DirectoryDiff(NamedTuple):
+    added:      Dict[str, str] # display name -> full path
+    removed:    Dict[str, str]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed)
+
+class DirectoryIndex:
+    """
+    Files with the given extensions in one folder, keyed by display name ('<prefix>/<filename>') with their full paths.
+    Scanned with os.scandir, whose entries carry the file type from the directory listing, so no per-file stat is
+    made; refresh() only rescans when the folder's own mtime changed and returns what was added and removed.
+    File contents are not tracked here: get_csv_file_info() re-sniffs a CSV when its size or mtime changes.
+    """
+    def __init__(self, directory: str, display_prefix: str, extensions: Sequence[str]) -> None:
+        self.directory: str = directory
+        self.display_prefix: str = display_prefix
+        self.extensions: Tuple[str, ...] = tuple(extension.lower() for extension in extensions)
+        self.entries: Dict[str, str] = {}
+
+        self._directory_mtime_ns: Optional[int] = None
+        self._polls_since_scan: int = 0
+        self._lock = threading.Lock()
+
+    # Returns display name -> full path for every matching file, sorted case-insensitively by name
+    def _scan(self) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                # is_file() uses the type from the listing; it only stats for symlinks and file systems without d_type
+                # '~$' files are the lock files Office keeps next to an open workbook or message
+                if entry.name.lower().endswith(self.extensions) and not entry.name.startswith('~$') and entry.is_file():
+                    found[f"{self.display_prefix}/{entry.name}"] = os.path.normpath(entry.path)
+        return dict(sorted(found.items(), key=lambda item: item[0].lower()))
+
+    # Rescans when the folder changed (or force is set, or every full_rescan_every_polls calls) and returns the difference.
+    # A missing or unreadable folder is reported through printer_function and indexed as empty.
+    def refresh(self, printer_function=print, force: bool = False) -> DirectoryDiff:
+        with self._lock:
+            try:
+                directory_mtime_ns: Optional[int] = os.stat(self.directory).st_mtime_ns
+            except OSError:
+                directory_mtime_ns = None
+
+            self._polls_since_scan += 1
+            if (not force and directory_mtime_ns is not None and directory_mtime_ns == self._directory_mtime_ns
+                    and self._polls_since_scan < full_rescan_every_polls):
+                return DirectoryDiff({}, {})
+
+            found: Dict[str, str] = {}
+            if not os.path.exists(self.directory):
+                printer_function(f"Warning: Confidential directory does not exist: {self.directory}")
+            elif not os.path.isdir(self.directory):
+                printer_function(f"Warning: Confidential path is not a directory: {self.directory}")
+            else:
+                try:
+                    found = self._scan()
+                except PermissionError:
+                    printer_function(f"Error: Permission denied accessing directory: {self.directory}")
+                except OSError as e:
+                    printer_function(f"Error accessing directory {self.directory}: {e}")
+
+            diff = DirectoryDiff(
+                added={name: path for name, path in found.items() if name not in self.entries},
+                removed={name: path for name, path in self.entries.items() if name not in found}
+            )
+            self.entries = found
+            self._directory_mtime_ns = directory_mtime_ns
+            self._polls_since_scan = 0
+            return diff
+
+    # Returns the indexed files in the List[Dict[str, str]] shape the dropdowns use: [{display_name: full_path}, ...]
+    def as_file_list(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return [{name: path} for name, path in self.entries.items()]
+
+class DirectoryWatcher:
+    """
+    Background thread that refreshes a set of DirectoryIndex objects every poll interval and calls on_change(index, diff)
+    from that thread for each non-empty diff; GUI callers must hand the update to their main loop (e.g. window.after).
+    """
+    def __init__(self, indexes: List[DirectoryIndex], on_change: Callable[[DirectoryIndex, DirectoryDiff], None],
+                 poll_seconds: float = default_poll_seconds) -> None:
+        self.indexes: List[DirectoryIndex] = indexes
+        self.on_change = on_change
+        self.poll_seconds: float = max(0.5, poll_seconds)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="directory-watcher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.poll_seconds):
+            for index in self.indexes:
+                try:
+                    diff = index.refresh(printer_function=lambda text: None)
+                    if diff and not self._stopped.is_set():
+                        self.on_change(index, diff)
+                except Exception:
+                    pass # a share that drops out is retried on the next poll
@@ -0,0 +1,311 @@
+from typing import List, Dict, Final, Optional, Callable, Iterator, Iterable, Tuple, NamedTuple, Union
+
+try: # importing env_values
+    from .constants import env_values
+except ImportError:
+    from constants import env_values # type: ignore
+
+try: # importing the columnar record store
+    from .record_table import RecordTable, EmployeeRecords
+except ImportError:
+    from record_table import RecordTable, EmployeeRecords # type: ignore
+
+try: # importing the currency parsing shared with the transformers
+    from .field_transformers import parse_currency, transform_currency, transform_currency_with_symbol
+except ImportError:
+    from field_transformers import parse_currency, transform_currency, transform_currency_with_symbol # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+# Policies for records sharing an emplid (duplicate_emplid_policy in the .env file)
+duplicate_policy_keep_first:    Final[str] = "keep_first" # the first record wins; later ones are dropped
+duplicate_policy_keep_last:     Final[str] = "keep_last"  # the last record wins, at the position of the last occurrence
+duplicate_policy_aggregate:     Final[str] = "aggregate"  # one record at the first position, amount columns summed
+duplicate_policy_reject:        Final[str] = "reject"     # the run stops at the first repeated emplid, before any lookup or draft when the input can be re-read
+duplicate_policy_keep_all:      Final[str] = "keep_all"   # no deduplication (one draft per record, as before)
+duplicate_policies:             Final[Tuple[str, ...]] = (duplicate_policy_keep_first, duplicate_policy_keep_last, duplicate_policy_aggregate,
+                                                          duplicate_policy_reject, duplicate_policy_keep_all)
+
+# Summed by the aggregate policy, along with every column given a currency transformer (duplicate_emplid_aggregate_columns)
+default_aggregate_columns:      Final[Tuple[str, ...]] = ("payment_amount",)
+reported_duplicate_emplids:     Final[int] = 10 # emplids listed in the report and the reject error
+#-------------------------------------------------------------------------------------------------------------------
+
+class DuplicateEmplidError(ValueError):
+    """Raised by the reject policy when an emplid appears in more than one record."""
+
+class DuplicateReport(NamedTuple):
+    records_in:         int
+    records_out:        int
+    duplicate_emplids:  List[str] # emplids found in more than one record, in file order
+
+    def describe(self) -> str:
+        shown = ', '.join(self.duplicate_emplids[:reported_duplicate_emplids])
+        more = f" and {len(self.duplicate_emplids) - reported_duplicate_emplids} more" if len(self.duplicate_emplids) > reported_duplicate_emplids else ''
+        return f"{len(self.duplicate_emplids)} emplid{'s' if len(self.duplicate_emplids) != 1 else ''} repeated ({shown}{more})"
+
+# Returns the policy from the .env file (duplicate_emplid_policy), defaulting to keeping the first record
+def get_duplicate_policy() -> str:
+    policy = (env_values.get('duplicate_emplid_policy') or duplicate_policy_keep_first).strip().lower()
+    return policy if policy in duplicate_policies else duplicate_policy_keep_first
+
+# Returns the columns the aggregate policy sums: the configured ones plus those with a currency transformer
+def get_aggregate_columns(custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None) -> Tuple[str, ...]:
+    configured = env_values.get('duplicate_emplid_aggregate_columns')
+    columns = [column.strip() for column in configured.split(',') if column.strip()] if configured else list(default_aggregate_columns)
+    for key, transform in (custom_transformers or {}).items():
+        if getattr(transform, 'transform_kind', None) in (transform_currency, transform_currency_with_symbol):
+            columns.append(key)
+    return tuple(dict.fromkeys(columns))
+
+# Returns the summed amounts formatted as the currency transformers format them ('$' when any value had one),
+# or None when a value is not a number (the group then keeps its first value and is reported)
+def _sum_amounts(values: Iterable[str]) -> Optional[str]:
+    total = 0.0
+    with_symbol = False
+    for value in values:
+        if not value.strip():
+            continue
+        with_symbol = with_symbol or value.strip().startswith('$')
+        try:
+            total += parse_currency(value)
+        except ValueError:
+            return None
+    return f"${total:.2f}" if with_symbol else f"{total:.2f}"
+
+# Returns the table with one record per emplid under the policy, and the report. Records without an emplid are kept as they are.
+# One pass over the emplid column builds emplid -> row positions; only groups with more than one row are touched.
+def _deduplicate_table(printer_function, table: RecordTable, emplid_field: str, policy: str,
+                       aggregate_columns: Tuple[str, ...]) -> Tuple[RecordTable, DuplicateReport]:
+    positions: Dict[str, List[int]] = {}
+    for position, emplid in enumerate(table.column(emplid_field)):
+        if emplid:
+            positions.setdefault(emplid, []).append(position)
+
+    duplicates = {emplid: rows for emplid, rows in positions.items() if len(rows) > 1}
+    report_emplids = list(duplicates)
+    if not duplicates or policy == duplicate_policy_keep_all:
+        return table, DuplicateReport(len(table), len(table), report_emplids)
+
+    if policy == duplicate_policy_reject:
+        raise DuplicateEmplidError(f"Duplicate emplids in the input: {DuplicateReport(len(table), len(table), report_emplids).describe()}. "
+                                   f"Remove them or set duplicate_emplid_policy to keep_first, keep_last or aggregate.")
+
+    kept_position = (lambda rows: rows[-1]) if policy == duplicate_policy_keep_last else (lambda rows: rows[0])
+    dropped = {position for rows in duplicates.values() for position in rows if position != kept_position(rows)}
+    keep = [position for position in range(len(table)) if position not in dropped]
+
+    columns = list(table.columns)
+    if policy == duplicate_policy_aggregate:
+        for key in aggregate_columns:
+            if key not in table:
+                continue
+            index = table.keys.index(key)
+            column = columns[index] = list(columns[index]) # the caller's table is left as it was
+            for emplid, rows in duplicates.items():
+                total = _sum_amounts(column[row] for row in rows)
+                if total is None:
+                    printer_function(f"\u26A0 Warning: Could not add up '{key}' for emplid {emplid}; keeping the first record's value.")
+                else:
+                    column[rows[0]] = total
+
+    deduplicated = RecordTable(table.keys, [[column[position] for position in keep] for column in columns])
+    return deduplicated, DuplicateReport(len(table), len(deduplicated), report_emplids)
+
+def _print_report(printer_function, report: DuplicateReport, policy: str) -> None:
+    if not report.duplicate_emplids:
+        return
+    if policy == duplicate_policy_keep_all:
+        printer_function(f"\u26A0 Warning: {report.describe()}; every record is kept (duplicate_emplid_policy=keep_all).")
+        return
+    removed = report.records_in - report.records_out
+    printer_function(f"\u26A0 Duplicate emplids: {report.describe()}; {removed} record{'s' if removed != 1 else ''} "
+                     f"{'merged' if policy == duplicate_policy_aggregate else 'dropped'} ({policy}), {report.records_out} left.")
+
+# Returns one record per emplid under the policy (get_duplicate_policy() by default) and prints the counts.
+# Lists of dicts come back as lists, RecordTables as RecordTables. The reject policy raises DuplicateEmplidError.
+def deduplicate_employees(printer_function, employees: EmployeeRecords, emplid_field: str,
+                          policy: Optional[str] = None,
+                          aggregate_columns: Optional[Tuple[str, ...]] = None) -> Tuple[EmployeeRecords, DuplicateReport]:
+    policy = policy or get_duplicate_policy()
+    table = employees if isinstance(employees, RecordTable) else RecordTable.from_records(employees)
+    if emplid_field not in table:
+        return employees, DuplicateReport(len(table), len(table), [])
+
+    deduplicated, report = _deduplicate_table(printer_function, table, emplid_field, policy, aggregate_columns or get_aggregate_columns())
+    _print_report(printer_function, report, policy)
+
+    if deduplicated is table:
+        return employees, report
+    return (deduplicated if isinstance(employees, RecordTable) else deduplicated.to_records()), report
+
+# Printer for the indexing pass, whose parse messages the second pass prints
+def _silent(text: str) -> None:
+    pass
+
+# Filters a batch down to the given row positions (the batch itself when every row stays)
+def _keep_rows(batch: RecordTable, keep: List[int]) -> RecordTable:
+    if len(keep) == len(batch):
+        return batch
+    return RecordTable(batch.keys, [[column[position] for position in keep] for column in batch.columns])
+
+class _EmplidIndex:
+    """What a first pass over the input learns about repeated emplids, without keeping the records themselves."""
+    def __init__(self) -> None:
+        self.records_in: int = 0
+        self.has_field: bool = True
+        self.first_position: Dict[str, int] = {}
+        self.last_position: Dict[str, int] = {}
+        self.duplicates: Dict[str, None] = {}
+        self.repeats: int = 0 # records beyond the first for each emplid
+        self.totals: Dict[str, Dict[str, str]] = {} # emplid -> column -> summed amount (aggregate policy)
+
+# Reads the input once keeping only the emplid column and, for aggregate, the amount columns. The reject policy raises at the
+# first repeated emplid, before any batch has gone on to a lookup or a draft.
+def _index_emplids(printer_function, batches: Iterator[RecordTable], emplid_field: str, policy: str,
+                   aggregate_columns: Tuple[str, ...]) -> _EmplidIndex:
+    index = _EmplidIndex()
+    amounts: Dict[str, List[Tuple[str, ...]]] = {}
+    amount_keys: Tuple[str, ...] = ()
+
+    for batch in batches:
+        if emplid_field not in batch:
+            index.has_field = False
+            return index
+        if not amount_keys and policy == duplicate_policy_aggregate:
+            amount_keys = tuple(key for key in aggregate_columns if key in batch)
+        amount_columns = [batch.column(key) for key in amount_keys]
+
+        for offset, emplid in enumerate(batch.column(emplid_field)):
+            position = index.records_in + offset
+            if not emplid:
+                continue
+            if emplid in index.first_position:
+                if policy == duplicate_policy_reject:
+                    raise DuplicateEmplidError(f"Duplicate emplid {emplid} in the input (record {position + 1}). "
+                                               f"Remove it or set duplicate_emplid_policy to keep_first, keep_last or aggregate.")
+                index.duplicates[emplid] = None
+                index.repeats += 1
+            else:
+                index.first_position[emplid] = position
+            index.last_position[emplid] = position
+            if amount_keys:
+                amounts.setdefault(emplid, []).append(tuple(column[offset] for column in amount_columns))
+        index.records_in += len(batch)
+
+    for emplid in index.duplicates:
+        if emplid not in amounts:
+            continue
+        totals: Dict[str, str] = {}
+        for column_index, key in enumerate(amount_keys):
+            total = _sum_amounts(values[column_index] for values in amounts[emplid])
+            if total is None:
+                printer_function(f"\u26A0 Warning: Could not add up '{key}' for emplid {emplid}; keeping the first record's value.")
+            else:
+                totals[key] = total
+        index.totals[emplid] = totals
+    return index
+
+# Second pass: yields each batch with the rows the index chose (the last or, for aggregate, the first occurrence with
+# the summed amounts written into it), so batches flow on to the lookups as they are read
+def _iter_indexed_batches(batches: Iterator[RecordTable], emplid_field: str, policy: str, index: _EmplidIndex) -> Iterator[RecordTable]:
+    chosen = index.last_position if policy == duplicate_policy_keep_last else index.first_position
+    records_read = 0
+    for batch in batches:
+        keep: List[int] = []
+        for offset, emplid in enumerate(batch.column(emplid_field)):
+            if not emplid or emplid not in index.duplicates or chosen.get(emplid) == records_read + offset:
+                keep.append(offset)
+        records_read += len(batch)
+
+        aggregated = [offset for offset in keep if batch.column(emplid_field)[offset] in index.totals]
+        if aggregated:
+            columns = list(batch.columns)
+            for key in {key for offset in aggregated for key in index.totals[batch.column(emplid_field)[offset]]}:
+                column_index = batch.keys.index(key)
+                column = columns[column_index] = list(columns[column_index]) # the reader's batch is left as it was
+                for offset in aggregated:
+                    totals = index.totals[batch.column(emplid_field)[offset]]
+                    if key in totals:
+                        column[offset] = totals[key]
+            batch = RecordTable(batch.keys, columns)
+
+        batch = _keep_rows(batch, keep)
+        if len(batch):
+            yield batch
+
+# Yields the RecordTable batches with one record per emplid across the whole input.
+# - keep_first and keep_all stream batch by batch; a set of the emplids seen so far is the only state.
+# - keep_last, aggregate and reject need to know every emplid first. Given read_batches (a callable that reads the input
+#   again and reports through the printer it is passed), a silent first pass indexes the emplids (reject fails at the first
+#   repeat there) and a second pass streams the chosen rows and prints the parse messages once, so memory stays at the
+#   emplid index and the lookups overlap the second read.
+# - Given a one-shot iterator, reject still stops at the first repeat, as it streams; keep_last and aggregate then hold
+#   the whole input before the first batch, and say so in the output.
+def iter_deduplicated_batches(printer_function, batches: Union[Iterator[RecordTable], Callable[[Callable[[str], None]], Iterator[RecordTable]]], emplid_field: str,
+                              batch_size: Optional[int] = None,
+                              policy: Optional[str] = None,
+                              aggregate_columns: Optional[Tuple[str, ...]] = None) -> Iterator[RecordTable]:
+    policy = policy or get_duplicate_policy()
+    aggregate_columns = aggregate_columns or get_aggregate_columns()
+    read_batches = batches if callable(batches) else None
+
+    streams = policy in (duplicate_policy_keep_first, duplicate_policy_keep_all) or (policy == duplicate_policy_reject and read_batches is None)
+    if streams:
+        seen: Dict[str, None] = {}
+        duplicates: Dict[str, None] = {}
+        records_in = records_out = 0
+        for batch in (read_batches(printer_function) if read_batches else batches): # type: ignore[operator]
+            records_in += len(batch)
+            if emplid_field in batch:
+                keep: List[int] = []
+                for position, emplid in enumerate(batch.column(emplid_field)):
+                    if emplid in seen:
+                        if policy == duplicate_policy_reject:
+                            raise DuplicateEmplidError(f"Duplicate emplid {emplid} in the input (record {records_in - len(batch) + position + 1}). "
+                                                       f"Remove it or set duplicate_emplid_policy to keep_first, keep_last or aggregate.")
+                        duplicates[emplid] = None
+                        if policy == duplicate_policy_keep_first:
+                            continue
+                    elif emplid:
+                        seen[emplid] = None
+                    keep.append(position)
+                batch = _keep_rows(batch, keep)
+            records_out += len(batch)
+            if len(batch):
+                yield batch
+        _print_report(printer_function, DuplicateReport(records_in, records_out, list(duplicates)), policy)
+        return
+
+    if read_batches is not None:
+        printer_function(f"\U0001F50D Checking emplids before streaming ({policy}): the input is read twice, keeping only the emplid index in memory.")
+        index = _index_emplids(printer_function, read_batches(_silent), emplid_field, policy, aggregate_columns)
+        if not index.has_field:
+            yield from read_batches(printer_function) # the caller reports the missing field
+            return
+        _print_report(printer_function, DuplicateReport(index.records_in, index.records_in - index.repeats, list(index.duplicates)), policy)
+        if policy == duplicate_policy_reject:
+            yield from read_batches(printer_function)
+            return
+        yield from _iter_indexed_batches(read_batches(printer_function), emplid_field, policy, index)
+        return
+
+    printer_function(f"\u26A0 duplicate_emplid_policy={policy} reads the whole input before the first batch goes on; "
+                     f"lookups and drafts start once it is loaded.")
+    table: Optional[RecordTable] = None
+    for batch in batches: # type: ignore[union-attr]
+        if table is None:
+            table = RecordTable(batch.keys, [list(column) for column in batch.columns])
+        else:
+            table.extend(batch)
+    if table is None:
+        return
+    if emplid_field not in table:
+        yield table # the caller reports the missing field
+        return
+
+    deduplicated, report = _deduplicate_table(printer_function, table, emplid_field, policy, aggregate_columns)
+    _print_report(printer_function, report, policy)
+
+    step = batch_size or len(deduplicated) or 1
+    for start in range(0, len(deduplicated), step):
+        yield deduplicated.slice(start, start + step)
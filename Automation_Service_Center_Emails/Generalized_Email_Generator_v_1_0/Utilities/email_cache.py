@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Final, Optional, Iterable, Tuple
+
+try: # importing env_values
+    from .constants import env_values
+except ImportError:
+    from constants import env_values # type: ignore
+
+try: # importing main_path
+    from .file_loader import main_path
+except ImportError:
+    from file_loader import main_path # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+email_cache_filename:               Final[str] = "email_lookup_cache.sqlite3"
+email_cache_path:                   Final[str] = os.path.normpath(os.path.join(main_path, email_cache_filename))
+default_email_cache_ttl_hours:      Final[int] = 168 # Found addresses are trusted for a week
+default_email_cache_miss_ttl_hours: Final[int] = 24  # Employees without an address are re-checked daily
+sqlite_chunk_size:                  Final[int] = 5000
+
+# Cache modes: use fresh entries and query only missing/expired emplids, query everything and rewrite, or bypass the cache
+cache_mode_refresh_stale:   Final[str] = "refresh_stale"
+cache_mode_refresh_all:     Final[str] = "refresh_all"
+cache_mode_off:             Final[str] = "off"
+cache_modes:                Final[Tuple[str, ...]] = (cache_mode_refresh_stale, cache_mode_refresh_all, cache_mode_off)
+#-------------------------------------------------------------------------------------------------------------------
+
+# Returns an hour setting from the .env file in seconds, or the default if it is missing or invalid
+def _env_hours(key: str, default: int) -> float:
+    try:
+        value = env_values.get(key)
+        return float(value) * 3600 if value else default * 3600
+    except (TypeError, ValueError):
+        return default * 3600
+
+# Returns the cache mode from the .env file (email_cache_mode), defaulting to refreshing stale entries only
+def get_email_cache_mode() -> str:
+    mode = (env_values.get('email_cache_mode') or cache_mode_refresh_stale).strip().lower()
+    return mode if mode in cache_modes else cache_mode_refresh_stale
+
+class EmailLookupCache:
+    """
+    On-disk emplid -> email address cache keyed by emplid and address type, with a TTL stored per entry.
+    Emplids the database had no address for are cached too (as '') so reruns skip them until they expire.
+    """
+    def __init__(self, db_path: str = email_cache_path,
+                 ttl_seconds: Optional[float] = None,
+                 miss_ttl_seconds: Optional[float] = None) -> None:
+        self.db_path: str = db_path
+        self.ttl_seconds: float = ttl_seconds if ttl_seconds is not None else _env_hours('email_cache_ttl_hours', default_email_cache_ttl_hours)
+        self.miss_ttl_seconds: float = miss_ttl_seconds if miss_ttl_seconds is not None else _env_hours('email_cache_miss_ttl_hours', default_email_cache_miss_ttl_hours)
+        self._lock = threading.Lock()
+        self._initialized: bool = False
+
+        # Counters for the most recent lookup, printed in the run summary
+        self.hits: int = 0
+        self.misses: int = 0
+        self.expired: int = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        if not self._initialized:
+            connection.execute(
+                '''
+                    create table if not exists email_cache (
+                          emplid        text not null
+                        , e_addr_type   text not null
+                        , email_addr    text not null
+                        , expires_at    real not null
+                        , primary key (emplid, e_addr_type)
+                    )
+                '''
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    # Returns the fresh cached addresses and the emplids that still need a database lookup (missing or expired)
+    def get_many(self, emplids: List[str], e_addr_type: str = 'BUSN') -> Tuple[Dict[str, str], List[str]]:
+        cached: Dict[str, str] = {}
+        expired_emplids: set[str] = set()
+        now = time.time()
+
+        with self._lock:
+            connection = self._connect()
+            try:
+                for start in range(0, len(emplids), sqlite_chunk_size):
+                    rows = connection.execute(
+                        '''
+                            select emplid, email_addr, expires_at
+                            from email_cache
+                            where emplid in (select value from json_each(?))
+                              and e_addr_type = ?
+                        ''',
+                        (json.dumps(emplids[start:start + sqlite_chunk_size]), e_addr_type)
+                    )
+                    for emplid, email_addr, expires_at in rows:
+                        if expires_at > now:
+                            cached[emplid] = email_addr
+                        else:
+                            expired_emplids.add(emplid)
+            finally:
+                connection.close()
+
+            to_query = [emplid for emplid in emplids if emplid not in cached]
+
+            self.hits += len(cached)
+            self.misses += len(to_query)
+            self.expired += len(expired_emplids)
+
+        return cached, to_query
+
+    # Stores the addresses returned by the database; queried emplids without a result are stored as ''
+    def put_many(self, emails: Dict[str, str], queried_emplids: Iterable[str], e_addr_type: str = 'BUSN') -> None:
+        now = time.time()
+        entries = [
+            (emplid, e_addr_type, emails.get(emplid) or '', now + (self.ttl_seconds if emails.get(emplid) else self.miss_ttl_seconds))
+            for emplid in queried_emplids
+        ]
+        if not entries:
+            return
+
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    connection.executemany("insert or replace into email_cache values (?, ?, ?, ?)", entries)
+            finally:
+                connection.close()
+
+    # Removes every cached entry, or only the expired ones
+    def clear(self, expired_only: bool = False) -> None:
+        with self._lock:
+            connection = self._connect()
+            try:
+                with connection:
+                    if expired_only:
+                        connection.execute("delete from email_cache where expires_at <= ?", (time.time(),))
+                    else:
+                        connection.execute("delete from email_cache")
+            finally:
+                connection.close()
+
+# Global instance shared by the lookups and the run summary
+_email_lookup_cache: Optional[EmailLookupCache] = None
+
+def get_email_lookup_cache() -> EmailLookupCache:
+    global _email_lookup_cache
+    if _email_lookup_cache is None:
+        _email_lookup_cache = EmailLookupCache()
+    return _email_lookup_cache
+
+# Returns the fresh cached addresses, the emplids still to query and the effective cache mode for one lookup.
+# reset_stats=False keeps counting across lookups, for runs that look up one batch at a time; report=False leaves the
+# hit line to the caller, which prints the counters once for the whole run.
+def read_email_cache(printer_function, emplids: List[str], cache_mode: Optional[str] = None, reset_stats: bool = True,
+                     report: bool = True) -> Tuple[Dict[str, str], List[str], str]:
+    cache_mode = cache_mode or get_email_cache_mode()
+    cache = get_email_lookup_cache()
+    if reset_stats:
+        cache.reset_stats()
+
+    if cache_mode == cache_mode_off:
+        return {}, emplids, cache_mode
+
+    if cache_mode == cache_mode_refresh_all:
+        cache.misses += len(emplids)
+        return {}, emplids, cache_mode
+
+    try:
+        expired = cache.expired
+        cached, to_query = cache.get_many(emplids)
+        expired = cache.expired - expired
+        if report:
+            printer_function(f"\U0001F5C3 Email cache: {len(cached)} hit{'s' if len(cached) != 1 else ''}, {len(to_query)} to query ({expired} expired)")
+        return cached, to_query, cache_mode
+    except sqlite3.Error as error:
+        printer_function(f"\u26A0 Warning: Email cache unavailable, querying all emplids: {error}")
+        return {}, emplids, cache_mode_off
+
+# Stores freshly queried addresses unless the cache is bypassed
+def write_email_cache(printer_function, emails: Dict[str, str], queried_emplids: List[str], cache_mode: str) -> None:
+    if cache_mode == cache_mode_off:
+        return
+
+    try:
+        get_email_lookup_cache().put_many(emails, queried_emplids)
+    except sqlite3.Error as error:
+        printer_function(f"\u26A0 Warning: Could not update email cache: {error}")
@@ -0,0 +1,212 @@
+import time
+import asyncio
+from typing import List, Dict, Final, Optional, NamedTuple
+
+try: # importing normalize_field_for_matching()
+    from .file_loader import normalize_field_for_matching
+except ImportError:
+    from file_loader import normalize_field_for_matching # type: ignore
+
+try: # importing the .env integer helper
+    from .constants import env_int
+except ImportError:
+    from constants import env_int # type: ignore
+
+try: # importing the shared lookup helpers
+    from .db_utilities import oracledb, _chunked, emplid_collection_type, default_emplid_chunk_size
+except ImportError:
+    from db_utilities import oracledb, _chunked, emplid_collection_type, default_emplid_chunk_size # type: ignore
+
+try: # importing the named SQL statements
+    from .statement_registry import get_statement_registry
+except ImportError:
+    from statement_registry import get_statement_registry # type: ignore
+
+try: # importing the per-call timing spans
+    from .query_metrics import QueryCall, get_query_metrics
+except ImportError:
+    from query_metrics import QueryCall, get_query_metrics # type: ignore
+
+try: # importing the columnar record store
+    from .record_table import RecordTable, EmployeeRecords
+except ImportError:
+    from record_table import RecordTable, EmployeeRecords # type: ignore
+
+try: # importing the async worker that owns the connection pool
+    from .db_async_utilities import get_async_database_worker, acquire_connection_async, PoolLogonError
+except ImportError:
+    from db_async_utilities import get_async_database_worker, acquire_connection_async, PoolLogonError # type: ignore
+
+class EnrichmentColumn(NamedTuple):
+    join:       str # which join in enrichment_joins supplies the column
+    expression: str # whitelisted select expression
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+# Joins against the bound emplid collection (alias ids). Current PS_JOB row is the max effdt/effseq on record 0.
+enrichment_joins: Final[Dict[str, str]] = {
+    'name': "left join ps_person_name n on n.emplid = ids.column_value",
+    'job':
+        '''left join ps_job j
+            on  j.emplid = ids.column_value
+            and j.empl_rcd = 0
+            and j.effdt = (select max(j1.effdt) from ps_job j1 where j1.emplid = j.emplid and j1.empl_rcd = j.empl_rcd and j1.effdt <= sysdate)
+            and j.effseq = (select max(j2.effseq) from ps_job j2 where j2.emplid = j.emplid and j2.empl_rcd = j.empl_rcd and j2.effdt = j.effdt)''',
+    'busn_email': "left join ps_email_addresses b on b.emplid = ids.column_value and b.e_addr_type = 'BUSN'",
+    'home_email': "left join ps_email_addresses h on h.emplid = ids.column_value and h.e_addr_type = 'HOME'",
+}
+
+# Whitelisted PeopleSoft columns keyed by the normalized placeholder name they fill
+enrichment_catalogue: Final[Dict[str, EnrichmentColumn]] = {
+    'name':             EnrichmentColumn('name', "n.name_display"),
+    'first_name':       EnrichmentColumn('name', "n.first_name"),
+    'last_name':        EnrichmentColumn('name', "n.last_name"),
+    'middle_name':      EnrichmentColumn('name', "n.middle_name"),
+    'preferred_name':   EnrichmentColumn('name', "nvl(trim(n.pref_first_name), n.first_name)"),
+    'deptid':           EnrichmentColumn('job', "j.deptid"),
+    'jobcode':          EnrichmentColumn('job', "j.jobcode"),
+    'location':         EnrichmentColumn('job', "j.location"),
+    'business_unit':    EnrichmentColumn('job', "j.business_unit"),
+    'company':          EnrichmentColumn('job', "j.company"),
+    'supervisor_id':    EnrichmentColumn('job', "j.supervisor_id"),
+    'reports_to':       EnrichmentColumn('job', "j.reports_to"),
+    'empl_status':      EnrichmentColumn('job', "j.empl_status"),
+    'full_part_time':   EnrichmentColumn('job', "j.full_part_time"),
+    'std_hours':        EnrichmentColumn('job', "j.std_hours"),
+    'business_email':   EnrichmentColumn('busn_email', "b.email_addr"),
+    'home_email':       EnrichmentColumn('home_email', "h.email_addr"),
+    'email_address':    EnrichmentColumn('busn_email', "coalesce(b.email_addr, h.email_addr)"), # BUSN with HOME fallback
+}
+
+# Other spellings users put in templates, mapped to catalogue keys
+enrichment_aliases: Final[Dict[str, str]] = {
+    'full_name':        'name',
+    'employee_name':    'name',
+    'name_display':     'name',
+    'pref_first_name':  'preferred_name',
+    'department':       'deptid',
+    'dept':             'deptid',
+    'dept_id':          'deptid',
+    'job_code':         'jobcode',
+    'manager':          'supervisor_id',
+    'manager_id':       'supervisor_id',
+    'supervisor':       'supervisor_id',
+    'busn_email':       'business_email',
+    'work_email':       'business_email',
+    'personal_email':   'home_email',
+    'email_addr':       'email_address',
+}
+#-------------------------------------------------------------------------------------------------------------------
+
+# Returns placeholder -> catalogue key for every placeholder the database can fill
+def resolve_enrichment_placeholders(placeholders: List[str]) -> Dict[str, str]:
+    resolved: Dict[str, str] = {}
+    for placeholder in placeholders:
+        normalized = normalize_field_for_matching(placeholder)
+        catalogue_key = enrichment_aliases.get(normalized, normalized)
+        if catalogue_key in enrichment_catalogue:
+            resolved[placeholder] = catalogue_key
+    return resolved
+
+# Builds one select over the bound emplid collection with only the joins the requested columns need
+def build_enrichment_sql(catalogue_keys: List[str]) -> str:
+    columns = sorted(set(catalogue_keys)) # sorted so the same placeholders always produce the same statement text
+    joins: List[str] = []
+    for catalogue_key in columns:
+        column = enrichment_catalogue[catalogue_key]
+        joins_needed = [column.join] + (['home_email'] if catalogue_key == 'email_address' else [])
+        for join in joins_needed:
+            if join not in joins:
+                joins.append(join)
+
+    select_list = "\n            , ".join(f"{enrichment_catalogue[catalogue_key].expression} as {catalogue_key}" for catalogue_key in columns)
+    join_list = "\n        ".join(enrichment_joins[join] for join in joins)
+
+    return \
+    f'''
+        select
+              ids.column_value as emplid
+            , {select_list}
+        from
+            table(:emplids) ids
+        {join_list}
+    '''
+
+# Runs one emplid chunk on its own pooled connection
+async def _fetch_enrichment_chunk(pool: oracledb.AsyncConnectionPool, statement_name: str, columns: List[str], emplid_chunk: List[str], call: QueryCall) -> Dict[str, Dict[str, str]]:
+    start_time = time.perf_counter()
+    async with await acquire_connection_async(pool) as connection:
+        emplid_list_type = await connection.gettype(emplid_collection_type)
+        call.add_connect(time.perf_counter() - start_time, round_trips=1)
+        with connection.cursor() as cursor:
+            cursor.arraysize = len(emplid_chunk)
+            cursor.prefetchrows = len(emplid_chunk) + 1
+            rows = await get_statement_registry().fetch_all_async(cursor, statement_name, {'emplids': emplid_list_type.newobject(emplid_chunk)}, call)
+            return {row[0]: {column: '' if value is None else str(value) for column, value in zip(columns, row[1:])} for row in rows}
+
+# Returns emplid -> {catalogue key: value} for every requested column in one batched query per emplid chunk.
+# Returns None when the credentials are rejected, which the first chunk to open a connection finds out. report=False skips the progress line.
+async def fetch_enrichment_async(printer_function, emplids: List[str], catalogue_keys: List[str],
+                                 username: Optional[str] = None,
+                                 password: Optional[str] = None,
+                                 report: bool = True) -> Optional[Dict[str, Dict[str, str]]]:
+    columns = sorted(set(catalogue_keys))
+    if not columns or not emplids:
+        return {}
+
+    unique_emplids: List[str] = list(dict.fromkeys(str(emplid) for emplid in emplids))
+    # Each column set is its own named statement so the report shows which enrichment ran
+    statement_name = f"enrichment[{','.join(columns)}]"
+    get_statement_registry().register(statement_name, build_enrichment_sql(columns))
+
+    pool = await get_async_database_worker().get_pool(username, password)
+
+    chunk_size: int = max(1, env_int('emplid_chunk_size', default_emplid_chunk_size))
+    if report:
+        printer_function(f"\U0001F5C4 Fetching {', '.join(columns)} for {len(unique_emplids)} employees...")
+
+    query_metrics = get_query_metrics()
+    call = query_metrics.start_call(statement_name)
+
+    enrichment: Dict[str, Dict[str, str]] = {}
+    try:
+        for chunk_values in await asyncio.gather(*(_fetch_enrichment_chunk(pool, statement_name, columns, chunk, call) for chunk in _chunked(unique_emplids, chunk_size))):
+            enrichment.update(chunk_values)
+    except PoolLogonError:
+        printer_function("Login cancelled or invalid credentials provided")
+        return None
+    except oracledb.Error as error:
+        printer_function(f"Error querying the database: {error}")
+        raise
+    finally:
+        query_metrics.finish_call(call)
+
+    return enrichment
+
+# Stores the fetched values in each employee record under the placeholder text so the template replacement finds them
+# (one column per placeholder for a RecordTable). report=False skips the per-placeholder count lines.
+def apply_enrichment_to_employees(printer_function, employees: EmployeeRecords, emplid_field: str,
+                                  placeholder_keys: Dict[str, str], enrichment: Dict[str, Dict[str, str]],
+                                  report: bool = True) -> EmployeeRecords:
+    filled: Dict[str, int] = {placeholder: 0 for placeholder in placeholder_keys}
+
+    if isinstance(employees, RecordTable):
+        emplids = employees.column(emplid_field) if emplid_field in employees else [''] * len(employees)
+        employee_values = [enrichment.get(str(emplid), {}) for emplid in emplids]
+        for placeholder, catalogue_key in placeholder_keys.items():
+            column = [values.get(catalogue_key, '') for values in employee_values]
+            employees.set_column(placeholder, column)
+            filled[placeholder] = sum(1 for value in column if value)
+    else:
+        for employee in employees:
+            values = enrichment.get(str(employee.get(emplid_field, '')), {})
+            for placeholder, catalogue_key in placeholder_keys.items():
+                value = values.get(catalogue_key, '')
+                employee[placeholder] = value
+                if value:
+                    filled[placeholder] += 1
+
+    if report:
+        for placeholder, count in filled.items():
+            printer_function(f"  - {{{{{placeholder}}}}} <- {placeholder_keys[placeholder]}: {count} of {len(employees)} employees")
+
+    return employees
@@ -0,0 +1,579 @@
+"""
+Drop-in stand-in for the parts of python-oracledb that db_utilities, db_async_utilities and enrichment use,
+backed by a local SQLite file with seeded PeopleSoft tables. Select it with db_driver=fake in the .env file.
+
+.env settings:
+    fake_db_path        SQLite file (default: fake_oracle.sqlite3 beside Confidential_Data)
+    fake_db_employees   employees to seed when the file does not exist yet (default 10000)
+    fake_db_latency_ms  injected latency per round trip (default 0)
+    fake_db_logon_ms    injected latency per new session (default 0)
+    fake_db_password    password the stand-in accepts (default: any non-empty password)
+
+Generate a large data set from the command line:
+    python Utilities/fake_oracledb.py --employees 1000000
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import threading
+from typing import List, Dict, Final, Optional, Any, Tuple, Callable
+
+try: # importing env_values
+    from .constants import env_values
+except ImportError:
+    from constants import env_values # type: ignore
+
+try: # importing main_path
+    from .file_loader import main_path
+except ImportError:
+    from file_loader import main_path # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+default_fake_db_path:       Final[str] = os.path.normpath(os.path.join(main_path, "fake_oracle.sqlite3"))
+default_seed_employees:     Final[int] = 10000
+insert_batch_size:          Final[int] = 50000
+
+first_names: Final[Tuple[str, ...]] = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+                                       "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Maria")
+last_names:  Final[Tuple[str, ...]] = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+                                       "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Nguyen")
+locations:   Final[Tuple[str, ...]] = ("MAIN", "NORTH", "SOUTH", "EAST", "WEST", "CLINIC1", "CLINIC2", "REMOTE")
+
+# Oracle constructs rewritten to their SQLite equivalents before execution
+sql_rewrites: Final[List[Tuple[re.Pattern, str]]] = [
+    (re.compile(r'\btable\(\s*:(\w+)\s*\)', re.IGNORECASE), r'(select value as column_value from json_each(:\1))'),
+    (re.compile(r'\bsysdate\b', re.IGNORECASE), "date('now')"),
+    (re.compile(r'\bnvl\(', re.IGNORECASE), "ifnull("),
+]
+#-------------------------------------------------------------------------------------------------------------------
+
+class Error(Exception):
+    pass
+
+class DatabaseError(Error):
+    pass
+
+class InterfaceError(Error):
+    pass
+
+# Round trips made through the stand-in since import, across all connections
+round_trips: int = 0
+_round_trip_lock: Final[threading.Lock] = threading.Lock()
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        value = env_values.get(key)
+        return float(value) if value else default
+    except (TypeError, ValueError):
+        return default
+
+def _count_round_trips(count: int) -> float:
+    global round_trips
+    with _round_trip_lock:
+        round_trips += count
+    return count * _env_float('fake_db_latency_ms', 0) / 1000
+
+def _check_credentials(user: Optional[str], password: Optional[str]) -> None:
+    expected_password = env_values.get('fake_db_password')
+    if not user or not password or (expected_password and password != expected_password):
+        raise DatabaseError("ORA-01017: invalid username/password; logon denied")
+
+#-- DATA GENERATION ------------------------------------------------------------------------------------------------
+# Creates (or replaces) a SQLite file with ps_person_name, ps_job and ps_email_addresses for employee_count employees
+def generate_fake_database(db_path: str = default_fake_db_path, employee_count: int = default_seed_employees,
+                           seed: int = 20240101, printer_function: Callable[[str], None] = print) -> None:
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    random_generator = random.Random(seed)
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(
+            '''
+                pragma journal_mode = off;
+                pragma synchronous = off;
+
+                create table ps_person_name (
+                      emplid            text primary key
+                    , name              text
+                    , name_display      text
+                    , first_name        text
+                    , middle_name       text
+                    , last_name         text
+                    , pref_first_name   text
+                );
+
+                create table ps_job (
+                      emplid            text
+                    , empl_rcd          integer
+                    , effdt             text
+                    , effseq            integer
+                    , business_unit     text
+                    , company           text
+                    , deptid            text
+                    , jobcode           text
+                    , location          text
+                    , supervisor_id     text
+                    , reports_to        text
+                    , empl_status       text
+                    , full_part_time    text
+                    , std_hours         real
+                    , primary key (emplid, empl_rcd, effdt, effseq)
+                );
+
+                create table ps_email_addresses (
+                      emplid            text
+                    , e_addr_type       text
+                    , email_addr        text
+                    , pref_email_flag   text
+                    , primary key (emplid, e_addr_type)
+                );
+            '''
+        )
+
+        for start in range(0, employee_count, insert_batch_size):
+            people, jobs, emails = [], [], []
+
+            for index in range(start, min(start + insert_batch_size, employee_count)):
+                emplid = f"{index + 1:07d}"
+                first_name = random_generator.choice(first_names)
+                last_name = random_generator.choice(last_names)
+
+                people.append((emplid, f"{last_name},{first_name}", f"{first_name} {last_name}", first_name, None, last_name, None))
+
+                supervisor_id = f"{random_generator.randint(1, max(1, employee_count)):07d}"
+                jobs.append((emplid, 0, "2020-01-01", 0, "BU001", "CO1", f"D{index % 400:04d}", f"J{index % 250:05d}",
+                             random_generator.choice(locations), supervisor_id, "", "A", "F", 40.0))
+                if index % 5 == 0: # a fifth of the population has a later transfer row
+                    jobs.append((emplid, 0, "2024-07-01", 0, "BU001", "CO1", f"D{(index + 7) % 400:04d}", f"J{index % 250:05d}",
+                                 random_generator.choice(locations), supervisor_id, "", "A", "P", 20.0))
+
+                if index % 50 != 0: # two percent of employees have no business email
+                    emails.append((emplid, "BUSN", f"{first_name}.{last_name}.{emplid}@example.org".lower(), "Y"))
+                emails.append((emplid, "HOME", f"{first_name[0]}{last_name}{emplid}@mail.example.com".lower(), "N"))
+
+            connection.executemany("insert into ps_person_name values (?, ?, ?, ?, ?, ?, ?)", people)
+            connection.executemany("insert into ps_job values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", jobs)
+            connection.executemany("insert into ps_email_addresses values (?, ?, ?, ?)", emails)
+            connection.commit()
+
+            printer_function(f"Seeded {min(start + insert_batch_size, employee_count)} of {employee_count} employees")
+    finally:
+        connection.close()
+
+_seed_lock: Final[threading.Lock] = threading.Lock()
+
+def _get_database_path() -> str:
+    db_path = env_values.get('fake_db_path') or default_fake_db_path
+    with _seed_lock:
+        if not os.path.exists(db_path):
+            generate_fake_database(db_path, int(_env_float('fake_db_employees', default_seed_employees)))
+    return db_path
+
+#-- OBJECT TYPES ---------------------------------------------------------------------------------------------------
+class DbObjectType:
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+
+    # Collections are bound to SQLite as JSON arrays and read back through json_each()
+    def newobject(self, values: Optional[List[Any]] = None) -> "DbObject":
+        return DbObject(self, list(values or []))
+
+class DbObject:
+    def __init__(self, object_type: DbObjectType, values: List[Any]) -> None:
+        self.type: DbObjectType = object_type
+        self._values: List[Any] = values
+
+    def aslist(self) -> List[Any]:
+        return list(self._values)
+
+#-- CURSORS --------------------------------------------------------------------------------------------------------
+class _CursorCore:
+    """
+    Shared execute/fetch logic. Each method returns the number of round trips the real driver would have made,
+    so the sync and async cursors can inject the matching latency.
+    """
+    def __init__(self, sqlite_connection: sqlite3.Connection) -> None:
+        self._sqlite_connection = sqlite_connection
+        self._sqlite_cursor: Optional[sqlite3.Cursor] = None
+        self._buffer: List[tuple] = []
+        self._exhausted: bool = True
+        self.arraysize: int = 100
+        self.prefetchrows: int = 2
+        self.rowfactory: Optional[Callable[..., Any]] = None
+        self.description: Optional[List[tuple]] = None
+        self.rowcount: int = 0
+
+    @staticmethod
+    def _translate(sql_query: str, parameters: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        for pattern, replacement in sql_rewrites:
+            sql_query = pattern.sub(replacement, sql_query)
+        bound = {name: json.dumps(value.aslist()) if isinstance(value, DbObject) else value for name, value in parameters.items()}
+        return sql_query, bound
+
+    def execute(self, sql_query: str, parameters: Optional[Dict[str, Any]] = None, **keyword_parameters: Any) -> int:
+        sql_query, bound = self._translate(sql_query, {**(parameters or {}), **keyword_parameters})
+        try:
+            self._sqlite_cursor = self._sqlite_connection.execute(sql_query, bound)
+        except sqlite3.Error as error:
+            raise DatabaseError(f"ORA-00900: stand-in could not run statement: {error}") from error
+
+        self.description = [(column[0].upper(), None, None, None, None, None, True) for column in (self._sqlite_cursor.description or [])]
+        self.rowcount = 0
+        self._exhausted = False
+        self._buffer = []
+        self._pull(self.prefetchrows) # prefetched rows come back with the execute round trip
+        return 1
+
+    def _pull(self, count: int) -> None:
+        if self._exhausted or self._sqlite_cursor is None:
+            return
+        rows = self._sqlite_cursor.fetchmany(max(1, count)) if count > 0 else []
+        if count > 0 and len(rows) < count:
+            self._exhausted = True
+        self._buffer.extend(rows)
+
+    # Returns (rows, round trips) for up to count rows
+    def fetch(self, count: Optional[int]) -> Tuple[List[Any], int]:
+        trips = 0
+        while (count is None or len(self._buffer) < count) and not self._exhausted:
+            self._pull(max(1, self.arraysize))
+            trips += 1
+
+        if count is None:
+            rows, self._buffer = self._buffer, []
+        else:
+            rows, self._buffer = self._buffer[:count], self._buffer[count:]
+
+        self.rowcount += len(rows)
+        if self.rowfactory is not None:
+            rows = [self.rowfactory(*row) for row in rows]
+        return rows, trips
+
+class Cursor:
+    def __init__(self, connection: "Connection") -> None:
+        self.connection: "Connection" = connection
+        self._core = _CursorCore(connection._sqlite_connection)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._core, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ('arraysize', 'prefetchrows', 'rowfactory'):
+            setattr(self._core, name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def execute(self, statement: str, parameters: Optional[Dict[str, Any]] = None, **keyword_parameters: Any) -> "Cursor":
+        time.sleep(_count_round_trips(self._core.execute(statement, parameters, **keyword_parameters)))
+        return self
+
+    def _fetch(self, count: Optional[int]) -> List[Any]:
+        rows, trips = self._core.fetch(count)
+        time.sleep(_count_round_trips(trips))
+        return rows
+
+    def fetchone(self) -> Optional[Any]:
+        rows = self._fetch(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        return self._fetch(size or self._core.arraysize)
+
+    def fetchall(self) -> List[Any]:
+        return self._fetch(None)
+
+    def __iter__(self):
+        while True:
+            rows = self._fetch(self._core.arraysize)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+class AsyncCursor:
+    def __init__(self, connection: "AsyncConnection") -> None:
+        self.connection: "AsyncConnection" = connection
+        self._core = _CursorCore(connection._sqlite_connection)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._core, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ('arraysize', 'prefetchrows', 'rowfactory'):
+            setattr(self._core, name, value)
+        else:
+            super().__setattr__(name, value)
+
+    async def execute(self, statement: str, parameters: Optional[Dict[str, Any]] = None, **keyword_parameters: Any) -> None:
+        await asyncio.sleep(_count_round_trips(self._core.execute(statement, parameters, **keyword_parameters)))
+
+    async def _fetch(self, count: Optional[int]) -> List[Any]:
+        rows, trips = self._core.fetch(count)
+        await asyncio.sleep(_count_round_trips(trips))
+        return rows
+
+    async def fetchone(self) -> Optional[Any]:
+        rows = await self._fetch(1)
+        return rows[0] if rows else None
+
+    async def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        return await self._fetch(size or self._core.arraysize)
+
+    async def fetchall(self) -> List[Any]:
+        return await self._fetch(None)
+
+    async def __aiter__(self):
+        while True:
+            rows = await self._fetch(self._core.arraysize)
+            if not rows:
+                return
+            for row in rows:
+                yield row
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "AsyncCursor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+#-- CONNECTIONS ----------------------------------------------------------------------------------------------------
+class _ConnectionBase:
+    def __init__(self, user: Optional[str], password: Optional[str], dsn: Optional[str], stmtcachesize: int = 20) -> None:
+        _check_credentials(user, password)
+        self.username: Optional[str] = user
+        self.dsn: Optional[str] = dsn
+        self.stmtcachesize: int = stmtcachesize
+        self._sqlite_connection = sqlite3.connect(_get_database_path(), check_same_thread=False)
+        self._pool: Optional[Any] = None
+        self._closed: bool = False
+
+    def _logon_delay(self) -> float:
+        return _count_round_trips(1) + _env_float('fake_db_logon_ms', 0) / 1000
+
+    def _release_or_close(self) -> None:
+        if self._pool is not None:
+            self._pool._release(self)
+        else:
+            self._closed = True
+            self._sqlite_connection.close()
+
+class Connection(_ConnectionBase):
+    def __init__(self, user: Optional[str] = None, password: Optional[str] = None, dsn: Optional[str] = None, stmtcachesize: int = 20) -> None:
+        super().__init__(user, password, dsn, stmtcachesize)
+        time.sleep(self._logon_delay())
+
+    def cursor(self) -> Cursor:
+        return Cursor(self)
+
+    def gettype(self, name: str) -> DbObjectType:
+        time.sleep(_count_round_trips(1))
+        return DbObjectType(name.upper())
+
+    def ping(self) -> None:
+        time.sleep(_count_round_trips(1))
+
+    def commit(self) -> None:
+        self._sqlite_connection.commit()
+
+    def close(self) -> None:
+        self._release_or_close()
+
+    def __enter__(self) -> "Connection":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+class AsyncConnection(_ConnectionBase):
+    def cursor(self) -> AsyncCursor:
+        return AsyncCursor(self)
+
+    async def gettype(self, name: str) -> DbObjectType:
+        await asyncio.sleep(_count_round_trips(1))
+        return DbObjectType(name.upper())
+
+    async def ping(self) -> None:
+        await asyncio.sleep(_count_round_trips(1))
+
+    async def commit(self) -> None:
+        self._sqlite_connection.commit()
+
+    async def close(self) -> None:
+        self._release_or_close()
+
+    async def __aenter__(self) -> "AsyncConnection":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+def connect(user: Optional[str] = None, password: Optional[str] = None, dsn: Optional[str] = None, **kwargs: Any) -> Connection:
+    return Connection(user=user, password=password, dsn=dsn, stmtcachesize=kwargs.get('stmtcachesize') or 20)
+
+async def connect_async(user: Optional[str] = None, password: Optional[str] = None, dsn: Optional[str] = None, **kwargs: Any) -> AsyncConnection:
+    connection = AsyncConnection(user, password, dsn, kwargs.get('stmtcachesize') or 20)
+    await asyncio.sleep(connection._logon_delay())
+    return connection
+
+#-- POOLS ----------------------------------------------------------------------------------------------------------
+class _PoolBase:
+    def __init__(self, user: Optional[str], password: Optional[str], dsn: Optional[str],
+                 min: int = 1, max: int = 2, increment: int = 1, stmtcachesize: int = 20, **kwargs: Any) -> None:
+        self._user = user
+        self._password = password
+        self.dsn: Optional[str] = dsn
+        self.min: int = min
+        self.max: int = max
+        self.increment: int = increment
+        self.stmtcachesize: int = stmtcachesize
+        self._idle: List[Any] = []
+        self._busy: int = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._closed: bool = False
+
+    @property
+    def opened(self) -> int:
+        return len(self._idle) + self._busy
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    # Returns (idle connection or None, whether a slot was reserved). No slot means the pool is at max and the caller waits.
+    def _try_take(self) -> Tuple[Optional[Any], bool]:
+        if self._closed:
+            raise InterfaceError("DPY-1002: connection pool is not open")
+        with self._lock:
+            if self._idle:
+                self._busy += 1
+                return self._idle.pop(), True
+            if self.opened >= self.max:
+                return None, False
+            self._busy += 1
+            return None, True
+
+    def _give_back_slot(self) -> None:
+        with self._lock:
+            self._busy -= 1
+            self._available.notify()
+
+    def _adopt(self, connection: Any) -> Any:
+        connection._pool = self
+        return connection
+
+    def _release(self, connection: Any) -> None:
+        with self._lock:
+            self._busy -= 1
+            if self._closed:
+                connection._sqlite_connection.close()
+            else:
+                self._idle.append(connection)
+            self._available.notify()
+
+    def _close_idle(self) -> None:
+        self._closed = True
+        with self._lock:
+            for connection in self._idle:
+                connection._sqlite_connection.close()
+            self._idle.clear()
+
+class ConnectionPool(_PoolBase):
+    def acquire(self) -> Connection:
+        connection, reserved = self._try_take()
+        while not reserved:
+            with self._lock:
+                self._available.wait(timeout=0.05)
+            connection, reserved = self._try_take()
+
+        if connection is not None:
+            return connection
+        try:
+            return self._adopt(Connection(self._user, self._password, self.dsn, self.stmtcachesize))
+        except Error:
+            self._give_back_slot()
+            raise
+
+    def release(self, connection: Connection) -> None:
+        connection.close()
+
+    def close(self, force: bool = False) -> None:
+        self._close_idle()
+
+class _AsyncAcquire:
+    def __init__(self, pool: "AsyncConnectionPool") -> None:
+        self._pool = pool
+        self._connection: Optional[AsyncConnection] = None
+
+    async def _acquire(self) -> AsyncConnection:
+        connection, reserved = self._pool._try_take()
+        while not reserved:
+            await asyncio.sleep(0.001)
+            connection, reserved = self._pool._try_take()
+
+        if connection is None:
+            try:
+                connection = self._pool._adopt(AsyncConnection(self._pool._user, self._pool._password, self._pool.dsn, self._pool.stmtcachesize))
+                await asyncio.sleep(connection._logon_delay())
+            except Error:
+                self._pool._give_back_slot()
+                raise
+        self._connection = connection
+        return connection
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self) -> AsyncConnection:
+        return await self._acquire()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+
+class AsyncConnectionPool(_PoolBase):
+    def acquire(self) -> _AsyncAcquire:
+        return _AsyncAcquire(self)
+
+    async def release(self, connection: AsyncConnection) -> None:
+        await connection.close()
+
+    async def close(self, force: bool = False) -> None:
+        self._close_idle()
+
+def create_pool(user: Optional[str] = None, password: Optional[str] = None, dsn: Optional[str] = None, **kwargs: Any) -> ConnectionPool:
+    return ConnectionPool(user, password, dsn, **kwargs)
+
+def create_pool_async(user: Optional[str] = None, password: Optional[str] = None, dsn: Optional[str] = None, **kwargs: Any) -> AsyncConnectionPool:
+    return AsyncConnectionPool(user, password, dsn, **kwargs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the SQLite data set used by the fake oracledb driver.")
+    parser.add_argument("--employees", type=int, default=default_seed_employees, help="number of synthetic employees")
+    parser.add_argument("--path", default=env_values.get('fake_db_path') or default_fake_db_path, help="SQLite file to create")
+    parser.add_argument("--seed", type=int, default=20240101, help="random seed for repeatable data")
+    arguments = parser.parse_args()
+
+    start_time = time.perf_counter()
+    generate_fake_database(arguments.path, arguments.employees, arguments.seed)
+    print(f"Created {arguments.path} in {time.perf_counter() - start_time:.1f}s")
+    sys.exit(0)
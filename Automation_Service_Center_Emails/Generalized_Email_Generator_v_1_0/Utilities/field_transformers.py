@@ -0,0 +1,84 @@
+import re
+from typing import Dict, Final, Callable, Optional
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+# Compiled once at import instead of on every cell
+name_strip_pattern:         Final[re.Pattern] = re.compile(r'[^\w\s-]')
+currency_strip_pattern:     Final[re.Pattern] = re.compile(r'[^\d.-]')
+
+max_name_length:            Final[int] = 500
+max_currency_length:        Final[int] = 50
+max_currency_value:         Final[float] = 999999999.99
+
+# Transform kinds, also used by the loaders to recognise the built-in transformers
+transform_capitalize:               Final[str] = "capitalize"
+transform_currency:                 Final[str] = "currency"
+transform_currency_with_symbol:     Final[str] = "currency_with_symbol"
+#-------------------------------------------------------------------------------------------------------------------
+
+def capitalize_name(value: str) -> str:
+    if not value or not value.strip():
+        return value
+
+    if len(value) > max_name_length:
+        value = value[:max_name_length]
+
+    value = name_strip_pattern.sub('', value)
+    return ' '.join(word.capitalize() for word in value.split())
+
+# Returns the value as a number clamped to +/- 999,999,999.99; raises ValueError when it is not a number
+def parse_currency(value: str) -> float:
+    if len(value) > max_currency_length:
+        value = value[:max_currency_length]
+
+    cleaned = currency_strip_pattern.sub('', value.strip())
+    number = float(cleaned) if cleaned else 0.0
+    return max(-max_currency_value, min(max_currency_value, number))
+
+# Returns the three built-in transformers; the currency ones report unparseable values through printer_function.
+# Build them once per window (or per read) and share them across columns.
+def create_transformer_functions(printer_function) -> Dict[str, Callable[[str], str]]:
+
+    def currency_format(value: str) -> str:
+        if not value or not value.strip():
+            return "0.00"
+
+        try:
+            return f"{parse_currency(value):.2f}"
+        except ValueError:
+            printer_function(f"\u26A0 Warning: Could not convert '{value[:max_currency_length]}' to a number. Returning '0.00'.")
+            return "0.00"
+
+    def currency_format_with_symbol(value: str) -> str:
+        if not value or not value.strip():
+            return "$0.00"
+
+        try:
+            return f"${parse_currency(value):.2f}"
+        except ValueError:
+            printer_function(f"\u26A0 Warning: Could not convert '{value[:max_currency_length]}' to a number. Returning '$0.00'")
+            return "$0.00"
+
+    # Tag each transformer with its kind so other loaders can recognise it
+    capitalize_name.transform_kind = transform_capitalize                       # type: ignore[attr-defined]
+    currency_format.transform_kind = transform_currency                         # type: ignore[attr-defined]
+    currency_format_with_symbol.transform_kind = transform_currency_with_symbol # type: ignore[attr-defined]
+
+    return {
+        transform_capitalize:           capitalize_name,
+        transform_currency:             currency_format,
+        transform_currency_with_symbol: currency_format_with_symbol
+    }
+
+# Returns the transformers with the built-in ones rebuilt to report through printer_function (other transformers are kept),
+# for a read whose warnings should go elsewhere than the window's, or nowhere
+def rebind_transformers(transformers: Optional[Dict[str, Callable[[str], str]]], printer_function) -> Optional[Dict[str, Callable[[str], str]]]:
+    if not transformers:
+        return transformers
+
+    built_in = create_transformer_functions(printer_function)
+    rebound: Dict[str, Callable[[str], str]] = {}
+    for key, transform in transformers.items():
+        transform_kind = getattr(transform, 'transform_kind', None)
+        rebound[key] = built_in[transform_kind] if transform_kind in built_in else transform
+    return rebound
@@ -1,22 +1,51 @@
 import csv
+import io
 import os
 import codecs
 import re
+import datetime
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Final, Optional, Callable
+from typing import List, Dict, Final, Optional, Callable, Iterator, Any, TextIO, Tuple, Sequence, NamedTuple
 import tkinter as tk
 from tkinter import filedialog
 
+try: # importing the columnar record store
+    from .record_table import RecordTable
+except ImportError:
+    from record_table import RecordTable # type: ignore
+
+try: # importing install_required_libraries()
+    from .package_checker import install_required_libraries
+except ImportError:
+    from package_checker import install_required_libraries # type: ignore
+
+try: # importing the scandir-based folder index
+    from .directory_index import DirectoryIndex
+except ImportError:
+    from directory_index import DirectoryIndex # type: ignore
+
 #-- CONSTANTS ------------------------------------------------------------------------------------------------------
 base_confidential_data_folder:  Final[str] = "Confidential_Data"
 base_email_folder:              Final[str] = "Confidential_Data/Email_Templates"
 main_path:                      Final[str] = os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)),"../"))
 confidential_data_path:         Final[str] = os.path.normpath(os.path.join(main_path,base_confidential_data_folder))
 confidential_email_path:        Final[str] = os.path.normpath(os.path.join(main_path,base_email_folder))
+encoding_sample_bytes:          Final[int] = 64 * 1024 # bytes read up front to resolve a csv file's encoding
+encoding_fallback_errors:       Final[str] = "csv_cp1252_fallback"
+cp1252_undefined_bytes:         Final[frozenset] = frozenset({0x81, 0x8D, 0x8F, 0x90, 0x9D})
+csv_info_cache_size:            Final[int] = 64 # csv files whose sniffed encoding and headers are kept
+workbook_extensions:            Final[Tuple[str, ...]] = ('.xlsx', '.xlsm', '.xltx', '.xltm') # read through openpyxl's read-only mode
+input_extensions:               Final[Tuple[str, ...]] = ('.csv',) + workbook_extensions
 #-------------------------------------------------------------------------------------------------------------------
 
+# (source column index, record key, transformer or None), compiled once per file
+ColumnStep = Tuple[int, str, Optional[Callable[[str], str]]]
+ColumnPlan = Tuple[ColumnStep, ...]
+
 # Validates file path by verifying that it is safe to open.
-def validate_file_path(file_path: str, allowed_extensions: set[str], max_file_size_mb: int = 50) -> tuple[bool, str]:
+def validate_file_path(file_path: str, allowed_extensions: set[str], max_file_size_mb: Optional[int] = 50) -> tuple[bool, str]:
     try:
         path = Path(file_path)
 
@@ -32,9 +61,9 @@ def validate_file_path(file_path: str, allowed_extensions: set[str], max_file_si
         if path.suffix.lower() not in allowed_extensions:
             return False, f"Invalid file extension. Allowed: {allowed_extensions}"
         
-        # Check file size to prevent resource exhaustion
+        # Check file size to prevent resource exhaustion (None for streaming readers that never hold the whole file)
         file_size_mb = path.stat().st_size / (1024 * 1024)
-        if file_size_mb > max_file_size_mb:
+        if max_file_size_mb is not None and file_size_mb > max_file_size_mb:
             return False, f"File too large: {file_size_mb:.1f}MB (max: {max_file_size_mb}MB)"
         
         # Ensure file is within expected directories
@@ -75,8 +104,9 @@ def select_csv_file() -> Optional[str]:
     try:
         
         filename: str = filedialog.askopenfilename(
-            title       = "Select CSV File",
-            filetypes   = [("CSV files", "*.csv"), ("All files", "*.*")],
+            title       = "Select CSV or Excel File",
+            filetypes   = [("CSV and Excel files", " ".join(f"*{extension}" for extension in input_extensions)), ("CSV files", "*.csv"),
+                           ("Excel workbooks", " ".join(f"*{extension}" for extension in workbook_extensions)), ("All files", "*.*")],
             initialdir  = confidential_data_path,
             multiple    = False # type: ignore
         )
@@ -89,8 +119,8 @@ def select_csv_file() -> Optional[str]:
         if not os.path.exists(normalized_path):
             print(f"Error: Selected file does not exist: {normalized_path}")
             quit()
-        if not normalized_path.lower().endswith('.csv'):
-            print(f"Warning: Selected file is not a CSV file: {normalized_path}")
+        if not normalized_path.lower().endswith(input_extensions):
+            print(f"Warning: Selected file is not a CSV or Excel file: {normalized_path}")
             quit()
 
         return normalized_path
@@ -142,204 +172,475 @@ def select_email_file() -> Optional[str]:
         except:
             pass
 
-# Returns a list of csv files found inside the confidential_data_path folder
-def get_confidential_csv_files() -> List[Dict[str, str]]:
-    csv_files: List[Dict[str, str]] = []
-
-    if not os.path.exists(confidential_data_path):
-        print(f"Warning: Confidential directory does not exist: {confidential_data_path}")
-        return csv_files
-    elif not os.path.isdir(confidential_data_path):
-        print(f"Warning: Confidential path is not a directory: {confidential_data_path}")
-        return csv_files
+# Indexes of the confidential folders, scanned on first use and refreshed by a DirectoryWatcher (see directory_index.py)
+_confidential_csv_index: Final[DirectoryIndex] = DirectoryIndex(confidential_data_path, base_confidential_data_folder, input_extensions)
+_confidential_template_index: Final[DirectoryIndex] = DirectoryIndex(confidential_email_path, base_email_folder, ('.msg',))
 
-    try:
-        all_files: List[str] = os.listdir(confidential_data_path)
+def get_confidential_csv_index() -> DirectoryIndex:
+    return _confidential_csv_index
 
-        for filename in all_files:
-            if filename.lower().endswith('.csv'):
-                full_path: str = os.path.normpath(os.path.join(confidential_data_path, filename))
+def get_confidential_template_index() -> DirectoryIndex:
+    return _confidential_template_index
 
-                #Verify it's actually a file (not a subdirectory)
-                if os.path.isfile(full_path):
-                    file_dict: Dict[str, str] = {f"{base_confidential_data_folder}/{filename}": full_path}
-                    csv_files.append(file_dict)
-        
-    except PermissionError:
-        print(f"Error: Permission denied accessing directory: {confidential_data_path}")
-    except OSError as e:
-        print(f"Error accessing directory {confidential_data_path}: {e}")
-
-    return csv_files
+# Returns a list of csv and Excel files found inside the confidential_data_path folder
+def get_confidential_csv_files() -> List[Dict[str, str]]:
+    _confidential_csv_index.refresh(print)
+    return _confidential_csv_index.as_file_list()
 
 # Returns a list of msg files found inside the confidential_email_path folder
 def get_confidential_email_templates() -> List[Dict[str, str]]:
-    email_templates: List[Dict[str, str]] = []
-
-    if not os.path.exists(confidential_email_path):
-        print(f"Warning: Confidential directory does not exist: {confidential_email_path}")
-        return email_templates
-    elif not os.path.isdir(confidential_email_path):
-        print(f"Warning: Confidential path is not a directory: {confidential_email_path}")
-        return email_templates
-
+    _confidential_template_index.refresh(print)
+    return _confidential_template_index.as_file_list()
+
+# Decodes the bytes the primary codec rejected as cp1252, or latin-1 for the five bytes cp1252 leaves undefined.
+# Registered as a codec error handler so a mis-detected file keeps streaming through the same decoder instead of restarting.
+def _decode_fallback_error_handler(error: UnicodeError):
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    replacement = ''.join(_cp1252_or_latin1(byte) for byte in error.object[error.start:error.end])
+    return replacement, error.end
+
+def _cp1252_or_latin1(byte: int) -> str:
     try:
-        all_files: List[str] = os.listdir(confidential_email_path)
+        return bytes([byte]).decode('cp1252')
+    except UnicodeDecodeError:
+        return chr(byte)
 
-        for filename in all_files:
-            if filename.lower().endswith('.msg'):
-                full_path: str = os.path.normpath(os.path.join(confidential_email_path, filename))
+codecs.register_error(encoding_fallback_errors, _decode_fallback_error_handler)
 
-                #Verify it's actually a file (not a subdirectory)
-                if os.path.isfile(full_path):
-                    file_dict: Dict[str, str] = {f"{base_email_folder}/{filename}": full_path}
-                    email_templates.append(file_dict)
-        
-    except PermissionError:
-        print(f"Error: Permission denied accessing directory: {confidential_email_path}")
-    except OSError as e:
-        print(f"Error accessing directory {confidential_email_path}: {e}")
+# Returns (encoding, note to print) for a csv file's leading bytes: BOM, then UTF-8 validity, then cp1252 vs latin-1
+def _detect_sample_encoding(sample: bytes, at_end_of_file: bool) -> Tuple[str, str]:
+    if sample.startswith(codecs.BOM_UTF8):
+        # If BOM is detected, read the file with utf-8 encoding
+        return 'utf-8-sig', "Detected UTF-8 BOM, using utf-8-sig encoding to handle it."
+    if sample.startswith(codecs.BOM_UTF16_LE) or sample.startswith(codecs.BOM_UTF16_BE):
+        # If UTF-16 BOM is detected, read the file with utf-16 encoding
+        return 'utf-16', "Detected UTF-16 BOM, using utf-16 encoding to handle it."
 
-    return email_templates
+    try:
+        # final=False tolerates a multi-byte character cut off at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=at_end_of_file)
+        return 'utf-8', ''
+    except UnicodeDecodeError:
+        pass
+
+    # Windows exports (payroll, Excel "CSV") are cp1252; bytes cp1252 leaves undefined point to latin-1 instead
+    encoding = 'latin-1' if any(byte in cp1252_undefined_bytes for byte in sample) else 'cp1252'
+    return encoding, f"File is not valid UTF-8, using {encoding} encoding."
+
+def _codec_errors(encoding: str) -> str:
+    return 'strict' if encoding == 'utf-16' else encoding_fallback_errors
+
+class CsvFileInfo(NamedTuple):
+    path:               str
+    size:               int
+    mtime_ns:           int
+    encoding:           str
+    encoding_note:      str             # printed whenever the file is opened, as the sniffing used to print it
+    raw_headers:        Tuple[str, ...] # header row as read
+    cleaned_headers:    Tuple[str, ...] # BOM/NUL characters and surrounding whitespace removed
+    field_names:        Tuple[str, ...] # normalize_field_for_matching() of the cleaned headers
+    approx_rows:        int             # data rows, exact when the whole file fits in the sample, else extrapolated from it (0 if the header alone fills it)
+    sheet_name:         str = ''        # workbooks only: the sheet the headers were read from
+    sheet_names:        Tuple[str, ...] = ()
+
+# Sniffs a csv file from one bounded byte sample: encoding, header row and an approximate row count
+def _sniff_csv_file(filename: str, size: int, mtime_ns: int, sample_size: int = encoding_sample_bytes) -> CsvFileInfo:
+    with open(filename, 'rb') as file:
+        sample = file.read(sample_size)
+        at_end_of_file = not file.read(1)
+
+    encoding, encoding_note = _detect_sample_encoding(sample, at_end_of_file)
+
+    sample_text = codecs.getincrementaldecoder(encoding)(errors=_codec_errors(encoding)).decode(sample, final=at_end_of_file)
+    sample_rows = list(csv.reader(io.StringIO(sample_text, newline='')))
+    # The sample may end inside a record; drop the partial last one when there is more file after it
+    complete_rows = sample_rows if at_end_of_file else sample_rows[:-1]
+
+    if complete_rows:
+        raw_headers: List[str] = complete_rows[0]
+    else:
+        # Header row longer than the sample
+        with open(filename, 'r', encoding=encoding, errors=_codec_errors(encoding), newline='') as file:
+            raw_headers = next(csv.reader(file), [])
+
+    data_rows = sum(1 for row in complete_rows[1:] if row)
+    if at_end_of_file or not complete_rows:
+        approx_rows = data_rows
+    else:
+        approx_rows = round((len(complete_rows) - 1) * size / max(1, len(sample)))
+
+    cleaned_headers = tuple(header.strip('\ufeff\ufffe\x00').strip() for header in raw_headers)
+    return CsvFileInfo(
+        path=filename,
+        size=size,
+        mtime_ns=mtime_ns,
+        encoding=encoding,
+        encoding_note=encoding_note,
+        raw_headers=tuple(raw_headers),
+        cleaned_headers=cleaned_headers,
+        field_names=tuple(normalize_field_for_matching(header) for header in cleaned_headers),
+        approx_rows=approx_rows
+    )
+
+# Sniffed files keyed by (path, sheet); an entry is reused only while the file's size and mtime_ns are unchanged
+_csv_info_cache: "OrderedDict[Tuple[str, str], CsvFileInfo]" = OrderedDict()
+_csv_info_lock: Final[threading.Lock] = threading.Lock()
+
+def _get_cached_file_info(filename: str, sheet_name: str, sniff: Callable[[str, int, int], CsvFileInfo]) -> CsvFileInfo:
+    stat = os.stat(filename)
+    cache_key = (os.path.normcase(os.path.abspath(filename)), sheet_name)
+
+    with _csv_info_lock:
+        info = _csv_info_cache.get(cache_key)
+        if info is not None and info.size == stat.st_size and info.mtime_ns == stat.st_mtime_ns:
+            _csv_info_cache.move_to_end(cache_key)
+            return info
+
+    info = sniff(filename, stat.st_size, stat.st_mtime_ns)
+
+    with _csv_info_lock:
+        _csv_info_cache[cache_key] = info
+        _csv_info_cache.move_to_end(cache_key)
+        while len(_csv_info_cache) > csv_info_cache_size:
+            _csv_info_cache.popitem(last=False)
+    return info
+
+# Returns the encoding, headers and approximate row count of a csv file. The file is sniffed once; later calls only
+# stat it, and re-sniff when its size or modification time has changed.
+def get_csv_file_info(filename: str) -> CsvFileInfo:
+    return _get_cached_file_info(filename, '', _sniff_csv_file)
+
+# Returns the headers and approximate row count of a csv file or of one sheet of a workbook (the active sheet when
+# sheet_name is not given), cached the same way as get_csv_file_info()
+def get_input_file_info(filename: str, sheet_name: Optional[str] = None) -> CsvFileInfo:
+    if not is_workbook_file(filename):
+        return get_csv_file_info(filename)
+    return _get_cached_file_info(filename, sheet_name or '', lambda path, size, mtime_ns: _sniff_workbook(path, size, mtime_ns, sheet_name))
+
+def clear_csv_file_info_cache() -> None:
+    with _csv_info_lock:
+        _csv_info_cache.clear()
+
+# Returns the encoding of a csv file resolved once from a bounded byte sample: BOM, then UTF-8 validity, then cp1252 vs latin-1
+def detect_csv_encoding(printer_function, filename: str) -> str:
+    info = get_csv_file_info(filename)
+    if info.encoding_note:
+        printer_function(info.encoding_note)
+    return info.encoding
+
+# Opens a csv file for reading in a single pass with the detected encoding. Bytes past the sample that the encoding
+# rejects are decoded as cp1252/latin-1 by the fallback error handler rather than failing the read.
+def open_csv_file(printer_function, filename: str) -> TextIO:
+    encoding = detect_csv_encoding(printer_function, filename)
+    return open(filename, 'r', encoding=encoding, errors=_codec_errors(encoding), newline='')
+
+def is_workbook_file(filename: str) -> bool:
+    return filename.lower().endswith(workbook_extensions)
+
+# Opens a workbook in openpyxl's read-only mode, which streams each sheet's XML instead of building the whole workbook
+def _open_workbook(filename: str) -> Any:
+    install_required_libraries({'openpyxl'})
+    import openpyxl
+    return openpyxl.load_workbook(filename, read_only=True, data_only=True)
+
+# Returns the named worksheet, or the active one (falling back to the first worksheet) when no name is given
+def _select_worksheet(workbook: Any, sheet_name: Optional[str]) -> Any:
+    if sheet_name:
+        if sheet_name not in workbook.sheetnames:
+            raise ValueError(f"Sheet '{sheet_name}' not found. Available sheets: {', '.join(workbook.sheetnames)}")
+        return workbook[sheet_name]
+
+    worksheet = workbook.active
+    if worksheet is None or not hasattr(worksheet, 'iter_rows'): # no active sheet, or a chart sheet
+        if not workbook.worksheets:
+            raise ValueError("Workbook has no worksheets.")
+        worksheet = workbook.worksheets[0]
+    return worksheet
+
+# Returns a cell value as the text a CSV export of the sheet would contain
+def _cell_to_text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d') if value.time() == datetime.time() else value.isoformat(sep=' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+# Returns a worksheet row as text, without the empty cells read-only mode reports past the last value
+def _row_to_texts(row: Sequence[Any]) -> List[str]:
+    texts = [_cell_to_text(value) for value in row]
+    while texts and not texts[-1]:
+        texts.pop()
+    return texts
+
+# Reads a sheet's header row and its row count from the sheet dimension (approximate: some writers leave it stale)
+def _sniff_workbook(filename: str, size: int, mtime_ns: int, sheet_name: Optional[str]) -> CsvFileInfo:
+    workbook = _open_workbook(filename)
+    try:
+        worksheet = _select_worksheet(workbook, sheet_name)
+        raw_headers = next((_row_to_texts(row) for row in worksheet.iter_rows(max_row=1, values_only=True)), [])
+        max_row = worksheet.max_row or 0
+        sheet_names = tuple(sheet.title for sheet in workbook.worksheets)
+        title = worksheet.title
+    finally:
+        workbook.close()
+
+    cleaned_headers = tuple(header.strip('\ufeff\ufffe\x00').strip() for header in raw_headers)
+    return CsvFileInfo(
+        path=filename,
+        size=size,
+        mtime_ns=mtime_ns,
+        encoding='',
+        encoding_note='',
+        raw_headers=tuple(raw_headers),
+        cleaned_headers=cleaned_headers,
+        field_names=tuple(normalize_field_for_matching(header) for header in cleaned_headers),
+        approx_rows=max(0, max_row - 1),
+        sheet_name=title,
+        sheet_names=sheet_names
+    )
+
+# Returns original header -> processed header for the first 100 columns, or {} (after reporting it) when there are none
+def _process_headers(printer_function, fieldnames: Optional[Sequence[str]], transform_headers: bool,
+                     source_label: str = "CSV") -> Dict[str, str]:
+    original_headers: List[str] = list(fieldnames or [])
+    if not original_headers:
+        printer_function(f"Error: {source_label} file appears to have no headers.")
+        return {}
+
+    # Limit column header number to 100 to prevent resource exhaustion
+    if len(original_headers) > 100:
+        printer_function(f"Warning: {source_label} has {len(original_headers)} columns. Processing only first 100.")
+        original_headers = original_headers[:100]
+
+    cleaned_headers: List[str] = []
+    for header in original_headers:
+        clean_header = header.strip('\ufeff\ufffe\x00').strip()
+        cleaned_headers.append(clean_header)
+
+    printer_function(f"Original headers: {original_headers}")
+    if original_headers != cleaned_headers:
+        printer_function(f"Cleaned headers: {cleaned_headers}")
+
+    # Create header mapping if transformation is enabled
+    processed_headers: Dict[str, str] = {}
+    if transform_headers:
+        for original_header, clean_header in zip(original_headers, cleaned_headers):
+            processed_header: str = normalize_field_for_matching(clean_header)
+            processed_headers[original_header] = processed_header
+    else:
+        for original_header, clean_header in zip(original_headers, cleaned_headers):
+            processed_headers[original_header] = clean_header.strip()
+
+    printer_function(f"Found columns:    {list(processed_headers.values())}\n")
+    return processed_headers
+
+# Compiles the per-file column plan: one (source index, target key, transform or None) step per processed header.
+# Duplicate headers take the last column with that name and non-callable transformers are dropped, as DictReader did;
+# headers that normalize to the same key keep the first key's position and the last column's value, as the record dict did.
+def _compile_column_plan(printer_function, header_row: Sequence[str], processed_headers: Dict[str, str],
+                         custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None) -> ColumnPlan:
+    last_index: Dict[str, int] = {header: index for index, header in enumerate(header_row)}
+    custom_transformers = custom_transformers or {}
+
+    column_plan: Dict[str, ColumnStep] = {}
+    for original_header, processed_header in processed_headers.items():
+        transform = custom_transformers.get(processed_header)
+        if processed_header in custom_transformers and not callable(transform):
+            printer_function(f"Warning: Transformer for {processed_header} is not callable")
+            transform = None
+        column_plan[processed_header] = (last_index[original_header], processed_header, transform)
+
+    return tuple(column_plan.values())
+
+# Returns one csv row's values in column plan order with the plan's transforms applied
+def _apply_column_plan(printer_function, row: List[str], row_count: int, column_plan: ColumnPlan) -> List[str]:
+    values: List[str] = []
+    row_length = len(row)
+
+    for index, key, transform in column_plan:
+        raw_value: str = row[index].strip() if index < row_length else ''
+
+        if transform is None:
+            values.append(raw_value)
+            continue
+
+        try:
+            values.append(transform(raw_value))
+        except Exception as e:
+            printer_function(f"Warning: Transformation failed for {key} in row {row_count} with raw_value = {raw_value}: {e}")
+            values.append(raw_value)
+
+    return values
+
+# Yields the transformed, non-empty records of the rows after header_row, one at a time or batched as iter_csv_records() describes.
+# Shared by the csv and workbook readers; source_label names the input kind in the messages.
+def _iter_row_records(printer_function, rows: Iterator[List[str]], header_row: List[str], source_label: str,
+                      transform_headers: bool,
+                      custom_transformers: Optional[Dict[str, Callable[[str], str]]],
+                      batch_size: Optional[int],
+                      max_rows: Optional[int],
+                      as_table: bool) -> Iterator[Any]:
+    processed_headers = _process_headers(printer_function, header_row, transform_headers, source_label)
+    if not processed_headers:
+        raise ValueError(f"{source_label} file appears to have no headers.")
+
+    column_plan = _compile_column_plan(printer_function, header_row, processed_headers, custom_transformers)
+    keys = tuple(key for _, key, _ in column_plan)
+
+    batch: List[Dict[str, str]] = []
+    table = RecordTable(keys)
+    row_count: int = 0
+    record_count: int = 0
+
+    for row in rows:
+        if not row:
+            continue # blank line
+        row_count += 1
+
+        if max_rows is not None and row_count > max_rows:
+            printer_function(f"Warning: {source_label} has more than {max_rows} rows. Processing stopped at row {max_rows}.")
+            row_count = max_rows
+            break
+
+        values = _apply_column_plan(printer_function, row, row_count, column_plan)
+
+        # Only add non-empty records
+        if not any(value.strip() for value in values):
+            continue
+
+        record_count += 1
+        if as_table:
+            table.append(values)
+            if batch_size and len(table) >= batch_size:
+                yield table
+                table = RecordTable(keys)
+            continue
+
+        record = dict(zip(keys, values))
+        if not batch_size:
+            yield record
+            continue
+
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+    if len(table) or (as_table and not batch_size):
+        yield table
+
+    plural_rows_check: str = "s" if row_count > 1 else ""
+    printer_function(f"Successfully loaded {record_count} record{plural_rows_check} from {row_count} row{plural_rows_check}.")
+
+# Yields the transformed, non-empty records of a csv file one at a time, or in lists of batch_size records when batch_size is set.
+# With as_table=True the records come as RecordTable batches of batch_size records (one table for the whole file without batch_size).
+# Only the current row (or batch) is held in memory, so there is no file size or row limit unless max_file_size_mb / max_rows are given.
+# Errors are raised to the caller: ValueError for an invalid path or a file without headers, OSError, csv.Error and UnicodeDecodeError.
+def iter_csv_records(printer_function, filename: str,
+                     transform_headers: bool = True,
+                     custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None,
+                     batch_size: Optional[int] = None,
+                     max_rows: Optional[int] = None,
+                     max_file_size_mb: Optional[int] = None,
+                     as_table: bool = False) -> Iterator[Any]:
+    is_valid, error_msg = validate_file_path(filename, {'.csv'}, max_file_size_mb=max_file_size_mb)
+    if not is_valid:
+        raise ValueError(error_msg)
+
+    with open_csv_file(printer_function, filename) as file:
+        csv_reader = csv.reader(file)
+        header_row: List[str] = next(csv_reader, [])
+        yield from _iter_row_records(printer_function, csv_reader, header_row, "CSV", transform_headers, custom_transformers,
+                                     batch_size, max_rows, as_table)
+
+# Yields the records of one worksheet (the active sheet unless sheet_name is given) exactly as iter_csv_records() yields a csv file's:
+# same header cleaning, transformers, batching and limits, with cell values converted to the text a CSV export would hold.
+# The workbook is opened read-only, so rows are streamed from the sheet XML and only the current row (or batch) is held in memory.
+# Errors are raised to the caller: ValueError for an invalid path, an unknown sheet or a sheet without headers, OSError and
+# the zip/XML errors of a damaged workbook.
+def iter_workbook_records(printer_function, filename: str,
+                          sheet_name: Optional[str] = None,
+                          transform_headers: bool = True,
+                          custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None,
+                          batch_size: Optional[int] = None,
+                          max_rows: Optional[int] = None,
+                          max_file_size_mb: Optional[int] = None,
+                          as_table: bool = False) -> Iterator[Any]:
+    is_valid, error_msg = validate_file_path(filename, set(workbook_extensions), max_file_size_mb=max_file_size_mb)
+    if not is_valid:
+        raise ValueError(error_msg)
 
-# Reads all contents of a csv file and returns the data as a List[Dict[str, str]]
+    workbook = _open_workbook(filename)
+    try:
+        worksheet = _select_worksheet(workbook, sheet_name)
+        worksheet.reset_dimensions() # the stored dimension can be stale; read rows until the sheet XML ends instead
+        printer_function(f"Reading sheet '{worksheet.title}'.")
+
+        rows = (_row_to_texts(row) for row in worksheet.iter_rows(values_only=True))
+        header_row: List[str] = next(rows, [])
+        yield from _iter_row_records(printer_function, rows, header_row, "Sheet", transform_headers, custom_transformers,
+                                     batch_size, max_rows, as_table)
+    finally:
+        workbook.close() # read-only workbooks keep the archive open until closed
+
+# Yields the records of a csv file or a workbook sheet, choosing the reader by extension (sheet_name is ignored for csv files)
+def iter_input_records(printer_function, filename: str, sheet_name: Optional[str] = None, **reader_options: Any) -> Iterator[Any]:
+    if is_workbook_file(filename):
+        return iter_workbook_records(printer_function, filename, sheet_name, **reader_options)
+    return iter_csv_records(printer_function, filename, **reader_options)
+
+# Reads all contents of a csv file and returns the data as a List[Dict[str, str]].
+# The whole file is held in memory, so the row and size limits stay; use iter_csv_records() for large files.
+# With use_cache (default: input_cache in the .env file) the transformed records are kept in the parsed input cache
+# and a rerun of the unchanged file with the same settings loads them from there instead of parsing again.
 def read_csv_file(printer_function, filename: Optional[str] = None, # -> List[Dict[str, str]]
                   transform_headers: bool = True,
-                  custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None) -> List[Dict[str, str]]:
+                  custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None,
+                  max_rows: Optional[int] = 10000,
+                  max_file_size_mb: Optional[int] = 100,
+                  use_cache: Optional[bool] = None) -> List[Dict[str, str]]:
 
     if not filename:
         filename = select_csv_file()
     if not filename:
         return []
 
-    is_valid, error_msg = validate_file_path(filename, {'.csv'}, max_file_size_mb=100)
+    is_valid, error_msg = validate_file_path(filename, {'.csv'}, max_file_size_mb=max_file_size_mb)
     if not is_valid:
         printer_function(f"Error: {error_msg}")
         return []
 
     data_records: List[Dict[str, str]] = []
-    processed_headers: Dict[str, str] = {}
 
-    max_rows: int = 10000 # Limit rows to prevent resource exhaustion
     try:
-        encoding = 'utf-8'  # Default encoding
-
-        # Fix any BOM issues by reading the file with utf-8 encoding
-        with open(filename, 'rb') as file:
-            raw_data = file.read(4) # Read the first 4 bytes
-
-            if raw_data.startswith(codecs.BOM_UTF8):
-                # If BOM is detected, read the file with utf-8 encoding
-                printer_function("Detected UTF-8 BOM, using utf-8-sig encoding to handle it.")
-                encoding = 'utf-8-sig'
-            elif raw_data.startswith(codecs.BOM_UTF16):
-                # If UTF-16 BOM is detected, read the file with utf-16 encoding
-                printer_function("Detected UTF-16 BOM, using utf-16 encoding to handle it.")
-                encoding = 'utf-16'
-        
-        
-        with open(filename, 'r', encoding=encoding, newline='') as file:
-            csv_reader: csv.DictReader  = csv.DictReader(file)
-
-            # Get and process headers
-            original_headers: List[str] = list(csv_reader.fieldnames or [])            
-            if not original_headers:
-                printer_function("Error: CSV file appears to have no headers.")
-                return[]
-            
-            # Limit column header number to 100 to prevent resource exhaustion
-            if len(original_headers) > 100:
-                printer_function(f"Warning: CSV has {len(original_headers)} columns. Processing only first 100.")
-                original_headers = original_headers[:100]
-
-            cleaned_headers: List[str] = []
-            for header in original_headers:
-                clean_header = header.strip('\ufeff\ufffe\x00').strip()
-                cleaned_headers.append(clean_header)
-
-            printer_function(f"Original headers: {original_headers}")
-            if original_headers != cleaned_headers:
-                printer_function(f"Cleaned headers: {cleaned_headers}")
-
-
-            # Create header mapping if transformation is enabled
-            if transform_headers:
-                for original_header, clean_header in zip(original_headers, cleaned_headers):
-                    processed_header: str = normalize_field_for_matching(clean_header)
-                    processed_headers[original_header] = processed_header
-            else:
-                for original_header, clean_header in zip(original_headers, cleaned_headers):
-                    processed_headers[original_header] = clean_header.strip()
-
-            printer_function(f"Found columns:    {list(processed_headers.values())}\n")
-
-            row_count: int = 0
-            
-            for row in csv_reader:
-                row_count += 1
-
-                if row_count > max_rows:
-                    printer_function(f"Warning: CSV has more than {max_rows} rows. Processing stopped at row {max_rows}.")
-                    break
-
-                record: Dict[str, str] = {}
-
-                for original_header, processed_header in processed_headers.items():
-                    raw_value: str = row.get(original_header, '').strip()
-                    processed_value: str = ""
-
-                    if custom_transformers and processed_header in custom_transformers:
-                        try:
-                            transformer = custom_transformers[processed_header]
-
-                            if not callable(transformer):
-                                printer_function(f"Warning: Transformer for {processed_header} is not callable")
-                                processed_value = str(raw_value).strip()
-                            else:
-                                processed_value: str = transformer(raw_value)
-
-                        except Exception as e:
-                            printer_function(f"Warning: Transformation failed for {processed_header} in row {row_count} with raw_value = {raw_value}: {e}")
-                            processed_value = raw_value
-                    else:
-                        processed_value = str(raw_value).strip()
-
-                    record[processed_header] = processed_value
-
-                # Only add non-empty records
-                if any(value.strip() for value in record.values()):
-                    data_records.append(record)
-
-        plural_rows_check: str = "s" if row_count > 1 else ""
-        printer_function(f"Successfully loaded {len(data_records)} record{plural_rows_check} from {row_count} row{plural_rows_check}.")
-
+        try: # imported here: input_cache imports this module
+            from .input_cache import iter_cached_record_batches, get_input_cache_enabled
+        except ImportError:
+            from input_cache import iter_cached_record_batches, get_input_cache_enabled # type: ignore
+
+        if use_cache if use_cache is not None else get_input_cache_enabled():
+            read_batches = lambda: iter_csv_records(printer_function, filename, transform_headers, custom_transformers, max_rows=max_rows,
+                                                    max_file_size_mb=max_file_size_mb, as_table=True)
+            tables = iter_cached_record_batches(printer_function, filename, read_batches, transform_headers=transform_headers,
+                                                custom_transformers=custom_transformers, max_rows=max_rows)
+            data_records = [record for table in tables for record in table.to_records()]
+        else:
+            data_records = list(iter_csv_records(printer_function, filename, transform_headers, custom_transformers,
+                                                 max_rows=max_rows, max_file_size_mb=max_file_size_mb))
     except UnicodeDecodeError as e:
-        for alt_encoding in ['latin1', 'cp1252', 'iso-8859-1']:
-            try:
-                print(f"trying alternative encoding: {alt_encoding}")
-                with open(filename, 'r', encoding=alt_encoding, newline='') as file:
-                    csv_reader = csv.DictReader(file)
-                    original_headers = list(csv_reader.fieldnames or [])
-
-                    cleaned_headers = [header.strip('\ufeff\ufffe\x00').strip() for header in original_headers]
-
-                    data_records = []
-                    row_count = 0
-                    for row in csv_reader:
-                        row_count += 1
-                        if row_count > max_rows:
-                            break
-                        record = {normalize_field_for_matching(header): str(value).strip() for header, value in row.items() if header}
-                        if any(value.strip() for value in record.values()):
-                            data_records.append(record)
-                    print(f"Successfully read file with alternative encoding: {alt_encoding}")
-                    print(f"Loaded {len(data_records)} records.")
-                    return data_records
-            except Exception:
-                continue
-        
-        print(f"Unable to decode file {filename} with utf-8 or alternative encodings. Please check the file encoding.")
+        print(f"Unable to decode file {filename}: {e}. Please check the file encoding.")
         quit()
+    except ValueError:
+        return [] # already reported (no headers)
     except FileNotFoundError:
         print(f"Error: File not found: {filename}")
         quit()
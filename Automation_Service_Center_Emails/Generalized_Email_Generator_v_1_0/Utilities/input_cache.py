@@ -0,0 +1,302 @@
+import os
+import json
+import mmap
+import pickle
+import hashlib
+import threading
+from typing import List, Dict, Final, Optional, Callable, Iterator, Any, Tuple
+
+try: # importing the .env helpers
+    from .constants import env_int, env_bool
+except ImportError:
+    from constants import env_int, env_bool # type: ignore
+
+try: # importing main_path
+    from .file_loader import main_path
+except ImportError:
+    from file_loader import main_path # type: ignore
+
+try: # importing the columnar record store
+    from .record_table import RecordTable
+except ImportError:
+    from record_table import RecordTable # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+input_cache_folder:             Final[str] = "parsed_input_cache"
+input_cache_path:               Final[str] = os.path.normpath(os.path.join(main_path, input_cache_folder))
+input_cache_index_filename:     Final[str] = "content_hashes.json" # path -> (size, mtime_ns, sha256), so unchanged files are not re-hashed
+input_cache_extension:          Final[str] = ".records"
+input_cache_format_version:     Final[int] = 1 # bump when the entry layout or the loaders' output changes
+default_input_cache_entries:    Final[int] = 8 # parsed files kept; the least recently loaded are removed first
+hash_block_bytes:               Final[int] = 1024 * 1024
+
+# Records are stored in blocks, each column of a block as one joined string (see parallel_loader): loading is one unpickle of
+# a few large strings, and a block is only split back into values when a batch reaches it
+input_cache_block_records:      Final[int] = 10000
+column_separators:              Final[Tuple[str, ...]] = ('\x1f', '\x1e', '\x00')
+#-------------------------------------------------------------------------------------------------------------------
+
+# (separator, columns): the block's columns joined by separator, or as lists when separator is None
+ColumnBlock = Tuple[Optional[str], List[Any]]
+
+# Returns True when the .env file turns the parsed input cache on (input_cache=true); it is off by default
+def get_input_cache_enabled() -> bool:
+    return env_bool('input_cache')
+
+# Returns a stable name for a transformer: its built-in kind, or module.qualname for a named function.
+# Lambdas and nested functions have no stable name, so records transformed by them are not cached.
+def _transformer_identity(transform: Callable[[str], str]) -> Optional[str]:
+    transform_kind = getattr(transform, 'transform_kind', None)
+    if transform_kind:
+        return f"builtin:{transform_kind}"
+
+    qualname = getattr(transform, '__qualname__', '')
+    if not qualname or '<' in qualname:
+        return None
+    return f"{getattr(transform, '__module__', '')}.{qualname}"
+
+# Returns the columns joined by the first separator no value contains, or unchanged (separator None) when every one occurs
+def _pack_block(columns: List[List[str]]) -> ColumnBlock:
+    for separator in column_separators:
+        joined = [separator.join(column) for column in columns]
+        # A value holding the separator shows up as an extra occurrence
+        if all(text.count(separator) == len(column) - 1 for text, column in zip(joined, columns)):
+            return separator, joined
+    return None, list(columns)
+
+def _unpack_block(block: ColumnBlock) -> List[List[str]]:
+    separator, columns = block
+    return list(columns) if separator is None else [column.split(separator) for column in columns]
+
+class CachedRecords:
+    """Records loaded from the parsed input cache, kept as packed column blocks until a batch needs them."""
+    def __init__(self, keys: Tuple[str, ...], record_count: int, blocks: List[ColumnBlock]) -> None:
+        self.keys: Tuple[str, ...] = keys
+        self.record_count: int = record_count
+        self.blocks: List[ColumnBlock] = blocks
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    # Yields RecordTable batches of batch_size records, unpacking one block at a time (one table without batch_size)
+    def iter_tables(self, batch_size: Optional[int] = None) -> Iterator[RecordTable]:
+        if not batch_size:
+            table = RecordTable(self.keys)
+            for block in self.blocks:
+                table.extend(RecordTable(self.keys, _unpack_block(block)))
+            yield table
+            return
+
+        carry: Optional[RecordTable] = None # the start of a batch that continues into the next block
+        for block in self.blocks:
+            table = RecordTable(self.keys, _unpack_block(block))
+            offset = 0
+            if carry is not None:
+                offset = batch_size - len(carry)
+                carry.extend(table.slice(0, offset))
+                if len(carry) < batch_size:
+                    continue
+                yield carry
+                carry = None
+
+            while len(table) - offset >= batch_size:
+                yield table.slice(offset, offset + batch_size)
+                offset += batch_size
+            if offset < len(table):
+                carry = table.slice(offset, len(table))
+
+        if carry is not None:
+            yield carry
+
+class ParsedInputCache:
+    """
+    On-disk cache of transformed input records (one RecordTable per file version and reader configuration), so a rerun
+    of the same file skips parsing and transforming. Entries are keyed by the file's sha256 plus the header, transformer,
+    sheet and row-limit settings, written atomically, and memory-mapped when loaded. The files hold employee data in
+    the clear, like the source files they were parsed from.
+    """
+    def __init__(self, directory: str = input_cache_path, max_entries: Optional[int] = None) -> None:
+        self.directory: str = directory
+        self.max_entries: int = max(1, max_entries if max_entries is not None else env_int('input_cache_max_entries', default_input_cache_entries))
+        self._lock = threading.Lock()
+
+        # Counters for the most recent loads
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, input_cache_index_filename)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + input_cache_extension)
+
+    def _read_index(self) -> Dict[str, List[Any]]:
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as file:
+                index = json.load(file)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, List[Any]]) -> None:
+        temporary_path = self._index_path() + ".tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(index, file)
+        os.replace(temporary_path, self._index_path())
+
+    # Returns the sha256 of the file's contents, re-hashing only when its size or mtime changed since the last call
+    def content_hash(self, filename: str) -> str:
+        stat = os.stat(filename)
+        path_key = os.path.normcase(os.path.abspath(filename))
+
+        with self._lock:
+            index = self._read_index()
+            known = index.get(path_key)
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                return known[2]
+
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as file:
+            for block in iter(lambda: file.read(hash_block_bytes), b''):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            index = self._read_index()
+            index[path_key] = [stat.st_size, stat.st_mtime_ns, content_hash]
+            self._write_index(index)
+        return content_hash
+
+    # Returns the entry key for a file read with these settings, or None when a transformer has no stable name
+    def cache_key(self, filename: str, transform_headers: bool = True,
+                  custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None,
+                  sheet_name: Optional[str] = None, max_rows: Optional[int] = None) -> Optional[str]:
+        transformers: List[Tuple[str, str]] = []
+        for key, transform in sorted((custom_transformers or {}).items()):
+            identity = _transformer_identity(transform) if callable(transform) else 'not callable'
+            if identity is None:
+                return None
+            transformers.append((key, identity))
+
+        configuration = json.dumps([input_cache_format_version, self.content_hash(filename), transform_headers, transformers, sheet_name or '', max_rows])
+        return hashlib.sha256(configuration.encode('utf-8')).hexdigest()
+
+    # Returns the cached records for the key, or None. The entry is memory-mapped, so the unpickler reads its bytes from
+    # the page cache instead of a copy; the column blocks stay packed until CachedRecords.iter_tables() reaches them.
+    def load(self, key: str) -> Optional[CachedRecords]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                version, keys, record_count, blocks = pickle.loads(mapped)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError, TypeError):
+            self.misses += 1
+            return None
+
+        if version != input_cache_format_version:
+            self.misses += 1
+            return None
+
+        os.utime(path) # marks the entry as recently used for eviction
+        self.hits += 1
+        return CachedRecords(tuple(keys), record_count, blocks)
+
+    # Writes packed blocks (see _pack_block) under the key, atomically, and removes the least recently used entries beyond max_entries
+    def store(self, key: str, keys: Tuple[str, ...], record_count: int, blocks: List[ColumnBlock]) -> None:
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            temporary_path = self._entry_path(key) + ".tmp"
+            with open(temporary_path, 'wb') as file:
+                pickle.dump((input_cache_format_version, keys, record_count, blocks), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self._entry_path(key))
+            self._evict()
+
+    # Stores a whole table, e.g. records read without iter_cached_record_batches()
+    def store_table(self, key: str, table: RecordTable) -> None:
+        blocks = [_pack_block([column[start:start + input_cache_block_records] for column in table.columns])
+                  for start in range(0, len(table), input_cache_block_records)]
+        self.store(key, table.keys, len(table), blocks)
+
+    def _evict(self) -> None:
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(input_cache_extension) and entry.is_file()]
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        for entry in entries[self.max_entries:]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    # Removes every cached entry and the content hash index
+    def clear(self) -> None:
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                return
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and (entry.name.endswith(input_cache_extension) or entry.name == input_cache_index_filename):
+                    os.remove(entry.path)
+
+# Global instance shared by read_csv_file and the submit pipeline
+_parsed_input_cache: Optional[ParsedInputCache] = None
+
+def get_parsed_input_cache() -> ParsedInputCache:
+    global _parsed_input_cache
+    if _parsed_input_cache is None:
+        _parsed_input_cache = ParsedInputCache()
+    return _parsed_input_cache
+
+# Yields RecordTable batches of batch_size records (one table without batch_size): from the cache when this file version was
+# read with the same settings before, otherwise from read_batches(), a reader called with as_table=True and the same settings.
+# A complete read is stored for next time, packed block by block as it streams past; a read the caller stops early
+# (cancel, max_records) is not stored. Cache errors are reported and never fail the read.
+def iter_cached_record_batches(printer_function, filename: str, read_batches: Callable[[], Iterator[RecordTable]],
+                               batch_size: Optional[int] = None,
+                               transform_headers: bool = True,
+                               custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None,
+                               sheet_name: Optional[str] = None,
+                               max_rows: Optional[int] = None) -> Iterator[RecordTable]:
+    cache = get_parsed_input_cache()
+    key: Optional[str] = None
+    cached: Optional[CachedRecords] = None
+    try:
+        key = cache.cache_key(filename, transform_headers, custom_transformers, sheet_name, max_rows)
+        cached = cache.load(key) if key else None
+    except OSError as error:
+        printer_function(f"\u26A0 Warning: Parsed input cache unavailable: {error}")
+
+    if cached is not None:
+        printer_function(f"\U0001F5C3 Loaded {len(cached)} record{'s' if len(cached) != 1 else ''} from the parsed input cache.")
+        yield from cached.iter_tables(batch_size)
+        return
+
+    keys: Tuple[str, ...] = ()
+    blocks: List[ColumnBlock] = []
+    pending: List[List[str]] = []
+    record_count: int = 0
+
+    for batch in read_batches():
+        if key:
+            # Copied before the batch is handed on: later stages add columns (email, enrichment) to it
+            keys = keys or batch.keys
+            pending = [column + values for column, values in zip(pending, batch.columns)] if pending else [list(values) for values in batch.columns]
+            record_count += len(batch)
+            start = 0
+            while pending and len(pending[0]) - start >= input_cache_block_records:
+                blocks.append(_pack_block([column[start:start + input_cache_block_records] for column in pending]))
+                start += input_cache_block_records
+            if start:
+                pending = [column[start:] for column in pending]
+        yield batch
+
+    if not key or not keys:
+        return
+    if pending and pending[0]:
+        blocks.append(_pack_block(pending))
+
+    try:
+        cache.store(key, keys, record_count, blocks)
+    except OSError as error:
+        printer_function(f"\u26A0 Warning: Could not update the parsed input cache: {error}")
@@ -0,0 +1,300 @@
+import re
+import struct
+from typing import List, Dict, Final, Optional, Any, Tuple, NamedTuple
+
+try: # importing install_required_libraries()
+    from .package_checker import install_required_libraries
+except ImportError:
+    from package_checker import install_required_libraries # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+# MAPI property ids of the streams read from a .msg compound file (MS-OXMSG); the stream name is __substg1.0_<id><type>
+property_subject:               Final[int] = 0x0037
+property_body:                  Final[int] = 0x1000
+property_rtf_compressed:        Final[int] = 0x1009
+property_html:                  Final[int] = 0x1013
+property_display_name:          Final[int] = 0x3001
+property_email_address:         Final[int] = 0x3003
+property_smtp_address:          Final[int] = 0x39FE
+property_recipient_type:        Final[int] = 0x0C15
+property_internet_codepage:     Final[int] = 0x3FDE
+property_message_codepage:      Final[int] = 0x3FFD
+
+type_unicode:                   Final[str] = "001F"
+type_string8:                   Final[str] = "001E"
+type_binary:                    Final[str] = "0102"
+
+properties_stream:              Final[str] = "__properties_version1.0"
+message_properties_header:      Final[int] = 32 # bytes before the fixed-size property entries of the top-level message
+recipient_properties_header:    Final[int] = 8
+recipient_storage_prefix:       Final[str] = "__recip_version1.0_"
+recipient_kinds:                Final[Dict[int, str]] = {1: "To", 2: "CC", 3: "BCC"}
+default_codepage:               Final[int] = 1252
+
+# Compressed RTF (MS-OXRTFCP): the dictionary starts with this text, and a reference to the write position ends the data
+rtf_compressed_signature:       Final[int] = 0x75465A4C # 'LZFu'
+rtf_uncompressed_signature:     Final[int] = 0x414C454D # 'MELA'
+rtf_dictionary_size:            Final[int] = 4096
+rtf_preloaded_dictionary:       Final[bytes] = (b"{\\rtf1\\ansi\\mac\\deff0\\deftab720{\\fonttbl;}{\\f0\\fnil \\froman \\fswiss \\fmodern \\fscript "
+                                                b"\\fdecor MS Sans SerifSymbolArialTimes New RomanCourier{\\colortbl\\red0\\green0\\blue0\r\n\\par "
+                                                b"\\pard\\plain\\f0\\fs20\\b\\i\\u\\tab\\tx")
+
+rtf_token_pattern:              Final[re.Pattern] = re.compile(rb"\\([a-zA-Z]+)(-?\d+)? ?|\\'([0-9a-fA-F]{2})|\\(.)|([{}])|([^\\{}\r\n]+)|[\r\n]+", re.S)
+# Destinations whose text is never part of the message body
+rtf_ignored_destinations:       Final[frozenset] = frozenset({"fonttbl", "colortbl", "stylesheet", "info", "pict", "object", "header", "footer",
+                                                              "listtable", "listoverridetable", "rsidtbl", "generator", "xmlnstbl", "themedata",
+                                                              "colorschememapping", "datastore", "latentstyles", "pntext", "pntxta", "pntxtb"})
+#-------------------------------------------------------------------------------------------------------------------
+
+class MsgRecipient(NamedTuple):
+    name:       str
+    address:    str
+    kind:       str # To, CC or BCC
+
+class MsgTemplate(NamedTuple):
+    subject:    str
+    html_body:  str # PR_HTML, or the HTML Outlook encapsulated in the RTF body; '' when the message has neither
+    rtf_body:   str # the decompressed RTF body
+    text_body:  str
+    recipients: List[MsgRecipient]
+
+    # The body the placeholders are read from: the HTML Outlook drafts from, else the plain text
+    @property
+    def body(self) -> str:
+        return self.html_body or self.text_body
+
+class MsgFormatError(ValueError):
+    """Raised when a file is not an Outlook .msg compound file or its body cannot be decoded."""
+
+def _import_olefile() -> Any:
+    install_required_libraries({'olefile'})
+    import olefile
+    return olefile
+
+# Returns the Python codec for a Windows codepage number, falling back to cp1252 for one Python does not know
+def _codec_for_codepage(codepage: Optional[int]) -> str:
+    named = {65001: "utf-8", 1200: "utf-16-le", 20127: "ascii", 28591: "latin-1", 0: "cp1252"}
+    codec = named.get(codepage or 0, f"cp{codepage}")
+    try:
+        "".encode(codec)
+        return codec
+    except LookupError:
+        return f"cp{default_codepage}"
+
+# Returns property id -> 32-bit value of the fixed-size entries in a properties stream (16 bytes each after the header)
+def _read_fixed_properties(ole: Any, storage: List[str], header_size: int) -> Dict[int, int]:
+    path = storage + [properties_stream]
+    if not ole.exists('/'.join(path)):
+        return {}
+    data = ole.openstream(path).read()
+    properties: Dict[int, int] = {}
+    for offset in range(header_size, len(data) - 15, 16):
+        property_type, property_id, _, value = struct.unpack_from("<HHII", data, offset)
+        if property_type in (0x0002, 0x0003, 0x000B): # 16-bit, 32-bit and boolean values are stored inline
+            properties[property_id] = value
+    return properties
+
+def _read_stream(ole: Any, storage: List[str], property_id: int, property_type: str) -> Optional[bytes]:
+    path = storage + [f"__substg1.0_{property_id:04X}{property_type}"]
+    if not ole.exists('/'.join(path)):
+        return None
+    return ole.openstream(path).read()
+
+# Returns a string property, stored either as UTF-16 (001F) or in the message codepage (001E); '' when absent
+def _read_string(ole: Any, storage: List[str], property_id: int, codec: str) -> str:
+    data = _read_stream(ole, storage, property_id, type_unicode)
+    if data is not None:
+        return data.decode("utf-16-le", errors="replace").rstrip("\x00")
+    data = _read_stream(ole, storage, property_id, type_string8)
+    if data is not None:
+        return data.decode(codec, errors="replace").rstrip("\x00")
+    return ""
+
+# Returns the RTF of a PR_RTF_COMPRESSED stream: LZ77 references into a 4KB ring dictionary, eight tokens per control byte
+def decompress_rtf(data: bytes) -> bytes:
+    if len(data) < 16:
+        raise MsgFormatError("Compressed RTF stream is truncated")
+    compressed_size, raw_size, signature, _ = struct.unpack_from("<IIII", data, 0)
+    if signature == rtf_uncompressed_signature:
+        return data[16:16 + raw_size]
+    if signature != rtf_compressed_signature:
+        raise MsgFormatError(f"Unknown compressed RTF signature 0x{signature:08X}")
+
+    dictionary = bytearray(rtf_preloaded_dictionary.ljust(rtf_dictionary_size, b"\x00"))
+    write_position = len(rtf_preloaded_dictionary)
+    output = bytearray()
+    position, end = 16, min(len(data), compressed_size + 4)
+
+    while position < end:
+        control = data[position]
+        position += 1
+        for bit in range(8):
+            if position >= end:
+                break
+            if control & (1 << bit):
+                if position + 1 >= end:
+                    break
+                reference = (data[position] << 8) | data[position + 1]
+                position += 2
+                offset, length = reference >> 4, (reference & 0x0F) + 2
+                if offset == write_position:
+                    return bytes(output)
+                for step in range(length):
+                    byte = dictionary[(offset + step) % rtf_dictionary_size]
+                    output.append(byte)
+                    dictionary[write_position] = byte
+                    write_position = (write_position + 1) % rtf_dictionary_size
+            else:
+                byte = data[position]
+                position += 1
+                output.append(byte)
+                dictionary[write_position] = byte
+                write_position = (write_position + 1) % rtf_dictionary_size
+    return bytes(output)
+
+# Returns the HTML encapsulated in an RTF body (\fromhtml1), or the plain text of any other RTF body, with its
+# \'hh and \uN escapes decoded. Only the text a reader sees is kept: ignored destinations and \htmlrtf blocks are skipped.
+def rtf_to_text(rtf: bytes) -> Tuple[str, bool]:
+    from_html = b"\\fromhtml" in rtf[:1024]
+    codec = f"cp{default_codepage}"
+    output: List[str] = []
+    pending_bytes = bytearray() # \'hh bytes are collected so multi-byte codepages decode as one character
+
+    # Group state: (skip text, in an htmltag destination, inside \htmlrtf ... \htmlrtf0, unicode fallback length);
+    # text inside \htmlrtf is the RTF-only rendering of the HTML, not part of it
+    stack: List[Tuple[bool, bool, bool, int]] = []
+    skip, in_html_tag, html_rtf_suppressed, unicode_skip = False, False, False, 1
+    skip_fallback = 0
+    expect_destination = False
+
+    def flush_bytes() -> None:
+        if pending_bytes:
+            output.append(pending_bytes.decode(codec, errors="replace"))
+            pending_bytes.clear()
+
+    def emitting() -> bool:
+        return not skip and (in_html_tag or not html_rtf_suppressed)
+
+    for match in rtf_token_pattern.finditer(rtf):
+        word, argument, hex_byte, symbol, brace, text = match.groups()
+
+        if skip_fallback and (hex_byte or text or symbol):
+            # The characters after \uN that readers without Unicode would show instead
+            if text and len(text) > skip_fallback:
+                text = text[skip_fallback:]
+                skip_fallback = 0
+            else:
+                skip_fallback -= len(text) if text else 1
+                continue
+
+        if brace == b"{":
+            flush_bytes()
+            stack.append((skip, in_html_tag, html_rtf_suppressed, unicode_skip))
+            expect_destination = True
+            continue
+        if brace == b"}":
+            flush_bytes()
+            if stack:
+                skip, in_html_tag, html_rtf_suppressed, unicode_skip = stack.pop()
+            expect_destination = False
+            continue
+
+        if word is not None:
+            name = word.decode("ascii")
+            starts_group = expect_destination
+            expect_destination = False
+            if name == "ansicpg" and argument:
+                codec = _codec_for_codepage(int(argument))
+            elif name == "htmltag":
+                in_html_tag = True
+            elif name == "htmlrtf":
+                html_rtf_suppressed = argument != b"0"
+            elif name in rtf_ignored_destinations and starts_group:
+                skip = True
+            elif name == "uc" and argument:
+                unicode_skip = int(argument)
+            elif name == "u" and argument:
+                flush_bytes()
+                if emitting():
+                    output.append(chr(int(argument) % 0x10000))
+                skip_fallback = unicode_skip
+            elif name in ("par", "line") and emitting():
+                flush_bytes()
+                output.append("\r\n" if from_html else "\n")
+            elif name == "tab" and emitting():
+                flush_bytes()
+                output.append("\t")
+            continue
+
+        if symbol is not None:
+            if symbol == b"*":
+                # \* marks an optional destination: skipped unless it is one the HTML lives in
+                if not in_html_tag and expect_destination:
+                    next_word = rtf[match.end():match.end() + 16]
+                    skip = skip or not (next_word.startswith(b"\\htmltag") or next_word.startswith(b"\\mhtmltag"))
+                continue
+            expect_destination = False
+            if emitting():
+                flush_bytes()
+                output.append({b"~": "\u00A0", b"-": "", b"_": "-"}.get(symbol, symbol.decode("latin-1")))
+            continue
+
+        expect_destination = False
+        if hex_byte is not None:
+            if emitting():
+                pending_bytes.append(int(hex_byte, 16))
+            continue
+        if text is not None and emitting():
+            flush_bytes()
+            output.append(text.decode(codec, errors="replace"))
+
+    flush_bytes()
+    # \uN gives UTF-16 code units; characters outside the BMP arrive as surrogate pairs to be joined
+    return "".join(output).encode("utf-16-le", errors="surrogatepass").decode("utf-16-le", errors="replace"), from_html
+
+def _read_recipients(ole: Any, codec: str) -> List[MsgRecipient]:
+    recipients: List[MsgRecipient] = []
+    storages = sorted({entry[0] for entry in ole.listdir(streams=True, storages=False) if len(entry) > 1 and entry[0].startswith(recipient_storage_prefix)})
+    for storage in storages:
+        path = [storage]
+        kind = recipient_kinds.get(_read_fixed_properties(ole, path, recipient_properties_header).get(property_recipient_type, 1), "To")
+        address = _read_string(ole, path, property_smtp_address, codec) or _read_string(ole, path, property_email_address, codec)
+        recipients.append(MsgRecipient(_read_string(ole, path, property_display_name, codec), address, kind))
+    return recipients
+
+# Reads the subject, bodies and recipients of an Outlook .msg (or .oft) file without Outlook
+def read_msg_file(filename: str) -> MsgTemplate:
+    olefile = _import_olefile()
+    if not olefile.isOleFile(filename):
+        raise MsgFormatError(f"{filename} is not an Outlook .msg file")
+
+    ole = olefile.OleFileIO(filename)
+    try:
+        properties = _read_fixed_properties(ole, [], message_properties_header)
+        codec = _codec_for_codepage(properties.get(property_message_codepage) or properties.get(property_internet_codepage))
+        subject = _read_string(ole, [], property_subject, codec)
+        text_body = _read_string(ole, [], property_body, codec)
+
+        html_body = ""
+        html_data = _read_stream(ole, [], property_html, type_binary)
+        if html_data is not None:
+            html_body = html_data.decode(_codec_for_codepage(properties.get(property_internet_codepage) or properties.get(property_message_codepage)),
+                                         errors="replace").rstrip("\x00")
+        else:
+            html_body = _read_string(ole, [], property_html, codec)
+
+        rtf_body = ""
+        rtf_data = _read_stream(ole, [], property_rtf_compressed, type_binary)
+        if rtf_data is not None:
+            rtf = decompress_rtf(rtf_data)
+            rtf_body = rtf.decode("latin-1")
+            if not html_body or not text_body:
+                rtf_text, from_html = rtf_to_text(rtf)
+                if from_html and not html_body:
+                    html_body = rtf_text
+                elif not from_html and not text_body:
+                    text_body = rtf_text
+
+        return MsgTemplate(subject, html_body, rtf_body, text_body, _read_recipients(ole, codec))
+    finally:
+        ole.close()
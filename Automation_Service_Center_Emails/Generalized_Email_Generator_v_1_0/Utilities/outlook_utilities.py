@@ -1,15 +1,37 @@
 import re
+import sys
 import time
 import gc
-from typing import Optional, List
+from typing import Optional, List, Any, Tuple, Mapping
 from pathlib import Path
 
+try: # importing the compiled template renderer
+    from .template_renderer import CompiledTemplate
+except ImportError:
+    from template_renderer import CompiledTemplate # type: ignore
+
+try: # importing the pure-Python .msg reader used for placeholder discovery
+    from .msg_reader import read_msg_file
+except ImportError:
+    from msg_reader import read_msg_file # type: ignore
+
+try: # importing the placeholder and compiled template cache
+    from .template_cache import get_template_cache, find_template_placeholders, CachedTemplate
+except ImportError:
+    from template_cache import get_template_cache, find_template_placeholders, CachedTemplate # type: ignore
+
 try: # importing install_required_libraries()
     from .package_checker import install_required_libraries
 except ImportError:
     from package_checker import install_required_libraries
-install_required_libraries({'pywin32', 'pypiwin32'})
-import win32com.client
+
+# Outlook automation is Windows-only; elsewhere templates can still be read and their placeholders listed
+if sys.platform == 'win32':
+    install_required_libraries({'pywin32', 'pypiwin32'})
+try:
+    import win32com.client
+except ImportError:
+    win32com = None # type: ignore
 
 # Validate email template path
 def validate_template_path(template_path: str) -> tuple[bool, str]:
@@ -29,144 +51,178 @@ def validate_template_path(template_path: str) -> tuple[bool, str]:
     except Exception as e:
         return False, f"Validation error: {str(e)}"
 
-# Sanitize replacement values
-def sanitize_replacement_value(value: str) -> str:
-    if not isinstance(value, str):
-        value = str(value)
-    
-    # Limit length to prevent DoS
-    if len(value) > 1000:
-        value = value[:1000] + "..."
-    
-    # Remove null bytes and other control characters
-    value = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', value)
-    return value
+# Returns the subject and HTML body of a template from Outlook itself, or None when Outlook cannot open it
+def _read_template_with_outlook(printer_function, template_msg_path: str) -> Optional[Tuple[str, str]]:
+    with OutlookSession(printer_function, template_msg_path) as session:
+        if not session.is_open:
+            return None
+        return session.subject_template.text, session.body_template.text
 
+# Returns the placeholders of a .msg template, read straight from the file; Outlook is only started when the file
+# cannot be read that way (create_draft is kept for callers of the Outlook version). A template selected before
+# is answered from the template cache without reading it again.
 def get_template_placeholders(printer_function,template_msg_path, create_draft: bool = False) -> List[str]:
-    outlook = None
-    template_msg = None
-
     is_valid, error_msg = validate_template_path(template_msg_path)
     if not is_valid:
         printer_function(f"Error: {error_msg}")
         return []
 
+    template_cache = get_template_cache()
+    cached: Optional[CachedTemplate] = None
     try:
-        outlook = win32com.client.Dispatch("Outlook.Application")
-        template_msg = outlook.CreateItemFromTemplate(template_msg_path)
-
-        if not create_draft:
-            try:
-                template_msg.UnRead = False
-                template_msg.Saved = True
-            except:
-                pass
-
-        full_text = f"{template_msg.Subject} {template_msg.HTMLBody}"
-
-        if len(full_text) > 1000000: # 1MB limit
-            printer_function("Warning: Template text too large, truncating...")
-            full_text = full_text[:1000000]
-
-        placeholders = re.findall(r'\{\{([^{}]+)\}\}', full_text)
-
-        cleaned_placeholders = []
-        for placeholder in placeholders:
-            clean_var = re.sub(r'<[^>]+>', '', placeholder).strip()
-
-            if clean_var and len(clean_var) < 100 and clean_var not in cleaned_placeholders:
-                cleaned_placeholders.append(clean_var)
-
-        template_msg.Close(0)
-
-        return cleaned_placeholders
-    except Exception as e:
-        printer_function(f"Error extracting placeholders: {e}")
-        return []
-    finally:
-        if template_msg is not None:
-            try:
-                template_msg.Close(0)
-                template_msg.Delete() if hasattr(template_msg, 'Delete') else None
-                del template_msg
-            except:
-                pass
-        
-        if outlook is not None:
-            try:
-                del outlook
-            except:
-                pass
-        
-        gc.collect()
-        time.sleep(0.1)
-
-def _find_unreplaced_variables(text):
-    if not text:
-        return []
-    
-    unreplaced = re.findall(r'\{\{([^{}]+)\}\}', text)
-
-    cleaned_variables = []
-    for var in unreplaced:
-        clean_var = re.sub(r'<[^>]+>', '', var).strip()
-        if clean_var:
-            cleaned_variables.append(clean_var)
-    
-    return list(set(cleaned_variables))
-
-def _replace_template_variables(text, replacements):
-    """Replace template variables in text"""
-    if not text or not replacements:
-        return text
-    
-    # Sanitize all replacement values
-    safe_replacements = {}
-    for key, value in replacements.items():
-        safe_replacements[key] = sanitize_replacement_value(value)
-
-    for key, value in safe_replacements.items():
-        pattern =  r'\{\{[^{}]*' + re.escape(str(key)) + r'[^{}]*\}\}'
-        text = re.sub(pattern, value, text)
-
-    return text
-
-def _generate_email(printer_function, template_msg_path, replacements, create_draft: bool = True):
-    outlook = None
-    draft_msg = None
+        cached = template_cache.get(template_msg_path)
+        if cached.placeholders is not None:
+            return list(cached.placeholders)
+    except OSError as error:
+        printer_function(f"\u26A0 Warning: Template cache unavailable: {error}")
 
     try:
-        outlook = win32com.client.Dispatch("Outlook.Application")
-        draft_msg = outlook.CreateItemFromTemplate(template_msg_path)
-
-        if not create_draft:
-            try:
-                draft_msg.UnRead = False
-                draft_msg.Saved = True
-            except:
-                pass
-        
-        draft_msg.HTMLBody = _replace_template_variables(draft_msg.HTMLBody, replacements)
-        draft_msg.Subject = _replace_template_variables(draft_msg.Subject, replacements)
-
-        return draft_msg
-
+        template = read_msg_file(template_msg_path)
+        subject, body = template.subject, template.body
     except Exception as e:
-        printer_function(f"Error: {e}")
-        if draft_msg is not None:
-            try:
-                draft_msg.Close(0)
-                draft_msg.Delete() if hasattr(draft_msg, 'Delete') else None
-                del draft_msg
-            except:
-                pass
-        if outlook is not None:
+        if win32com is None:
+            printer_function(f"Error extracting placeholders: {e}")
+            return []
+        printer_function(f"\u26A0 Warning: Could not read the template file directly ({e}) - opening it in Outlook")
+        template_text = _read_template_with_outlook(printer_function, template_msg_path)
+        if template_text is None:
+            return []
+        subject, body = template_text
+
+    if len(subject) + len(body) > 1000000: # 1MB limit
+        printer_function("Warning: Template text too large, truncating...")
+        body = body[:max(0, 1000000 - len(subject))]
+
+    if cached is None:
+        return find_template_placeholders(subject, body)
+    try:
+        return list(template_cache.store(cached.sha256, subject, body).placeholders or [])
+    except OSError as error:
+        printer_function(f"\u26A0 Warning: Could not update the template cache: {error}")
+        return find_template_placeholders(subject, body)
+
+# Returns the subject and HTML body with the replacements applied, and every placeholder left unfilled in either
+def _render_template(subject_template: CompiledTemplate, body_template: CompiledTemplate, replacements: Mapping[str, str]) -> Tuple[str, str, List[str]]:
+    subject = subject_template.render(replacements)
+    body = body_template.render(replacements)
+    return subject.text, body.text, list(dict.fromkeys(subject.unreplaced + body.unreplaced))
+
+def _format_unreplaced_warning(unreplaced: List[str]) -> str:
+    return f"\u26A0 WARNING: Unreplaced variables found {', '.join(f'{{{{{var}}}}}' for var in unreplaced)}"
+
+# Closes a mail item without saving (olDiscard), ignoring an item Outlook has already released
+def _discard_item(item) -> None:
+    try:
+        item.Close(0)
+    except:
+        pass
+
+class OutlookSession:
+    """One Outlook.Application dispatch, MAPI namespace and parsed template item shared by every draft of a batch."""
+
+    def __init__(self, printer_function, template_msg_path: str) -> None:
+        self.printer_function = printer_function
+        self.template_msg_path: str = template_msg_path
+        self.outlook: Any = None
+        self.namespace: Any = None
+        self.template_msg: Any = None
+        self.subject_template: CompiledTemplate = CompiledTemplate("")
+        self.body_template: CompiledTemplate = CompiledTemplate("")
+        self.drafts_created: int = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.template_msg is not None
+
+    # Dispatches Outlook and parses the template once; prints the error and stays closed when either fails
+    def open(self) -> bool:
+        if self.is_open:
+            return True
+        if win32com is None:
+            self.printer_function("Error: Outlook is not available on this system (win32com could not be imported)")
+            return False
+        try:
+            self.outlook = win32com.client.Dispatch("Outlook.Application")
+            self.namespace = self.outlook.GetNamespace("MAPI")
+            self.template_msg = self.outlook.CreateItemFromTemplate(self.template_msg_path)
+            self.subject_template, self.body_template = self._compile_template()
+            return True
+        except Exception as e:
+            self.printer_function(f"Error: {e}")
+            self.close()
+            return False
+
+    # Returns the subject and HTML body of the opened item, read over COM and tokenised once per template content; every draft
+    # is rendered from these. A template opened before (by this session or an earlier one) is answered from the template cache.
+    def _compile_template(self) -> Tuple[CompiledTemplate, CompiledTemplate]:
+        template_cache = get_template_cache()
+        try:
+            cached = template_cache.get(self.template_msg_path)
+        except OSError as error:
+            self.printer_function(f"\u26A0 Warning: Template cache unavailable: {error}")
+            return CompiledTemplate(self.template_msg.Subject), CompiledTemplate(self.template_msg.HTMLBody)
+
+        if cached.outlook_templates is None:
+            cached = template_cache.store_outlook_templates(cached.sha256, self.template_msg.Subject, self.template_msg.HTMLBody)
+        return cached.outlook_templates
+
+    # Returns a new unsaved draft with the replacements applied and the placeholders no value filled,
+    # or (None, []) when the session is closed or Outlook refuses
+    def create_draft(self, replacements: Mapping[str, str], create_draft: bool = True) -> Tuple[Any, List[str]]:
+        if not self.is_open:
+            return None, []
+
+        draft_msg = None
+        try:
             try:
-                del outlook
-            except:
-                pass
-
-    return None
+                draft_msg = self.template_msg.Copy()
+            except Exception:
+                # Some Outlook builds will not copy an unsaved item; parse the template again for this draft
+                draft_msg = self.outlook.CreateItemFromTemplate(self.template_msg_path)
+
+            if not create_draft:
+                try:
+                    draft_msg.UnRead = False
+                    draft_msg.Saved = True
+                except:
+                    pass
+
+            subject, html_body, unreplaced = _render_template(self.subject_template, self.body_template, replacements)
+            draft_msg.HTMLBody = html_body
+            draft_msg.Subject = subject
+            self.drafts_created += 1
+            return draft_msg, unreplaced
+
+        except Exception as e:
+            self.printer_function(f"Error: {e}")
+            if draft_msg is not None:
+                _discard_item(draft_msg)
+                draft_msg = None
+            return None, []
+
+    # Releases the template item, namespace and application in reverse order; the COM references are dropped here rather than
+    # whenever the garbage collector next runs
+    def close(self) -> None:
+        if self.template_msg is not None:
+            _discard_item(self.template_msg)
+        self.template_msg = None
+        self.namespace = None
+        self.outlook = None
+        self.subject_template = self.body_template = CompiledTemplate("")
+
+    def __enter__(self) -> "OutlookSession":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def _generate_email(printer_function, template_msg_path, replacements, create_draft: bool = True, session: Optional[OutlookSession] = None) -> Tuple[Any, List[str]]:
+    if session is not None:
+        return session.create_draft(replacements, create_draft)
+
+    with OutlookSession(printer_function, template_msg_path) as single_session:
+        return single_session.create_draft(replacements, create_draft)
 
 # Validate email address format
 def validate_email_format(email: str) -> bool:
@@ -177,7 +233,8 @@ def validate_email_format(email: str) -> bool:
     return bool(re.match(email_pattern, email.strip()))
 
 # Creates individualized draft email and returns True/False on success state
-def create_draft_email_individual_to(printer_function, template_msg_path, replacements) -> Optional[str]:
+# A batch passes its OutlookSession so Outlook is dispatched and the template parsed once; without one, a session is opened for this draft
+def create_draft_email_individual_to(printer_function, template_msg_path, replacements, session: Optional[OutlookSession] = None) -> Optional[str]:
     """Create a draft email from template with variable replacements"""
 
     is_valid, error_msg = validate_template_path(template_path=template_msg_path)
@@ -191,7 +248,7 @@ def create_draft_email_individual_to(printer_function, template_msg_path, replac
             printer_function(f"Error: Invalid email format: {email}")
             return None
 
-    draft_msg = _generate_email(printer_function, template_msg_path=template_msg_path, replacements=replacements, create_draft=True)
+    draft_msg, all_unreplaced = _generate_email(printer_function, template_msg_path=template_msg_path, replacements=replacements, create_draft=True, session=session)
     if not draft_msg:
         return None
     
@@ -204,14 +261,8 @@ def create_draft_email_individual_to(printer_function, template_msg_path, replac
             
         subject_msg = draft_msg.Subject
 
-        unreplaced_in_subject = _find_unreplaced_variables(draft_msg.Subject)
-        unreplaced_in_body = _find_unreplaced_variables(draft_msg.HTMLBody)
-
-        all_unreplaced = list(set(unreplaced_in_subject + unreplaced_in_body))
-
         if all_unreplaced:
-            formatted_vars = [f'{{{{{var}}}}}' for var in all_unreplaced]
-            printer_function(f"\u26A0 WARNING: Unreplaced variables found {', '.join(formatted_vars)}")
+            printer_function(_format_unreplaced_warning(all_unreplaced))
         
         draft_msg.Save()
         draft_msg.Close(0)
@@ -221,33 +272,26 @@ def create_draft_email_individual_to(printer_function, template_msg_path, replac
         printer_function(f"Error: {e}")
         return ""
     finally:
-        if draft_msg is not None:
-            try:
-                draft_msg.Close(0)
-                del draft_msg
-            except:
-                pass
-        
-        gc.collect()
+        # Dropping the last reference releases the item; the session (or the one-off session above) owns Outlook itself
+        _discard_item(draft_msg)
+        draft_msg = None
 
 def create_draft_email_bcc_all(printer_function, template_msg_path, template_data, email_addresses) -> Optional[str]:
     """Create a single draft email from template with variable replacements and BCC all recipients"""
     outlook = None
     draft_msg = None
     try:
+        if win32com is None:
+            raise RuntimeError("Outlook is not available on this system (win32com could not be imported)")
         outlook = win32com.client.Dispatch("Outlook.Application")
         draft_msg = outlook.CreateItemFromTemplate(template_msg_path)
 
-        draft_msg.HTMLBody = _replace_template_variables(draft_msg.HTMLBody, template_data)
-        draft_msg.Subject = _replace_template_variables(draft_msg.Subject, template_data)
-
-        unreplaced_in_subject = _find_unreplaced_variables(draft_msg.Subject)
-        unreplaced_in_body = _find_unreplaced_variables(draft_msg.HTMLBody)
-
-        all_unreplaced = list(set(unreplaced_in_subject + unreplaced_in_body))
+        subject, html_body, all_unreplaced = _render_template(CompiledTemplate(draft_msg.Subject), CompiledTemplate(draft_msg.HTMLBody), template_data)
+        draft_msg.HTMLBody = html_body
+        draft_msg.Subject = subject
 
         if all_unreplaced:
-            printer_function(f"\u26A0 WARNING: Unreplaced variables found {', '.join([f'{{{{{var}}}}}' for var in all_unreplaced])}")
+            printer_function(_format_unreplaced_warning(all_unreplaced))
 
             
         bcc_list = ";".join(email_addresses)
@@ -0,0 +1,334 @@
+import io
+import os
+import re
+import csv
+import concurrent.futures
+from array import array
+from bisect import bisect_right
+from collections import deque
+from typing import List, Dict, Final, Optional, Callable, Iterator, Any, Tuple, Deque, NamedTuple
+
+try: # importing the csv helpers shared with the row-by-row reader
+    from .file_loader import validate_file_path, get_csv_file_info, detect_csv_encoding, _codec_errors, _process_headers, _compile_column_plan, iter_csv_records
+except ImportError:
+    from file_loader import validate_file_path, get_csv_file_info, detect_csv_encoding, _codec_errors, _process_headers, _compile_column_plan, iter_csv_records # type: ignore
+
+try: # importing the .env integer helper
+    from .constants import env_int
+except ImportError:
+    from constants import env_int # type: ignore
+
+try: # importing the columnar record store
+    from .record_table import RecordTable
+except ImportError:
+    from record_table import RecordTable # type: ignore
+
+try: # importing the built-in transformers, rebuilt inside each worker process
+    from .field_transformers import create_transformer_functions
+except ImportError:
+    from field_transformers import create_transformer_functions # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+# Sizing is read from the .env file (parallel_workers, parallel_chunk_mb, parallel_min_file_mb)
+default_parallel_chunk_mb:      Final[int] = 16 # bytes of csv text parsed per worker task
+default_parallel_min_file_mb:   Final[int] = 64 # smaller files are read serially; the pool start-up costs more than it saves
+boundary_scan_bytes:            Final[int] = 4 * 1024 * 1024
+tasks_per_worker:               Final[int] = 2  # chunks queued per worker, which bounds the parsed chunks held at once
+# Each column travels back as one joined string, which pickles and splits far faster than a list of small strings.
+# The first separator that does not occur in the chunk's text is used (the transformers cannot introduce one).
+column_separators:              Final[Tuple[str, ...]] = ('\x1f', '\x1e', '\x00')
+
+# A '"' with ordinary characters on both sides is a literal quote inside an unquoted field (5" pipe). The csv module keeps it
+# as text, but it flips the quote parity the chunk boundaries rely on, so such files are read serially.
+# Written to start with the literal quote so the scan jumps from quote to quote instead of testing every byte.
+stray_quote_pattern:            Final[re.Pattern] = re.compile(rb'"(?<=[^,\r\n"]")(?=[^,\r\n"])')
+#-------------------------------------------------------------------------------------------------------------------
+
+# (source column index, record key, built-in transform kind or None); unlike a ColumnStep it can be sent to a worker process
+PortableStep = Tuple[int, str, Optional[str]]
+
+class ChunkResult(NamedTuple):
+    row_count:      int                             # non-blank rows in the chunk
+    columns:        List[Any]                       # values of the non-empty records per plan step, joined by separator
+    separator:      Optional[str]                   # None when every separator occurs in the chunk: columns are then lists
+    record_rows:    array                           # chunk row number (1-based) of each record, for max_rows
+    messages:       List[Tuple[int, Tuple[str, ...]]] # (chunk row number, message parts joined by the file row number)
+
+# Returns the offset just past the first newline outside quotes at or after cursor, or -1, with the quote state there.
+# Quote state is tracked by parity: every '"' opens or closes a quoted field, and an escaped "" flips it twice.
+def _next_record_end(block: bytes, cursor: int, in_quotes: bool) -> Tuple[int, bool]:
+    while True:
+        newline = block.find(b'\n', cursor)
+        if newline < 0:
+            return -1, in_quotes ^ bool(block.count(b'"', cursor) & 1)
+        in_quotes ^= bool(block.count(b'"', cursor, newline) & 1)
+        cursor = newline + 1
+        if not in_quotes:
+            return cursor, in_quotes
+
+# Returns the byte offsets that split [data_start, size) into chunks of about chunk_bytes ending on record boundaries,
+# from data_start through size, or None when the file has stray quotes that make the quote parity unreliable
+def _find_record_boundaries(filename: str, data_start: int, size: int, chunk_bytes: int) -> Optional[List[int]]:
+    boundaries: List[int] = [data_start]
+    next_target: int = data_start + chunk_bytes
+    in_quotes: bool = False
+    position: int = data_start
+
+    with open(filename, 'rb') as file:
+        file.seek(data_start)
+        while next_target < size:
+            block = file.read(boundary_scan_bytes)
+            if not block:
+                break
+            if stray_quote_pattern.search(block):
+                return None
+
+            cursor = 0
+            while position + len(block) > next_target:
+                target_offset = max(cursor, next_target - position)
+                in_quotes ^= bool(block.count(b'"', cursor, target_offset) & 1)
+                cursor, in_quotes = _next_record_end(block, target_offset, in_quotes)
+                if cursor < 0:
+                    break # the record continues into the next block; the search resumes there
+                boundaries.append(position + cursor)
+                next_target = position + cursor + chunk_bytes
+            else:
+                in_quotes ^= bool(block.count(b'"', cursor) & 1)
+
+            position += len(block)
+
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return boundaries
+
+# Returns the offset just past the header record (the file size when the whole file is one record)
+def _find_header_end(filename: str) -> int:
+    in_quotes = False
+    position = 0
+    with open(filename, 'rb') as file:
+        while True:
+            block = file.read(boundary_scan_bytes)
+            if not block:
+                return position
+            record_end, in_quotes = _next_record_end(block, 0, in_quotes)
+            if record_end >= 0:
+                return position + record_end
+            position += len(block)
+
+# Returns the step's built-in transform kind, or raises ValueError for a transformer a worker process cannot rebuild
+def _portable_step(step: Tuple[int, str, Optional[Callable[[str], str]]]) -> PortableStep:
+    index, key, transform = step
+    if transform is None:
+        return index, key, None
+
+    transform_kind = getattr(transform, 'transform_kind', None)
+    if transform_kind is None:
+        raise ValueError(f"the transformer for {key} is not a built-in transformer")
+    return index, key, transform_kind
+
+# Per worker process: the built-in transformers and the messages they print while the current chunk is parsed
+_worker_messages: List[Tuple[int, Tuple[str, ...]]] = []
+_worker_row: int = 0
+_worker_transformers: Dict[str, Callable[[str], str]] = {}
+
+def _worker_printer(text: str) -> None:
+    _worker_messages.append((_worker_row, (text,)))
+
+# Parses and transforms the records in [start, end) of the file; runs in a worker process.
+# Mirrors iter_csv_records' row handling, but counts rows from the start of the chunk and returns the records by column.
+def _parse_chunk(filename: str, start: int, end: int, encoding: str, steps: Tuple[PortableStep, ...]) -> ChunkResult:
+    global _worker_row
+    if not _worker_transformers:
+        _worker_transformers.update(create_transformer_functions(_worker_printer))
+    _worker_messages.clear()
+
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(encoding, errors=_codec_errors(encoding))
+
+    plan = [(index, key, _worker_transformers[kind] if kind else None) for index, key, kind in steps]
+    columns: List[List[str]] = [[] for _ in plan]
+    record_rows = array('L')
+    row_count = 0
+
+    for row in csv.reader(io.StringIO(text, newline='')):
+        if not row:
+            continue # blank line
+        row_count += 1
+        _worker_row = row_count
+
+        values: List[str] = []
+        row_length = len(row)
+        for index, key, transform in plan:
+            raw_value: str = row[index].strip() if index < row_length else ''
+            if transform is None:
+                values.append(raw_value)
+                continue
+            try:
+                values.append(transform(raw_value))
+            except Exception as e:
+                _worker_messages.append((row_count, (f"Warning: Transformation failed for {key} in row ", f" with raw_value = {raw_value}: {e}")))
+                values.append(raw_value)
+
+        # Only add non-empty records
+        if not any(value.strip() for value in values):
+            continue
+
+        record_rows.append(row_count)
+        for column, value in zip(columns, values):
+            column.append(value)
+
+    separator = next((candidate for candidate in column_separators if candidate not in text), None)
+    packed: List[Any] = columns if separator is None else [separator.join(column) for column in columns]
+    return ChunkResult(row_count, packed, separator, record_rows, list(_worker_messages))
+
+# Returns why the file cannot be split for the worker processes, or '' when it can
+def _serial_reason(encoding: str, boundaries: Optional[List[int]]) -> str:
+    if encoding == 'utf-16':
+        return "UTF-16 text cannot be split on newline bytes"
+    if boundaries is None:
+        return "the file has quote characters inside unquoted fields"
+    return ''
+
+# Yields the same records as iter_csv_records (transformed, non-empty, in file order, same batch_size / max_rows / as_table handling
+# and the same messages), but splits the file into byte ranges that end on record boundaries and parses and transforms them in
+# a process pool. Chunks are handed back in file order and at most tasks_per_worker chunks per worker are parsed ahead.
+# Only the built-in transformers can be rebuilt in the workers; with any other transformer, a UTF-16 file, stray quotes or
+# a file under parallel_min_file_mb (unless workers / chunk_bytes are given) the file is read by iter_csv_records instead.
+def iter_csv_records_parallel(printer_function, filename: str,
+                              transform_headers: bool = True,
+                              custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None,
+                              batch_size: Optional[int] = None,
+                              max_rows: Optional[int] = None,
+                              max_file_size_mb: Optional[int] = None,
+                              as_table: bool = False,
+                              workers: Optional[int] = None,
+                              chunk_bytes: Optional[int] = None) -> Iterator[Any]:
+    serial_options: Dict[str, Any] = dict(transform_headers=transform_headers, custom_transformers=custom_transformers, batch_size=batch_size,
+                                          max_rows=max_rows, max_file_size_mb=max_file_size_mb, as_table=as_table)
+
+    is_valid, error_msg = validate_file_path(filename, {'.csv'}, max_file_size_mb=max_file_size_mb)
+    if not is_valid:
+        raise ValueError(error_msg)
+
+    csv_info = get_csv_file_info(filename)
+    explicit = workers is not None or chunk_bytes is not None
+    worker_count = max(1, workers or env_int('parallel_workers', os.cpu_count() or 1))
+    chunk_bytes = chunk_bytes or max(1, env_int('parallel_chunk_mb', default_parallel_chunk_mb)) * 1024 * 1024
+
+    if worker_count < 2 or (not explicit and csv_info.size < env_int('parallel_min_file_mb', default_parallel_min_file_mb) * 1024 * 1024):
+        yield from iter_csv_records(printer_function, filename, **serial_options)
+        return
+
+    encoding = csv_info.encoding
+    header_end = _find_header_end(filename)
+    boundaries = _find_record_boundaries(filename, header_end, csv_info.size, chunk_bytes) if encoding != 'utf-16' else None
+
+    reason = _serial_reason(encoding, boundaries)
+    if reason:
+        printer_function(f"\u26A0 Warning: Reading {os.path.basename(filename)} serially: {reason}.")
+        yield from iter_csv_records(printer_function, filename, **serial_options)
+        return
+
+    # Printed once here, as open_csv_file prints it for the serial reader
+    detect_csv_encoding(printer_function, filename)
+    with open(filename, 'rb') as file:
+        header_text = file.read(header_end).decode(encoding, errors=_codec_errors(encoding))
+    header_row: List[str] = next(csv.reader(io.StringIO(header_text, newline='')), [])
+
+    processed_headers = _process_headers(printer_function, header_row, transform_headers)
+    if not processed_headers:
+        raise ValueError("CSV file appears to have no headers.")
+
+    column_plan = _compile_column_plan(printer_function, header_row, processed_headers, custom_transformers)
+    try:
+        steps = tuple(_portable_step(step) for step in column_plan)
+    except ValueError as e:
+        printer_function(f"\u26A0 Warning: Reading {os.path.basename(filename)} serially: {e}.")
+        yield from iter_csv_records(printer_function, filename, **serial_options)
+        return
+
+    keys = tuple(key for _, key, _ in column_plan)
+    # The BOM, if any, is part of the header bytes; the chunks start after it
+    chunk_encoding = 'utf-8' if encoding == 'utf-8-sig' else encoding
+    chunk_ranges = list(zip(boundaries[:-1], boundaries[1:])) # type: ignore[index]
+
+    batch: List[Dict[str, str]] = []
+    pending_table: Optional[RecordTable] = None
+    row_count: int = 0
+    record_count: int = 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(worker_count, max(1, len(chunk_ranges)))) as executor:
+        in_flight: Deque[concurrent.futures.Future] = deque()
+        next_chunk = 0
+        try:
+            while in_flight or next_chunk < len(chunk_ranges):
+                while next_chunk < len(chunk_ranges) and len(in_flight) < worker_count * tasks_per_worker:
+                    start, end = chunk_ranges[next_chunk]
+                    in_flight.append(executor.submit(_parse_chunk, filename, start, end, chunk_encoding, steps))
+                    next_chunk += 1
+
+                chunk: ChunkResult = in_flight.popleft().result()
+
+                rows_in_chunk = chunk.row_count
+                truncated = max_rows is not None and row_count + rows_in_chunk > max_rows
+                if truncated:
+                    rows_in_chunk = max_rows - row_count # type: ignore[operator]
+
+                for chunk_row, parts in chunk.messages:
+                    if chunk_row <= rows_in_chunk:
+                        printer_function(str(row_count + chunk_row).join(parts))
+
+                if chunk.separator is None:
+                    columns = chunk.columns
+                elif chunk.record_rows:
+                    columns = [column.split(chunk.separator) for column in chunk.columns]
+                else:
+                    columns = [[] for _ in keys]
+
+                if truncated:
+                    printer_function(f"Warning: CSV has more than {max_rows} rows. Processing stopped at row {max_rows}.")
+                    kept = bisect_right(chunk.record_rows, rows_in_chunk)
+                    columns = [column[:kept] for column in columns]
+                row_count += rows_in_chunk
+
+                table = RecordTable(keys, columns)
+                record_count += len(table)
+
+                if as_table:
+                    if pending_table is not None:
+                        pending_table.extend(table)
+                        table = pending_table
+                    pending_table = None
+
+                    offset = 0
+                    while batch_size and len(table) - offset >= batch_size:
+                        yield table.slice(offset, offset + batch_size)
+                        offset += batch_size
+                    if offset < len(table) or not batch_size:
+                        pending_table = table.slice(offset, len(table)) if offset else table
+                else:
+                    records = table.to_records()
+                    if not batch_size:
+                        yield from records
+                    else:
+                        batch.extend(records)
+                        while len(batch) >= batch_size:
+                            yield batch[:batch_size]
+                            batch = batch[batch_size:]
+
+                if truncated:
+                    break
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    if batch:
+        yield batch
+    if pending_table is not None:
+        yield pending_table
+    elif as_table and not batch_size:
+        yield RecordTable(keys)
+
+    plural_rows_check: str = "s" if row_count > 1 else ""
+    printer_function(f"Successfully loaded {record_count} record{plural_rows_check} from {row_count} row{plural_rows_check}.")
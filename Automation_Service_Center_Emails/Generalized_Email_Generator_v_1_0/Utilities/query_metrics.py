@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import threading
+from typing import List, Dict, Final, Optional, Any, Iterable
+
+try: # importing env_values
+    from .constants import env_values
+except ImportError:
+    from constants import env_values # type: ignore
+
+try: # importing main_path
+    from .file_loader import main_path
+except ImportError:
+    from file_loader import main_path # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+# Set query_metrics_log in the .env file (absolute, or relative to the program folder) to append every call as a JSON line
+query_metrics_log_key:  Final[str] = "query_metrics_log"
+#-------------------------------------------------------------------------------------------------------------------
+
+# Returns the round trips needed to fetch rows: the execute round trip returns up to prefetchrows, then one per arraysize batch.
+# The driver does not expose a round-trip counter, so this is computed the same way it fetches.
+def estimate_fetch_round_trips(rows: int, arraysize: int, prefetchrows: int) -> int:
+    if rows < prefetchrows:
+        return 0
+    return (rows - prefetchrows) // max(1, arraysize) + 1
+
+# Returns the approximate payload size of fetched rows (text length of every non-null value)
+def estimate_row_bytes(rows: Iterable[Any]) -> int:
+    total = 0
+    for row in rows:
+        values = row.values() if isinstance(row, dict) else row
+        for value in values:
+            if value is not None:
+                total += len(value) if isinstance(value, (str, bytes)) else len(str(value))
+    return total
+
+class QueryCall:
+    """
+    Timing spans and counters for one database call (a lookup, an enrichment fetch or a query_db run).
+    Spans are summed across the call's connections, so concurrent chunks can add up to more than the wall time.
+    """
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.started_at: float = time.time()
+        self._start_time: float = time.perf_counter()
+        self._lock = threading.Lock()
+
+        self.connect_seconds: float = 0.0
+        self.execute_seconds: float = 0.0
+        self.fetch_seconds: float = 0.0
+        self.wall_seconds: float = 0.0
+        self.executions: int = 0
+        self.rows: int = 0
+        self.round_trips: int = 0
+        self.bytes: int = 0
+
+    def add_connect(self, seconds: float, round_trips: int = 0) -> None:
+        with self._lock:
+            self.connect_seconds += seconds
+            self.round_trips += round_trips
+
+    def add_execute(self, seconds: float) -> None:
+        with self._lock:
+            self.execute_seconds += seconds
+            self.executions += 1
+            self.round_trips += 1
+
+    def add_fetch(self, seconds: float, rows: int, round_trips: int, byte_count: int) -> None:
+        with self._lock:
+            self.fetch_seconds += seconds
+            self.rows += rows
+            self.round_trips += round_trips
+            self.bytes += byte_count
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'name':         self.name,
+            'started_at':   round(self.started_at, 3),
+            'wall_ms':      round(self.wall_seconds * 1000, 3),
+            'connect_ms':   round(self.connect_seconds * 1000, 3),
+            'execute_ms':   round(self.execute_seconds * 1000, 3),
+            'fetch_ms':     round(self.fetch_seconds * 1000, 3),
+            'executions':   self.executions,
+            'rows':         self.rows,
+            'round_trips':  self.round_trips,
+            'bytes':        self.bytes,
+        }
+
+class CallTotals:
+    """Totals and largest single-call spans for every finished call with the same name."""
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.wall_seconds: float = 0.0
+        self.connect_seconds: float = 0.0
+        self.execute_seconds: float = 0.0
+        self.fetch_seconds: float = 0.0
+        self.max_wall_seconds: float = 0.0
+        self.max_connect_seconds: float = 0.0
+        self.max_execute_seconds: float = 0.0
+        self.max_fetch_seconds: float = 0.0
+        self.rows: int = 0
+        self.round_trips: int = 0
+        self.bytes: int = 0
+
+    def add(self, call: "QueryCall") -> None:
+        self.calls += 1
+        self.wall_seconds += call.wall_seconds
+        self.connect_seconds += call.connect_seconds
+        self.execute_seconds += call.execute_seconds
+        self.fetch_seconds += call.fetch_seconds
+        self.max_wall_seconds = max(self.max_wall_seconds, call.wall_seconds)
+        self.max_connect_seconds = max(self.max_connect_seconds, call.connect_seconds)
+        self.max_execute_seconds = max(self.max_execute_seconds, call.execute_seconds)
+        self.max_fetch_seconds = max(self.max_fetch_seconds, call.fetch_seconds)
+        self.rows += call.rows
+        self.round_trips += call.round_trips
+        self.bytes += call.bytes
+
+    # Adds another name's totals, for the run total
+    def merge(self, other: "CallTotals") -> None:
+        self.calls += other.calls
+        self.wall_seconds += other.wall_seconds
+        self.connect_seconds += other.connect_seconds
+        self.execute_seconds += other.execute_seconds
+        self.fetch_seconds += other.fetch_seconds
+        self.max_wall_seconds = max(self.max_wall_seconds, other.max_wall_seconds)
+        self.max_connect_seconds = max(self.max_connect_seconds, other.max_connect_seconds)
+        self.max_execute_seconds = max(self.max_execute_seconds, other.max_execute_seconds)
+        self.max_fetch_seconds = max(self.max_fetch_seconds, other.max_fetch_seconds)
+        self.rows += other.rows
+        self.round_trips += other.round_trips
+        self.bytes += other.bytes
+
+class QueryMetrics:
+    """
+    Sums the finished QueryCall records of the current run per call name, so a run of many batches reports one line per
+    kind of call. Each call is appended to a JSON lines file on its own when a log path is set.
+    """
+    def __init__(self, log_path: Optional[str] = None) -> None:
+        self.totals: Dict[str, CallTotals] = {}
+        self.log_path: Optional[str] = log_path
+        self._lock = threading.Lock()
+
+    def start_call(self, name: str) -> QueryCall:
+        return QueryCall(name)
+
+    def finish_call(self, call: QueryCall) -> None:
+        call.wall_seconds = time.perf_counter() - call._start_time
+        with self._lock:
+            self.totals.setdefault(call.name, CallTotals()).add(call)
+            if self.log_path:
+                try:
+                    with open(self.log_path, 'a', encoding='utf-8') as log_file:
+                        log_file.write(json.dumps(call.as_dict()) + "\n")
+                except OSError:
+                    self.log_path = None # stop trying for the rest of the session; the summary still has the numbers
+
+    def reset(self) -> None:
+        with self._lock:
+            self.totals = {}
+
+    # Returns one summary line per call name (call count, total and slowest-call spans) plus a total line when more than one
+    # name ran; the per-call detail is only in the JSON lines log
+    def format_report(self) -> List[str]:
+        with self._lock:
+            totals = dict(self.totals)
+
+        def format_line(name: str, call_totals: CallTotals) -> str:
+            calls = call_totals.calls
+            def format_ms(seconds: float, max_seconds: float) -> str:
+                return f"{seconds * 1000:.1f}" + (f", max {max_seconds * 1000:.1f}" if calls > 1 else "")
+
+            return (f"{name}: {calls} call{'s' if calls != 1 else ''}, {call_totals.wall_seconds * 1000:.1f} ms"
+                    + (f", slowest {call_totals.max_wall_seconds * 1000:.1f} ms" if calls > 1 else "")
+                    + f" (connect {format_ms(call_totals.connect_seconds, call_totals.max_connect_seconds)}; "
+                    f"execute {format_ms(call_totals.execute_seconds, call_totals.max_execute_seconds)}; "
+                    f"fetch {format_ms(call_totals.fetch_seconds, call_totals.max_fetch_seconds)}), "
+                    f"{call_totals.rows} row{'s' if call_totals.rows != 1 else ''}, "
+                    f"{call_totals.round_trips} round trip{'s' if call_totals.round_trips != 1 else ''}, {call_totals.bytes / 1024:.1f} KB")
+
+        lines = [format_line(name, call_totals) for name, call_totals in sorted(totals.items())]
+        if len(totals) > 1:
+            overall = CallTotals()
+            for call_totals in totals.values():
+                overall.merge(call_totals)
+            lines.append(format_line("total", overall))
+        return lines
+
+# Returns the JSON lines path from the .env file, or None when metrics are not logged
+def _get_query_metrics_log_path() -> Optional[str]:
+    log_path = (env_values.get(query_metrics_log_key) or '').strip()
+    if not log_path:
+        return None
+    return log_path if os.path.isabs(log_path) else os.path.normpath(os.path.join(main_path, log_path))
+
+# Global instance shared by the database helpers and the run summary
+_query_metrics: Optional[QueryMetrics] = None
+
+def get_query_metrics() -> QueryMetrics:
+    global _query_metrics
+    if _query_metrics is None:
+        _query_metrics = QueryMetrics(_get_query_metrics_log_path())
+    return _query_metrics
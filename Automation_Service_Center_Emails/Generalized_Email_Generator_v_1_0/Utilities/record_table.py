@@ -0,0 +1,111 @@
+from collections.abc import Mapping
+from typing import List, Dict, Optional, Iterator, Iterable, Sequence, Tuple, Union
+
+class RecordTable:
+    """
+    Employee records stored by column: one shared key tuple and one list of values per key, instead of a dict per row
+    repeating every key. Rows are read through RecordView objects, which behave like read-only dicts (get, [], in, items),
+    so draft and template code written for Dict[str, str] records works on them unchanged.
+    Columns such as 'email' or filled placeholders are added whole with set_column().
+    """
+    def __init__(self, keys: Sequence[str], columns: Optional[List[List[str]]] = None) -> None:
+        self.keys: Tuple[str, ...] = tuple(keys)
+        self._positions: Dict[str, int] = {key: position for position, key in enumerate(self.keys)}
+        if len(self._positions) != len(self.keys):
+            raise ValueError(f"Duplicate record keys: {', '.join(key for key in self.keys if self.keys.count(key) > 1)}")
+
+        self.columns: List[List[str]] = columns if columns is not None else [[] for _ in self.keys]
+        if len(self.columns) != len(self.keys) or len({len(column) for column in self.columns}) > 1:
+            raise ValueError("Every key needs one column and every column the same number of values")
+
+    # Builds a table from dict records, keyed by the first record's keys plus any keys that appear later ('' where missing)
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, str]]) -> "RecordTable":
+        records = list(records)
+        keys = list(dict.fromkeys(key for record in records for key in record))
+        return cls(keys, [[record.get(key, '') for record in records] for key in keys])
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def __iter__(self) -> Iterator["RecordView"]:
+        for row in range(len(self)):
+            yield RecordView(self, row)
+
+    def __getitem__(self, row: int) -> "RecordView":
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"record {row} out of range for {len(self)} records")
+        return RecordView(self, row)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._positions
+
+    def append(self, values: Sequence[str]) -> None:
+        for column, value in zip(self.columns, values):
+            column.append(value)
+
+    # Returns the records in [start, stop) as a new table
+    def slice(self, start: int, stop: int) -> "RecordTable":
+        return RecordTable(self.keys, [column[start:stop] for column in self.columns])
+
+    # Appends another table's records; both tables must have the same keys
+    def extend(self, other: "RecordTable") -> None:
+        if other.keys != self.keys:
+            raise ValueError(f"Cannot extend a table keyed {self.keys} with one keyed {other.keys}")
+        for column, values in zip(self.columns, other.columns):
+            column.extend(values)
+
+    # Returns the list of values for a key (the table's own list, not a copy)
+    def column(self, key: str) -> List[str]:
+        return self.columns[self._positions[key]]
+
+    # Replaces a key's values, adding the key when it is new (e.g. 'email' after the lookup)
+    def set_column(self, key: str, values: List[str]) -> None:
+        if len(values) != len(self):
+            raise ValueError(f"Column '{key}' has {len(values)} values for {len(self)} records")
+
+        position = self._positions.get(key)
+        if position is None:
+            self._positions[key] = len(self.keys)
+            self.keys += (key,)
+            self.columns.append(values)
+        else:
+            self.columns[position] = values
+
+    def to_records(self) -> List[Dict[str, str]]:
+        return [dict(zip(self.keys, values)) for values in zip(*self.columns)]
+
+class RecordView(Mapping):
+    """One row of a RecordTable, read like a Dict[str, str]; holds only the table and the row number."""
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: RecordTable, row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> str:
+        return self._table.columns[self._table._positions[key]][self._row]
+
+    def get(self, key: str, default=None): # type: ignore[override]
+        position = self._table._positions.get(key)
+        return default if position is None else self._table.columns[position][self._row]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._table._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.keys)
+
+    def __len__(self) -> int:
+        return len(self._table.keys)
+
+    def copy(self) -> Dict[str, str]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"RecordView({self.copy()!r})"
+
+# Either representation is accepted by the email and enrichment helpers
+EmployeeRecords = Union[List[Dict[str, str]], RecordTable]
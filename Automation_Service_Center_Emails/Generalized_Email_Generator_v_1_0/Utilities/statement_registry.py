@@ -0,0 +1,227 @@
+import os
+import re
+import time
+import threading
+from typing import List, Dict, Final, Optional, Any, Iterator, NamedTuple, Set
+
+try: # importing main_path
+    from .file_loader import main_path
+except ImportError:
+    from file_loader import main_path # type: ignore
+
+try: # importing the per-call timing spans
+    from .query_metrics import QueryCall, estimate_fetch_round_trips, estimate_row_bytes
+except ImportError:
+    from query_metrics import QueryCall, estimate_fetch_round_trips, estimate_row_bytes # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+sql_folder:                 Final[str] = "SQL"
+sql_path:                   Final[str] = os.path.normpath(os.path.join(main_path, sql_folder))
+default_stmt_cache_size:    Final[int] = 40 # driver default is 20; a handful of named statements plus the ad hoc ones fit easily
+
+# Oracle bind names: a letter followed by letters, digits, _, $ or #, at most 128 bytes
+bind_name_pattern:          Final[re.Pattern] = re.compile(r"^[A-Za-z][A-Za-z0-9_$#]{0,127}$")
+bind_reference_pattern:     Final[re.Pattern] = re.compile(r"(?<![:\w]):(\w+)")
+declared_binds_pattern:     Final[re.Pattern] = re.compile(r"^\s*--\s*binds:\s*(.*)$", re.IGNORECASE | re.MULTILINE)
+literal_or_comment_pattern: Final[re.Pattern] = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.DOTALL)
+#-------------------------------------------------------------------------------------------------------------------
+
+class NamedStatement(NamedTuple):
+    name:       str
+    sql:        str
+    bind_names: Set[str] # lower case, as the driver matches them case-insensitively
+    source:     str      # .sql file path, or 'runtime' for statements built in code
+
+class StatementStats:
+    """Execution counters for one named statement since the last reset_stats()."""
+    def __init__(self) -> None:
+        self.executions: int = 0
+        self.rows: int = 0
+        self.seconds: float = 0.0
+
+# Returns the lower-cased bind names referenced by a statement, ignoring string literals and comments
+def find_bind_names(sql_text: str) -> Set[str]:
+    return {name.lower() for name in bind_reference_pattern.findall(literal_or_comment_pattern.sub(' ', sql_text))}
+
+# Returns the problems with a statement's bind names: invalid/positional names and mismatches with a '-- binds:' header
+def validate_bind_names(sql_text: str) -> List[str]:
+    problems: List[str] = []
+    bind_names = find_bind_names(sql_text)
+
+    for bind_name in sorted(bind_names):
+        if not bind_name_pattern.match(bind_name):
+            problems.append(f"invalid bind name ':{bind_name}' (positional or not a valid Oracle identifier)")
+
+    declared = declared_binds_pattern.search(sql_text)
+    if declared:
+        declared_names = {name.strip().lstrip(':').lower() for name in declared.group(1).split(',') if name.strip()}
+        if declared_names - bind_names:
+            problems.append(f"declared but not used: {', '.join(sorted(declared_names - bind_names))}")
+        if bind_names - declared_names:
+            problems.append(f"used but not declared: {', '.join(sorted(bind_names - declared_names))}")
+
+    return problems
+
+# Strips the trailing ';' or '/' SQL*Plus terminators the driver rejects
+def _strip_terminator(sql_text: str) -> str:
+    sql_text = sql_text.strip()
+    while sql_text.endswith(';') or sql_text.endswith('/'):
+        sql_text = sql_text[:-1].rstrip()
+    return sql_text
+
+class StatementRegistry:
+    """
+    Named SQL statements loaded from the SQL folder (one statement per .sql file, named after the file).
+    Statements always run with the same text, so the driver's per-connection statement cache (stmtcachesize)
+    and the server's shared pool both reuse the parsed statement. Execution counts, rows and cumulative
+    execute + fetch time are kept per statement for the end-of-run report.
+    """
+    def __init__(self, directory: str = sql_path) -> None:
+        self.directory: str = directory
+        self.statements: Dict[str, NamedStatement] = {}
+        self.load_errors: List[str] = []
+        self.stats: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    # Loads every .sql file in the directory; files with bind problems are reported in load_errors and skipped
+    def load(self) -> int:
+        self.load_errors = []
+        if not os.path.isdir(self.directory):
+            self.load_errors.append(f"SQL folder not found: {self.directory}")
+            return 0
+
+        loaded = 0
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+            if not entry.is_file() or not entry.name.lower().endswith('.sql'):
+                continue
+
+            name = os.path.splitext(entry.name)[0]
+            try:
+                with open(entry.path, 'r', encoding='utf-8-sig') as sql_file:
+                    sql_text = _strip_terminator(sql_file.read())
+            except (OSError, UnicodeDecodeError) as error:
+                self.load_errors.append(f"{entry.name}: {error}")
+                continue
+
+            problems = validate_bind_names(sql_text)
+            if problems:
+                self.load_errors.append(f"{entry.name}: {'; '.join(problems)}")
+                continue
+
+            self.statements[name] = NamedStatement(name, sql_text, find_bind_names(sql_text), entry.path)
+            loaded += 1
+
+        return loaded
+
+    # Registers a statement built in code (e.g. the enrichment select); re-registering the same text is a no-op
+    def register(self, name: str, sql_text: str) -> NamedStatement:
+        sql_text = _strip_terminator(sql_text)
+        existing = self.statements.get(name)
+        if existing is not None and existing.sql == sql_text:
+            return existing
+
+        problems = validate_bind_names(sql_text)
+        if problems:
+            raise ValueError(f"SQL statement '{name}': {'; '.join(problems)}")
+
+        statement = NamedStatement(name, sql_text, find_bind_names(sql_text), 'runtime')
+        self.statements[name] = statement
+        return statement
+
+    def get(self, name: str) -> NamedStatement:
+        try:
+            return self.statements[name]
+        except KeyError:
+            raise KeyError(f"SQL statement '{name}' is not registered (expected {os.path.join(self.directory, name + '.sql')})") from None
+
+    # Raises ValueError when the supplied binds do not match the statement's bind names exactly
+    def _check_binds(self, statement: NamedStatement, bind_values: Dict[str, Any]) -> None:
+        supplied = {key.lower() for key in bind_values}
+        if supplied != statement.bind_names:
+            missing = ', '.join(sorted(statement.bind_names - supplied)) or 'none'
+            unexpected = ', '.join(sorted(supplied - statement.bind_names)) or 'none'
+            raise ValueError(f"SQL statement '{statement.name}': missing binds: {missing}; unexpected binds: {unexpected}")
+
+    def _record(self, statement: NamedStatement, rows: int, seconds: float) -> None:
+        with self._lock:
+            stats = self.stats.setdefault(statement.name, StatementStats())
+            stats.executions += 1
+            stats.rows += rows
+            stats.seconds += seconds
+
+    # Executes a named statement and yields its rows; execute and fetch time is counted, time spent by the caller is not.
+    # When a QueryCall is given the execute and fetch spans, rows, round trips and bytes are added to it as well.
+    def iter_rows(self, cursor: Any, name: str, bind_values: Optional[Dict[str, Any]] = None, call: Optional[QueryCall] = None) -> Iterator[Any]:
+        statement = self.get(name)
+        bind_values = bind_values or {}
+        self._check_binds(statement, bind_values)
+
+        start_time = time.perf_counter()
+        cursor.execute(statement.sql, bind_values)
+        execute_seconds = time.perf_counter() - start_time
+        if call is not None:
+            call.add_execute(execute_seconds)
+
+        rows = 0
+        byte_count = 0
+        fetch_seconds = 0.0
+        try:
+            while True:
+                start_time = time.perf_counter()
+                batch = cursor.fetchmany(cursor.arraysize)
+                fetch_seconds += time.perf_counter() - start_time
+                if not batch:
+                    break
+                rows += len(batch)
+                if call is not None:
+                    byte_count += estimate_row_bytes(batch)
+                yield from batch
+        finally:
+            self._record(statement, rows, execute_seconds + fetch_seconds)
+            if call is not None:
+                call.add_fetch(fetch_seconds, rows, estimate_fetch_round_trips(rows, cursor.arraysize, cursor.prefetchrows), byte_count)
+
+    # Executes a named statement on an async cursor and returns all of its rows
+    async def fetch_all_async(self, cursor: Any, name: str, bind_values: Optional[Dict[str, Any]] = None, call: Optional[QueryCall] = None) -> List[Any]:
+        statement = self.get(name)
+        bind_values = bind_values or {}
+        self._check_binds(statement, bind_values)
+
+        start_time = time.perf_counter()
+        await cursor.execute(statement.sql, bind_values)
+        execute_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        rows = await cursor.fetchall()
+        fetch_seconds = time.perf_counter() - start_time
+
+        self._record(statement, len(rows), execute_seconds + fetch_seconds)
+        if call is not None:
+            call.add_execute(execute_seconds)
+            call.add_fetch(fetch_seconds, len(rows), estimate_fetch_round_trips(len(rows), cursor.arraysize, cursor.prefetchrows), estimate_row_bytes(rows))
+        return rows
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {}
+
+    # Returns one summary line per statement executed since the last reset
+    def format_report(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{name}: {stats.executions} execution{'s' if stats.executions != 1 else ''}, "
+                f"{stats.rows} row{'s' if stats.rows != 1 else ''}, {stats.seconds * 1000:.1f} ms"
+                for name, stats in sorted(self.stats.items())
+            ]
+
+# Global instance, loaded from the SQL folder on first use
+_statement_registry: Optional[StatementRegistry] = None
+_registry_lock: Final[threading.Lock] = threading.Lock()
+
+def get_statement_registry() -> StatementRegistry:
+    global _statement_registry
+    with _registry_lock:
+        if _statement_registry is None:
+            _statement_registry = StatementRegistry()
+            _statement_registry.load()
+        return _statement_registry
@@ -0,0 +1,280 @@
+import queue
+import threading
+import concurrent.futures
+from collections import deque
+from typing import Dict, Final, Optional, Callable, Deque, Tuple, Iterator
+
+try: # importing the streaming csv reader for the configured backend (row by row, or pandas with csv_backend=pandas)
+    from .columnar_loader import select_csv_record_iterator
+except ImportError:
+    from columnar_loader import select_csv_record_iterator # type: ignore
+
+try: # importing the streaming workbook reader for .xlsx/.xlsm input
+    from .file_loader import iter_workbook_records, is_workbook_file
+except ImportError:
+    from file_loader import iter_workbook_records, is_workbook_file # type: ignore
+
+try: # importing the parsed input cache, used for reruns when the .env file sets input_cache=true
+    from .input_cache import iter_cached_record_batches, get_input_cache_enabled
+except ImportError:
+    from input_cache import iter_cached_record_batches, get_input_cache_enabled # type: ignore
+
+try: # importing the duplicate emplid stage
+    from .duplicate_emplids import iter_deduplicated_batches, get_aggregate_columns
+except ImportError:
+    from duplicate_emplids import iter_deduplicated_batches, get_aggregate_columns # type: ignore
+
+try: # importing the transformer rebinding, so the silent pass of a read-twice policy prints no warnings
+    from .field_transformers import rebind_transformers
+except ImportError:
+    from field_transformers import rebind_transformers # type: ignore
+
+try: # importing the columnar record store the batches travel in
+    from .record_table import RecordTable
+except ImportError:
+    from record_table import RecordTable # type: ignore
+
+try: # importing the .env integer helper
+    from .constants import env_int
+except ImportError:
+    from constants import env_int # type: ignore
+
+try: # importing the emplid -> email helpers
+    from .db_utilities import default_emplid_chunk_size, apply_emails_to_employees
+except ImportError:
+    from db_utilities import default_emplid_chunk_size, apply_emails_to_employees # type: ignore
+
+try: # importing the async worker and lookup coroutine
+    from .db_async_utilities import get_async_database_worker, lookup_emails_async
+except ImportError:
+    from db_async_utilities import get_async_database_worker, lookup_emails_async # type: ignore
+
+try: # importing the PeopleSoft placeholder enrichment
+    from .enrichment import fetch_enrichment_async, apply_enrichment_to_employees
+except ImportError:
+    from enrichment import fetch_enrichment_async, apply_enrichment_to_employees # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+# Sizing is read from the .env file (pipeline_batch_size, pipeline_queue_batches, pipeline_lookups_in_flight)
+default_pipeline_batch_size:        Final[int] = default_emplid_chunk_size # one batch is one bound emplid collection
+default_pipeline_queue_batches:     Final[int] = 4
+default_pipeline_lookups_in_flight: Final[int] = 2
+queue_poll_seconds:                 Final[float] = 0.1
+#-------------------------------------------------------------------------------------------------------------------
+
+class PipelineError(Exception):
+    """Raised inside the pipeline threads and kept in SubmitPipeline.error for the window to report."""
+
+class SubmitPipeline:
+    """
+    Pipelined submit. A parse thread streams transformed CSV record batches (RecordTable) into a bounded queue; a lookup thread
+    sends each batch's emplids to the async database worker, keeping a few batches in flight, and hands finished
+    batches (emails and enrichment applied) to a bounded ready queue that the Tk main loop drains to create drafts.
+    The bounded queues keep memory flat, and total wall time tends toward the slowest stage instead of the sum.
+    """
+    def __init__(self, printer_function, csv_file_path: str, emplid_field: str,
+                 username: str, password: str,
+                 custom_transformers: Optional[Dict[str, Callable[[str], str]]] = None,
+                 enrichment_keys: Optional[Dict[str, str]] = None,
+                 max_records: Optional[int] = None,
+                 sheet_name: Optional[str] = None,
+                 duplicate_policy: Optional[str] = None) -> None:
+        self.printer_function = printer_function
+        self.csv_file_path: str = csv_file_path
+        self.sheet_name: Optional[str] = sheet_name # workbook input only; None reads the active sheet
+        self.duplicate_policy: Optional[str] = duplicate_policy # None uses duplicate_emplid_policy from the .env file
+        self.emplid_field: str = emplid_field
+        self.custom_transformers = custom_transformers
+        self.enrichment_keys: Dict[str, str] = enrichment_keys or {}
+        self.max_records: Optional[int] = max_records
+
+        self.batch_size: int = max(1, env_int('pipeline_batch_size', default_pipeline_batch_size))
+        self.lookups_in_flight: int = max(1, env_int('pipeline_lookups_in_flight', default_pipeline_lookups_in_flight))
+        queue_batches: int = max(1, env_int('pipeline_queue_batches', default_pipeline_queue_batches))
+
+        # None marks the end of each queue
+        self.parsed_batches: "queue.Queue[Optional[RecordTable]]" = queue.Queue(maxsize=queue_batches)
+        self.ready_batches: "queue.Queue[Optional[RecordTable]]" = queue.Queue(maxsize=queue_batches)
+
+        self.error: Optional[BaseException] = None
+        self.records_parsed: int = 0
+        self.records_ready: int = 0
+
+        # Lookup results summed over every batch, printed once when the last batch is ready
+        self.emails_found: int = 0
+        self.placeholders_filled: Dict[str, int] = {placeholder: 0 for placeholder in self.enrichment_keys}
+
+        self._credentials: Optional[Tuple[str, str]] = (username, password)
+        self._cancelled = threading.Event()
+        self._parse_thread = threading.Thread(target=self._parse_stage, name="submit-parse", daemon=True)
+        self._lookup_thread = threading.Thread(target=self._lookup_stage, name="submit-lookup", daemon=True)
+
+    def start(self) -> None:
+        self._parse_thread.start()
+        self._lookup_thread.start()
+
+    # Stops both stages at the next batch boundary; the ready queue still ends with None
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    # Puts an item on a bounded queue, giving up if the pipeline is cancelled while the queue is full
+    def _put(self, target: queue.Queue, item: Optional[RecordTable]) -> bool:
+        while True:
+            try:
+                target.put(item, timeout=queue_poll_seconds)
+                return True
+            except queue.Full:
+                if self._cancelled.is_set():
+                    return False
+
+    def _fail(self, error: BaseException) -> None:
+        if self.error is None:
+            self.error = error
+        self._cancelled.set()
+
+    def _parse_stage(self) -> None:
+        try:
+            if is_workbook_file(self.csv_file_path):
+                read_input = lambda printer_function, transformers: iter_workbook_records(printer_function, self.csv_file_path, self.sheet_name, custom_transformers=transformers, batch_size=self.batch_size, as_table=True)
+            else:
+                iter_csv_records = select_csv_record_iterator(self.printer_function)
+                read_input = lambda printer_function, transformers: iter_csv_records(printer_function, self.csv_file_path, custom_transformers=transformers, batch_size=self.batch_size, as_table=True)
+
+            # Reads the input with its messages, and the built-in transformers' warnings, going to printer_function
+            def read_records(printer_function) -> Iterator[RecordTable]:
+                transformers = rebind_transformers(self.custom_transformers, printer_function)
+                read_batches = lambda: read_input(printer_function, transformers)
+                if get_input_cache_enabled():
+                    return iter_cached_record_batches(printer_function, self.csv_file_path, read_batches, batch_size=self.batch_size,
+                                                      custom_transformers=transformers, sheet_name=self.sheet_name)
+                return read_batches()
+
+            # One record per emplid across the whole input, so no emplid is looked up or drafted twice. Passed the reader
+            # rather than its batches, so policies that must see every emplid first can read the input again (silently the
+            # first time) instead of holding it.
+            records = iter_deduplicated_batches(self.printer_function, read_records, self.emplid_field, self.batch_size,
+                                                self.duplicate_policy, get_aggregate_columns(self.custom_transformers))
+
+            for batch in records:
+                if self._cancelled.is_set():
+                    break
+
+                # Checked on every batch: a deduplicated or sliced batch is not guaranteed to be the one that carries the header
+                if self.emplid_field not in batch:
+                    raise PipelineError(f"Employee ID field '{self.emplid_field}' not found in the CSV data. Available fields: {', '.join(batch.keys)}")
+
+                if self.max_records is not None and self.records_parsed + len(batch) > self.max_records:
+                    batch = batch.slice(0, self.max_records - self.records_parsed)
+                    self.printer_function(f"\u26A0 Warning: CSV contains more than {self.max_records} records. Processing only first {self.max_records}")
+                    if batch:
+                        self.records_parsed += len(batch)
+                        self._put(self.parsed_batches, batch)
+                    break
+
+                self.records_parsed += len(batch)
+                if not self._put(self.parsed_batches, batch):
+                    break
+        except Exception as error:
+            self._fail(error)
+        finally:
+            self._put_end(self.parsed_batches)
+
+    # Always delivers the end marker, dropping queued batches if the consumer is gone
+    def _put_end(self, target: queue.Queue) -> None:
+        while True:
+            try:
+                target.put(None, timeout=queue_poll_seconds)
+                return
+            except queue.Full:
+                if self._cancelled.is_set():
+                    try:
+                        target.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _submit_lookups(self, batch: RecordTable) -> Tuple[concurrent.futures.Future, Optional[concurrent.futures.Future]]:
+        username, password = self._credentials # type: ignore
+        emplids = list(dict.fromkeys(str(emplid) for emplid in batch.column(self.emplid_field) if emplid))
+        worker = get_async_database_worker()
+
+        lookup_future = worker.submit(lookup_emails_async(
+            printer_function=self.printer_function,
+            emplids=emplids,
+            username=username,
+            password=password,
+            reset_cache_stats=False,
+            report=False
+        ))
+
+        enrichment_future = None
+        if self.enrichment_keys:
+            enrichment_future = worker.submit(fetch_enrichment_async(
+                printer_function=self.printer_function,
+                emplids=emplids,
+                catalogue_keys=list(self.enrichment_keys.values()),
+                username=username,
+                password=password,
+                report=False
+            ))
+
+        return lookup_future, enrichment_future
+
+    # Waits for a batch's lookups and applies the results to its records
+    def _complete_batch(self, batch: RecordTable, lookup_future: concurrent.futures.Future, enrichment_future: Optional[concurrent.futures.Future]) -> RecordTable:
+        emails = lookup_future.result()
+        enrichment = enrichment_future.result() if enrichment_future else {}
+        if emails is None or enrichment is None:
+            raise PipelineError("No valid employee data found after querying the database.")
+
+        batch = apply_emails_to_employees(self.printer_function, batch, self.emplid_field, emails, report=False)
+        self.emails_found += sum(1 for email in batch.column('email') if email)
+        if self.enrichment_keys:
+            batch = apply_enrichment_to_employees(self.printer_function, batch, self.emplid_field, self.enrichment_keys, enrichment, report=False)
+            for placeholder in self.enrichment_keys:
+                self.placeholders_filled[placeholder] += sum(1 for value in batch.column(placeholder) if value)
+        self.records_ready += len(batch)
+        return batch
+
+    # Prints the lookup results for the whole input; the email cache counters are printed by the run summary
+    def _report_lookups(self) -> None:
+        self.printer_function(f"\U0001F4E7 Found {self.emails_found} email addresses for {self.records_ready} employees")
+        if self.enrichment_keys:
+            self.printer_function("\U0001F5C4 Placeholders filled from PeopleSoft:")
+            for placeholder, count in self.placeholders_filled.items():
+                self.printer_function(f"  - {{{{{placeholder}}}}} <- {self.enrichment_keys[placeholder]}: {count} of {self.records_ready} employees")
+
+    def _lookup_stage(self) -> None:
+        in_flight: Deque[Tuple[RecordTable, concurrent.futures.Future, Optional[concurrent.futures.Future]]] = deque()
+        try:
+            while not self._cancelled.is_set():
+                try:
+                    batch = self.parsed_batches.get(timeout=queue_poll_seconds)
+                except queue.Empty:
+                    continue
+                if batch is None:
+                    break
+
+                in_flight.append((batch, *self._submit_lookups(batch)))
+
+                # Finished batches go out in file order once the window of in-flight lookups is full
+                while len(in_flight) >= self.lookups_in_flight and not self._cancelled.is_set():
+                    self._put(self.ready_batches, self._complete_batch(*in_flight.popleft()))
+
+            while in_flight and not self._cancelled.is_set():
+                self._put(self.ready_batches, self._complete_batch(*in_flight.popleft()))
+
+            if not self._cancelled.is_set():
+                self._report_lookups()
+        except Exception as error:
+            self._fail(error)
+        finally:
+            for _, lookup_future, enrichment_future in in_flight:
+                lookup_future.cancel()
+                if enrichment_future:
+                    enrichment_future.cancel()
+            self._credentials = None
+            self._put_end(self.ready_batches)
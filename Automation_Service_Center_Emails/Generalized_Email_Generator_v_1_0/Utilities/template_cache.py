@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Final, Optional, Tuple, NamedTuple
+
+try: # importing the .env helpers
+    from .constants import env_int, env_bool
+except ImportError:
+    from constants import env_int, env_bool # type: ignore
+
+try: # importing main_path
+    from .file_loader import main_path
+except ImportError:
+    from file_loader import main_path # type: ignore
+
+try: # importing the template tokeniser the placeholders are read with
+    from .template_renderer import CompiledTemplate
+except ImportError:
+    from template_renderer import CompiledTemplate # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+template_cache_folder:          Final[str] = "template_cache"
+template_cache_path:            Final[str] = os.path.normpath(os.path.join(main_path, template_cache_folder))
+template_cache_extension:       Final[str] = ".template"
+template_cache_format_version:  Final[int] = 3 # bump when the entry layout or the .msg reader's output changes
+default_template_cache_entries: Final[int] = 32 # templates kept in memory and on disk; the least recently used go first
+hash_block_bytes:               Final[int] = 1024 * 1024
+max_placeholder_length:         Final[int] = 100 # longer {{...}} runs are taken to be text, not placeholders
+#-------------------------------------------------------------------------------------------------------------------
+
+class FileStamp(NamedTuple):
+    size:               int
+    mtime_ns:           int
+    sha256:             str
+
+class CachedTemplate(NamedTuple):
+    sha256:             str
+    placeholders:       Optional[List[str]] # subject first, then body, each once; None until the file has been read
+    outlook_templates:  Optional[Tuple[CompiledTemplate, CompiledTemplate]] # subject and HTML body of the item Outlook opens; None until a session opened it
+
+# Returns True when the .env file also keeps templates on disk between runs (template_cache=true); memory caching is always on
+def get_template_disk_cache_enabled() -> bool:
+    return env_bool('template_cache')
+
+# Returns the placeholders of the subject and then the body, each name once
+def find_template_placeholders(subject: str, body: str) -> List[str]:
+    names = dict.fromkeys(CompiledTemplate(subject).placeholders + CompiledTemplate(body).placeholders)
+    return [name for name in names if len(name) < max_placeholder_length]
+
+def _file_sha256(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(hash_block_bytes), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class TemplateCache:
+    """
+    Placeholders and compiled templates of each .msg template, keyed by the file's sha256. An unchanged file is
+    recognised from its (path, size, mtime) stamp alone; a touched or copied file is hashed and found again by content.
+    Drafts are rendered from the item Outlook opens, whose HTML is not the text read from the file, so the compiled
+    subject and body are the ones Outlook returned and are kept in memory only. With template_cache=true the
+    placeholders are also written to disk, so a restart reads no template twice.
+    """
+    def __init__(self, directory: str = template_cache_path, max_entries: Optional[int] = None, on_disk: Optional[bool] = None) -> None:
+        self.directory: str = directory
+        self.max_entries: int = max(1, max_entries if max_entries is not None else env_int('template_cache_max_entries', default_template_cache_entries))
+        self.on_disk: bool = get_template_disk_cache_enabled() if on_disk is None else on_disk
+        self._stamps: "OrderedDict[str, FileStamp]" = OrderedDict() # normalised path -> stamp
+        self._templates: "OrderedDict[str, CachedTemplate]" = OrderedDict() # sha256 -> entry
+        self._lock = threading.Lock()
+
+        # Counters for the placeholder lookups so far
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _entry_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, sha256 + template_cache_extension)
+
+    # Replaces the given fields of the entry for the content hash, keeping the others, and returns the entry
+    def _update(self, sha256: str, **fields) -> CachedTemplate:
+        with self._lock:
+            entry = self._templates.get(sha256, CachedTemplate(sha256, None, None))._replace(**fields)
+            self._templates[sha256] = entry
+            self._templates.move_to_end(sha256)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+            return entry
+
+    # Returns the file's content hash, from its stamp when the size and mtime are unchanged, else by hashing it
+    def _file_hash(self, filename: str) -> str:
+        stat = os.stat(filename)
+        path_key = os.path.normcase(os.path.abspath(filename))
+        with self._lock:
+            stamp = self._stamps.get(path_key)
+            if stamp is not None and stamp.size == stat.st_size and stamp.mtime_ns == stat.st_mtime_ns:
+                self._stamps.move_to_end(path_key)
+                return stamp.sha256
+
+        # The stat is taken before hashing, so a file changed meanwhile is hashed again next time
+        sha256 = _file_sha256(filename)
+        with self._lock:
+            self._stamps[path_key] = FileStamp(stat.st_size, stat.st_mtime_ns, sha256)
+            self._stamps.move_to_end(path_key)
+            while len(self._stamps) > self.max_entries:
+                self._stamps.popitem(last=False)
+        return sha256
+
+    # Returns the placeholders stored for the content hash, or None
+    def _load_from_disk(self, sha256: str) -> Optional[List[str]]:
+        path = self._entry_path(sha256)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                stored = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(stored, dict) or stored.get('version') != template_cache_format_version:
+            return None
+        placeholders = stored.get('placeholders')
+        if not isinstance(placeholders, list) or not all(isinstance(name, str) for name in placeholders):
+            return None
+        os.utime(path) # marks the entry as recently used for eviction
+        return placeholders
+
+    def _store_on_disk(self, sha256: str, placeholders: List[str]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = self._entry_path(sha256) + ".tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': template_cache_format_version, 'placeholders': placeholders}, file)
+        os.replace(temporary_path, self._entry_path(sha256))
+
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(template_cache_extension) and entry.is_file()]
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+        for entry in entries[self.max_entries:]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # Returns the cached entry for the file's content; its placeholders / outlook_templates are None when they have not
+    # been read yet, and are filled in by passing its sha256 to store() / store_outlook_templates(). Only a changed size
+    # or mtime costs a hash.
+    def get(self, filename: str) -> CachedTemplate:
+        sha256 = self._file_hash(filename)
+        with self._lock:
+            entry = self._templates.get(sha256)
+            if entry is not None:
+                self._templates.move_to_end(sha256)
+
+        if (entry is None or entry.placeholders is None) and self.on_disk:
+            placeholders = self._load_from_disk(sha256)
+            if placeholders is not None:
+                entry = self._update(sha256, placeholders=placeholders)
+        if entry is None:
+            entry = CachedTemplate(sha256, None, None)
+
+        if entry.placeholders is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    # Caches the placeholders of the subject and body read from the file with the given content hash, and returns the entry
+    def store(self, sha256: str, subject: str, body: str) -> CachedTemplate:
+        entry = self._update(sha256, placeholders=find_template_placeholders(subject, body))
+        if self.on_disk:
+            with self._lock:
+                self._store_on_disk(sha256, entry.placeholders or [])
+        return entry
+
+    # Caches the subject and HTML body Outlook returned for the file with the given content hash, compiled, and returns the entry
+    def store_outlook_templates(self, sha256: str, subject: str, html_body: str) -> CachedTemplate:
+        return self._update(sha256, outlook_templates=(CompiledTemplate(subject), CompiledTemplate(html_body)))
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    # Forgets every template, in memory and on disk
+    def clear(self) -> None:
+        with self._lock:
+            self._stamps.clear()
+            self._templates.clear()
+            if not os.path.isdir(self.directory):
+                return
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(template_cache_extension):
+                    os.remove(entry.path)
+
+# Global instance shared by every template lookup
+_template_cache: Optional[TemplateCache] = None
+
+def get_template_cache() -> TemplateCache:
+    global _template_cache
+    if _template_cache is None:
+        _template_cache = TemplateCache()
+    return _template_cache
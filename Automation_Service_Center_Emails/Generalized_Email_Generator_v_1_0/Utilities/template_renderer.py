@@ -0,0 +1,92 @@
+import re
+from typing import List, Dict, Final, Optional, Tuple, Mapping, NamedTuple
+
+try: # importing the header normalisation the placeholder mapping uses
+    from .file_loader import normalize_field_for_matching
+except ImportError:
+    from file_loader import normalize_field_for_matching # type: ignore
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+placeholder_pattern:        Final[re.Pattern] = re.compile(r'\{\{([^{}]+)\}\}')
+html_tag_pattern:           Final[re.Pattern] = re.compile(r'<[^>]+>') # Outlook can split a placeholder with formatting tags
+control_character_pattern:  Final[re.Pattern] = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+max_replacement_length:     Final[int] = 1000
+#-------------------------------------------------------------------------------------------------------------------
+
+class RenderResult(NamedTuple):
+    text:       str
+    unreplaced: List[str] # placeholder names left in the text, in order of first appearance
+
+# Sanitize replacement values
+def sanitize_replacement_value(value: str) -> str:
+    if not isinstance(value, str):
+        value = str(value)
+
+    # Limit length to prevent DoS
+    if len(value) > max_replacement_length:
+        value = value[:max_replacement_length] + "..."
+
+    # Remove null bytes and other control characters
+    return control_character_pattern.sub('', value)
+
+# Returns the placeholder name inside {{ }}: formatting tags removed and whitespace trimmed
+def clean_placeholder_name(inner_text: str) -> str:
+    return html_tag_pattern.sub('', inner_text).strip()
+
+# Returns the record key a placeholder name reads from: the exact key, else the key with the same normalised name
+# (the way placeholders are mapped to csv fields), else the longest key the name contains; None when nothing fits
+def _resolve_slot_key(name: str, keys: Tuple[str, ...], normalized_keys: Dict[str, str]) -> Optional[str]:
+    if name in keys:
+        return name
+    normalized = normalize_field_for_matching(name)
+    if normalized in normalized_keys:
+        return normalized_keys[normalized]
+    contained = [key for key in keys if key and key in name]
+    return max(contained, key=len) if contained else None
+
+class CompiledTemplate:
+    """A template split once into literal text and placeholder slots; each recipient is rendered with one join."""
+
+    def __init__(self, text: Optional[str]) -> None:
+        self.text: str = text or ""
+        # split() alternates literal text and placeholder contents: [literal, inner, literal, inner, ..., literal]
+        self.parts: List[str] = placeholder_pattern.split(self.text)
+        self.slots: List[Tuple[int, str]] = [] # (index in parts, placeholder name)
+        for index in range(1, len(self.parts), 2):
+            inner_text = self.parts[index]
+            self.parts[index] = f"{{{{{inner_text}}}}}" # the original placeholder, kept when no value fills it
+            name = clean_placeholder_name(inner_text)
+            if name:
+                self.slots.append((index, name))
+        self.placeholders: List[str] = list(dict.fromkeys(name for _, name in self.slots))
+        self._slot_maps: Dict[Tuple[str, ...], Dict[str, Optional[str]]] = {}
+
+    # Returns placeholder name -> record key for one set of record keys; computed once per distinct key set, which
+    # every record of a csv shares
+    def _slot_map(self, replacements: Mapping[str, str]) -> Dict[str, Optional[str]]:
+        keys = tuple(replacements)
+        slot_map = self._slot_maps.get(keys)
+        if slot_map is None:
+            normalized_keys: Dict[str, str] = {}
+            for key in keys:
+                normalized_keys.setdefault(normalize_field_for_matching(key), key)
+            slot_map = {name: _resolve_slot_key(name, keys, normalized_keys) for name in self.placeholders}
+            self._slot_maps[keys] = slot_map
+        return slot_map
+
+    # Returns the text with every placeholder that has a value filled in, and the names of those that did not
+    def render(self, replacements: Optional[Mapping[str, str]]) -> RenderResult:
+        if not self.slots:
+            return RenderResult(self.text, [])
+        if not replacements:
+            return RenderResult(self.text, list(self.placeholders))
+
+        slot_map = self._slot_map(replacements)
+        values = {name: sanitize_replacement_value(replacements[key]) for name, key in slot_map.items() if key is not None}
+
+        parts = self.parts.copy()
+        for index, name in self.slots:
+            value = values.get(name)
+            if value is not None:
+                parts[index] = value
+        return RenderResult(''.join(parts), [name for name in self.placeholders if name not in values])
@@ -3,28 +3,52 @@ import sys
 from io import StringIO
 import tkinter as tk
 import re
-import queue
 import threading
-import csv
-import codecs
+import queue
+import concurrent.futures
+from collections import deque
 import signal
-from typing import Dict, List, Optional, Final, Any, Callable
+from typing import Dict, List, Optional, Final, Any, Callable, Mapping
 
 from Utilities import (
     #from package_checker
     install_required_libraries, 
     
     #from file_loader
-    get_confidential_csv_files, get_confidential_email_templates, read_csv_file, select_csv_file, select_email_file, normalize_field_for_matching,
+    get_confidential_csv_files, get_confidential_email_templates, get_input_file_info, is_workbook_file, CsvFileInfo, get_confidential_csv_index, get_confidential_template_index, select_csv_file, select_email_file, normalize_field_for_matching,
 
     #from constants
     color_scheme,
 
+    #from directory_index
+    DirectoryIndex, DirectoryDiff, DirectoryWatcher,
+
+    #from field_transformers
+    create_transformer_functions,
+
     #from db_utilities
-    query_db_for_busn_emails_from_emplid, test_connection,
+    close_connection_pool,
+
+    #from db_async_utilities
+    get_async_database_worker, test_connection_async, close_async_connection_pool, stop_async_database_worker,
+
+    #from email_cache
+    get_email_lookup_cache,
+
+    #from statement_registry
+    get_statement_registry,
+
+    #from query_metrics
+    get_query_metrics,
+
+    #from enrichment
+    resolve_enrichment_placeholders,
+
+    #from submit_pipeline
+    SubmitPipeline,
 
     #from outlook_utilities
-    create_draft_email_individual_to, create_draft_email_bcc_all, get_template_placeholders,
+    create_draft_email_individual_to, create_draft_email_bcc_all, get_template_placeholders, OutlookSession,
 
     # SecureCredentialManager class to manage username and password
     # SecurePasswordContext to manage password security
@@ -48,6 +72,13 @@ class UIConstants:
     INPUT_FONT: Final[tuple] = ("Consolas", 11)
     BUTTON_FONT:Final[tuple] = ("Consolas", 11, "bold")
 
+    # Pipelined submit: drafts created per Tk tick, and how often to check for the next ready batch
+    DRAFTS_PER_TICK:    Final[int] = 25
+    PIPELINE_POLL_MS:   Final[int] = 50
+
+    # How often the Confidential_Data folders are checked for added or removed files
+    DIRECTORY_POLL_SECONDS: Final[float] = 5.0
+
 class MainApplicationWindow:
     def __init__(self) -> None:
         self.window: ctk.CTk = ctk.CTk()
@@ -59,6 +90,7 @@ class MainApplicationWindow:
         self.connection_button: Optional[ctk.CTkButton]   = None
         self.csv_dropdown:      Optional[ctk.CTkComboBox] = None
         self.email_dropdown:    Optional[ctk.CTkComboBox] = None
+        self.sheet_dropdown:    Optional[ctk.CTkComboBox] = None
         self.output_textbox:    Optional[ctk.CTkTextbox]  = None
         self.connection_status: Optional[ctk.CTkLabel]    = None
 
@@ -81,6 +113,7 @@ class MainApplicationWindow:
         # Track currently loaded file paths to prevent unnecessary reloading
         self._current_csv_path: Optional[str] = None
         self._current_email_path: Optional[str] = None
+        self._current_sheet_name: Optional[str] = None # sheet of the loaded workbook; None for CSV files
 
         # Placeholder matching section
         self.outlook_placeholders: List[str] = []
@@ -89,6 +122,10 @@ class MainApplicationWindow:
         self._extracting_placeholders: bool = False
         self._updating_field_mapping: bool = False
         self._updating_field_config: bool = False
+        self._submit_in_progress: bool = False
+        self._submit_pipeline: Optional[SubmitPipeline] = None
+        self._transformer_functions: Optional[Dict[str, Callable[[str], str]]] = None
+        self._directory_watcher: Optional[DirectoryWatcher] = None
 
         # Initialize the window
         self._setup_window()
@@ -238,6 +275,8 @@ class MainApplicationWindow:
                 password_widget.configure(show="*")
 
             self.credential_manager.clear_all()
+            close_connection_pool()
+            close_async_connection_pool()
 
             self.connection_tested = False
 
@@ -425,6 +464,25 @@ class MainApplicationWindow:
         )
         open_button.grid(row=0, column=1)
 
+        # Workbooks can hold several sheets; the sheet picker is only shown while a workbook is selected
+        if dropdown_var == "csv_dropdown":
+            self.sheet_dropdown = ctk.CTkComboBox(
+                container,
+                values=[],
+                state="readonly",
+                font=ctk.CTkFont(size=11),
+                height=28,
+                fg_color=color_scheme["background"],
+                text_color=color_scheme["text"],
+                border_color=color_scheme["secondary"],
+                button_color=color_scheme["primary"],
+                button_hover_color=color_scheme["primary_hover"],
+                corner_radius=8,
+                command=self._on_sheet_dropdown_change
+            )
+            self.sheet_dropdown.grid(row=2, column=0, padx=(0, 90), pady=(4, 0), sticky="ew")
+            self.sheet_dropdown.grid_remove()
+
     def _create_output_section(self) -> None:
         console_frame = ctk.CTkFrame(
             self.window,
@@ -623,6 +681,10 @@ class MainApplicationWindow:
 
                 if self.unmatched_placeholders:
                     self._write_to_output(f"\nAvailable CSV fields: {', '.join(self.current_csv_fields)}")
+
+                    enrichment_keys = resolve_enrichment_placeholders(self.unmatched_placeholders)
+                    if enrichment_keys:
+                        self._write_to_output(f"\U0001F5C4 Will fetch from PeopleSoft on Submit: {', '.join(enrichment_keys)}")
                     
             should_recreate_ui = (
                 self.field_transform_frame and
@@ -643,6 +705,13 @@ class MainApplicationWindow:
             self._updating_field_mapping = False
             self._write_to_output("\u2705 Field mapping update completed")
 
+    def _on_sheet_dropdown_change(self, selected_sheet: str) -> None:
+        if not self._current_csv_path or selected_sheet == self._current_sheet_name:
+            return
+        self._write_to_output(f"\nLoading fields from sheet: {selected_sheet}")
+        self._load_csv_fields(self._current_csv_path, selected_sheet)
+        self.window.after(100, self._scroll_console_to_bottom)
+
     def _on_csv_dropdown_change(self, selected_name: str) -> None:
         self._write_to_output("\n")
         try:
@@ -808,24 +877,16 @@ class MainApplicationWindow:
                 password_widget.configure(border_color=color_scheme["error"]) # type: ignore
 
     def _test_connection_with_timeout(self, username: str, password: str, timeout_seconds: int = 30) -> tuple[bool, str]:
-        result_queue = queue.Queue()
-
-        def test_worker():
-            try:
-                result = test_connection(username, password)
-                result_queue.put((result, None))
-            except Exception as e:
-                result_queue.put((False, str(e)))
-        
-        worker_thread = threading.Thread(target=test_worker, daemon=True)
-        worker_thread.start()
+        test_future = get_async_database_worker().submit(test_connection_async(username, password))
 
         try:
             # Wait for result with timeout
-            success, error = result_queue.get(timeout=timeout_seconds)
-            return success, error if error else ""
-        except queue.Empty:
+            return test_future.result(timeout=timeout_seconds), ""
+        except concurrent.futures.TimeoutError:
+            test_future.cancel()
             return False, f"Connection test timed out after {timeout_seconds} seconds"
+        except Exception as e:
+            return False, str(e)
 
     def _test_connection_async(self) -> None:
         if self.connection_tested:
@@ -905,6 +966,10 @@ class MainApplicationWindow:
         self._write_to_output(f"\u2717 Connection test error: {error_msg}")
 
     def _on_submit(self) -> None:
+        if self._submit_in_progress:
+            self._write_to_output("\u23F3 Email generation is already running.")
+            return
+
         self._write_to_output("=== Starting Email Generation ===")
 
         if not self.connection_tested:
@@ -957,57 +1022,116 @@ class MainApplicationWindow:
                         self._write_to_output(f"  - {field}: {transform_name}")
                     self._write_to_output("")
 
-                employee_data = read_csv_file(
-                    printer_function=self._write_to_output,
-                    filename=csv_file_path,
-                    custom_transformers=transformers
-                )
+                # Unmatched placeholders the PeopleSoft catalogue can fill are fetched alongside the emails
+                enrichment_keys = resolve_enrichment_placeholders(self.unmatched_placeholders)
 
-                if not employee_data:
-                    self._write_to_output("\u274C No valid employee data found in the CSV file.")
-                    return
-                
-                max_emails = 1000
-                if len(employee_data) > max_emails:
-                    self._write_to_output(f"\u26A0 Warning: CSV contains {len(employee_data)} records. Processing only first {max_emails}")
-                    employee_data = employee_data[:max_emails]
-
-                if emplid_field not in employee_data[0]:
-                    self._write_to_output(f"\u274C Employee ID field '{emplid_field}' not found in the CSV data.")
-                    available_fields = list(employee_data[0].keys())
-                    self._write_to_output(f"Available fields: {', '.join(available_fields)}")
-
-                    self._write_to_output(f"Selected original field from dropdown: {self.emplid_field_var.get() if self.emplid_field_var else 'None'}")
-                    self._write_to_output(f"Mapped to cleaned field: {emplid_field}")
-                    self._write_to_output("Field mapping debug:")
-                    if hasattr(self, 'emplid_field_mapping'):
-                        for orig, cleaned in self.emplid_field_mapping.items():
-                            self._write_to_output(f" '{orig}' -> '{cleaned}'")
-                    return
-                
+                get_email_lookup_cache().reset_stats()
+                get_statement_registry().reset_stats()
+                get_query_metrics().reset()
 
-                employee_data = query_db_for_busn_emails_from_emplid(
-                    printer_function=self._write_to_output,
-                    employees=employee_data, 
+                # CSV parsing, lookups and draft creation overlap: batches flow through bounded queues (see SubmitPipeline)
+                pipeline = SubmitPipeline(
+                    printer_function=self._write_to_output_threadsafe,
+                    csv_file_path=csv_file_path,
                     emplid_field=emplid_field,
-                    username=username,
-                    password=password
+                    username=str(username),
+                    password=str(password),
+                    custom_transformers=transformers,
+                    enrichment_keys=enrichment_keys,
+                    sheet_name=self._current_sheet_name if is_workbook_file(csv_file_path) else None
                 )
+                pipeline.start()
             
             except Exception as e:
                 self._write_to_output(f"\u274C Error during email generation: {e}")
                 return
 
-        if not employee_data:
-            self._write_to_output("\u274C No valid employee data found after querying the database.")
-            return
-        
-        bcc_mode = self.bcc_mode_var.get() if self.bcc_mode_var else False
-
-        if bcc_mode:
-            self._create_bcc_email(email_template_path, employee_data)
+        self._submit_pipeline = pipeline
+        self._set_submit_in_progress(True)
+        self._drain_submit_pipeline({
+            'pipeline':             pipeline,
+            'email_template_path':  email_template_path,
+            'bcc_mode':             self.bcc_mode_var.get() if self.bcc_mode_var else False,
+            'pending':              deque(),
+            'bcc_records':          [],
+            'draft_run':            None,
+        })
+
+    def _write_to_output_threadsafe(self, text: str) -> None:
+        self.window.after(0, self._write_to_output, text)
+
+    def _set_submit_in_progress(self, in_progress: bool) -> None:
+        self._submit_in_progress = in_progress
+        if in_progress:
+            self.connection_button.configure(state="disabled", text="Working...") # type: ignore
         else:
-            self._create_individual_emails(email_template_path, employee_data)
+            self.connection_button.configure(state="normal") # type: ignore
+            if self.connection_tested:
+                self._update_connection_ui(True)
+            else:
+                self._reset_connection_ui()
+
+    # Creates drafts from the pipeline's ready batches on the Tk main loop, a slice per tick so the window stays responsive
+    def _drain_submit_pipeline(self, submit_run: Dict[str, Any]) -> None:
+        pipeline: SubmitPipeline = submit_run['pipeline']
+        pending: deque = submit_run['pending']
+
+        try:
+            drafts_created = 0
+            while drafts_created < UIConstants.DRAFTS_PER_TICK:
+                if not pending:
+                    try:
+                        batch = pipeline.ready_batches.get_nowait()
+                    except queue.Empty:
+                        self.window.after(UIConstants.PIPELINE_POLL_MS, lambda: self._drain_submit_pipeline(submit_run))
+                        return
+
+                    if batch is None:
+                        self._finish_submit_pipeline(submit_run)
+                        return
+
+                    if submit_run['bcc_mode']:
+                        # The BCC draft only needs the first record for the placeholders plus every address
+                        bcc_records: List[Dict[str, str]] = submit_run['bcc_records']
+                        if not bcc_records and batch:
+                            bcc_records.append(batch[0].copy())
+                            batch = batch.slice(1, len(batch))
+                        bcc_records.extend({'email': email} for email in batch.column('email') if email)
+                    else:
+                        pending.extend(batch)
+                    continue
+
+                if submit_run['draft_run'] is None:
+                    submit_run['draft_run'] = self._start_individual_emails("Generating individual emails:")
+                self._create_individual_email(submit_run['draft_run'], submit_run['email_template_path'], pending.popleft())
+                drafts_created += 1
+
+            self.window.after(0, lambda: self._drain_submit_pipeline(submit_run))
+
+        except Exception as e:
+            pipeline.cancel()
+            self._write_to_output(f"\u274C Error during email generation: {e}")
+            self._submit_pipeline = None
+            self._set_submit_in_progress(False)
+            draft_run = submit_run['draft_run']
+            if draft_run and draft_run['outlook_session'] is not None:
+                draft_run['outlook_session'].close()
+
+    def _finish_submit_pipeline(self, submit_run: Dict[str, Any]) -> None:
+        pipeline: SubmitPipeline = submit_run['pipeline']
+        try:
+            if pipeline.error is not None:
+                self._write_to_output(f"\u274C Error during email generation: {pipeline.error}")
+
+            if submit_run['draft_run'] is not None:
+                self._finish_individual_emails(submit_run['draft_run'])
+            elif submit_run['bcc_records'] and pipeline.error is None:
+                self._create_bcc_email(submit_run['email_template_path'], submit_run['bcc_records'])
+            elif pipeline.error is None:
+                self._write_to_output("\u274C No valid employee data found in the CSV file.")
+        finally:
+            self._submit_pipeline = None
+            self._set_submit_in_progress(False)
 
     def _get_selected_csv_path(self) -> Optional[str]:
 
@@ -1129,63 +1253,9 @@ class MainApplicationWindow:
         return display_name_with_dir
 
     def _create_transformer_functions(self) -> Dict[str, Callable[[str], str]]:
-
-        def capitalize_name(value: str) -> str:
-            if not value or not value.strip():
-                return value
-            
-            if len(value) > 500:
-                value = value[:500]
-            
-            value = re.sub(r'[^\w\s-]', '', value)
-            return ' '.join(word.capitalize() for word in value.split())
-        
-        def currency_format(value: str) -> str:
-            if not value or not value.strip():
-                return "0.00"
-            
-            if len(value) > 50:
-                value = value[:50]
-
-            cleaned = re.sub(r'[^\d.-]', '', value.strip())
-
-            try:
-                number = float(cleaned) if cleaned else 0.0
-                if number > 999999999.99:
-                    number = 999999999.99
-                elif number < -999999999.99:
-                    number = -999999999.99
-                return f"{number:.2f}"
-            except ValueError:
-                self._write_to_output(f"\u26A0 Warning: Could not convert '{value}' to a number. Returning '0.00'.")
-                return "0.00"
-
-        def currency_format_with_symbol(value: str) -> str:
-            if not value or not value.strip():
-                return "$0.00"
-
-            if len(value) > 50:
-                value = value[:50]
-
-            cleaned = re.sub(r'[^\d.-]', '', value.strip())
-
-            try:
-                number = float(cleaned) if cleaned else 0.0
-                if number > 999999999.99:
-                    number = 999999999.99
-                elif number < -999999999.99:
-                    number = -999999999.99
-                return f"${number:.2f}"
-            except:
-                self._write_to_output(f"\u26A0 Warning: Could not convert '{value}' to a number. Returning '$0.00'")
-                return "$0.00"
-            
-        
-        return {
-            "capitalize": capitalize_name,
-            "currency": currency_format,
-            "currency_with_symbol": currency_format_with_symbol
-        }
+        if self._transformer_functions is None:
+            self._transformer_functions = create_transformer_functions(self._write_to_output_threadsafe)
+        return self._transformer_functions
 
     def _get_selected_transformers(self) -> Dict[str, Callable[[str], str]]:
         transformers = {}
@@ -1193,7 +1263,6 @@ class MainApplicationWindow:
 
         for field_name, widgets in self.field_widgets.items():
             transform_type = widgets["transform_var"].get()
-            available_transformers = self._create_transformer_functions()
 
             if transform_type == "Capitalize":
                 transformers[field_name] = available_transformers["capitalize"]
@@ -1213,46 +1282,45 @@ class MainApplicationWindow:
                 return self.emplid_field_mapping.get(selected_original)
         return None
 
-    def _load_csv_fields(self, csv_file_path: str) -> None:
+    # Loads the header fields of a CSV file, or of one workbook sheet (the active sheet when sheet_name is not given)
+    def _load_csv_fields(self, csv_file_path: str, sheet_name: Optional[str] = None) -> None:
         try:
-            encoding = 'utf-8'
-
-            with open(csv_file_path, 'rb') as file:
-                raw_data = file.read(4)
-                if raw_data.startswith(codecs.BOM_UTF8):
-                    encoding = 'utf-8-sig'
-                elif raw_data.startswith(codecs.BOM_UTF16):
-                    encoding = 'utf-16'
-            
-            with open(csv_file_path, 'r', encoding=encoding, newline='') as file:
-                csv_reader = csv.reader(file)
-                headers = next(csv_reader, [])
+            # Sniffed once per file version; switching back to an unchanged file only costs a stat()
+            csv_info = get_input_file_info(csv_file_path, sheet_name)
+            self._update_sheet_dropdown(csv_info)
 
-                if headers:
-                    original_headers = []
-                    cleaned_headers = []
-                    
-                    for header in headers:
-                        original_header = header.strip('\ufeff\ufffe\x00').strip()
-                        original_headers.append(original_header)
+            if csv_info.raw_headers:
+                original_headers = list(csv_info.cleaned_headers)
+                cleaned_headers = list(csv_info.field_names)
 
-                        processed_header = normalize_field_for_matching(original_header)
-                        cleaned_headers.append(processed_header)
-                    
-                    is_valid, error_msg = self.validate_csv_field_names(cleaned_headers)
-                    if not is_valid:
-                        self._write_to_output(f"\u274C Invalid CSV headers: {error_msg}")
-                        return
+                is_valid, error_msg = self.validate_csv_field_names(cleaned_headers)
+                if not is_valid:
+                    self._write_to_output(f"\u274C Invalid CSV headers: {error_msg}")
+                    return
 
-                    plural_check = "s" if len(cleaned_headers) > 1 else ""
-                    self._write_to_output(f"Found {len(cleaned_headers)} CSV field{plural_check}: {', '.join(cleaned_headers)}")
+                plural_check = "s" if len(cleaned_headers) > 1 else ""
+                source_detail = f"sheet '{csv_info.sheet_name}'" if csv_info.sheet_name else csv_info.encoding
+                self._write_to_output(f"Found {len(cleaned_headers)} CSV field{plural_check}: {', '.join(cleaned_headers)} (~{csv_info.approx_rows:,} rows, {source_detail})")
 
-                    self._create_field_transform_section(original_headers, cleaned_headers)
-                else:
-                    self._write_to_output("\u26A0 No headers found in the CSV file.")
+                self._create_field_transform_section(original_headers, cleaned_headers)
+            else:
+                self._write_to_output("\u26A0 No headers found in the CSV file.")
         except Exception as e:
             self._write_to_output(f"\u274C Error reading CSV fields: {e}")
 
+    # Shows the sheet picker with the workbook's sheets, or hides it for CSV files
+    def _update_sheet_dropdown(self, csv_info: CsvFileInfo) -> None:
+        self._current_sheet_name = csv_info.sheet_name or None
+        if not self.sheet_dropdown:
+            return
+
+        if csv_info.sheet_names:
+            self.sheet_dropdown.configure(values=list(csv_info.sheet_names))
+            self.sheet_dropdown.set(csv_info.sheet_name)
+            self.sheet_dropdown.grid()
+        else:
+            self.sheet_dropdown.grid_remove()
+
     def _create_field_transform_section(self, original_csv_fields: List[str], cleaned_csv_fields: List[str]) -> None:
         if hasattr(self, '_updating_field_config') and self._updating_field_config:
             return
@@ -1960,55 +2028,85 @@ class MainApplicationWindow:
         email_count = len(employee_data)
         plural_check = "s" if email_count > 1 else ""
 
-        self._write_to_output(f"\n\U0001F4E7 Generating {email_count} individual email{plural_check}:\n")
+        draft_run = self._start_individual_emails(f"Generating {email_count} individual email{plural_check}:")
+        for employee in employee_data:
+            self._create_individual_email(draft_run, email_template_path, employee)
+        self._finish_individual_emails(draft_run)
+
+    # Returns the counters for a run of individual drafts, which may arrive in several batches, and the Outlook session
+    # every draft of the run is created from; _finish_individual_emails closes it
+    def _start_individual_emails(self, heading: str) -> Dict[str, Any]:
+        self._write_to_output(f"\n\U0001F4E7 {heading}\n")
 
         emplid_field = self._get_selected_emplid_field()
         if not emplid_field:
             emplid_field = 'emplid'
 
-        field_display_name = emplid_field.replace("_", " ").title()
+        return {
+            'emplid_field':         emplid_field,
+            'field_display_name':   emplid_field.replace("_", " ").title(),
+            'index':                0,
+            'successful_emails':    0,
+            'failed_emails':        0,
+            'emails_with_unreplaced_vars': 0,
+            'outlook_session':      None,
+        }
 
-        successful_emails = 0
-        failed_emails=0
-        emails_with_unreplaced_vars = 0
-        
-        for index, employee in enumerate(employee_data):
-            emplid = employee.get(emplid_field, 'Unknown')
-            email_address = employee.get('email', '').strip()
+    def _create_individual_email(self, draft_run: Dict[str, Any], email_template_path: str, employee: Mapping[str, str]) -> None:
+        draft_run['index'] += 1
+        index = draft_run['index']
+        field_display_name = draft_run['field_display_name']
 
-            if not email_address or '@' not in email_address:
-                failed_emails += 1
-                self._write_to_output(f"{str(index+1).rjust(3)}. {field_display_name}: {emplid}   \u26A0 WARNING: No business email found - skipping email creation")
-            else:
-                try:
-                    old_stdout = sys.stdout
-                    captured_output = StringIO()
-                    sys.stdout = captured_output
-                    
-                    subject = create_draft_email_individual_to(self._write_to_output, email_template_path, employee)
+        emplid = employee.get(draft_run['emplid_field'], 'Unknown')
+        email_address = employee.get('email', '').strip()
 
-                    sys.stdout = old_stdout
-                    warning_output = captured_output.getvalue()
-                    
-                    if subject:
-                        successful_emails += 1
-                        output_line = f"{str(index+1).rjust(3)}. {field_display_name}: {emplid}   Subject: {subject}"
+        if not email_address or '@' not in email_address:
+            draft_run['failed_emails'] += 1
+            self._write_to_output(f"{str(index).rjust(3)}. {field_display_name}: {emplid}   \u26A0 WARNING: No business email found - skipping email creation")
+            return
+
+        try:
+            if draft_run['outlook_session'] is None:
+                # Opened at the first draft, so a run with no addresses never starts Outlook; its errors go to the output window
+                draft_run['outlook_session'] = OutlookSession(self._write_to_output, email_template_path)
+                draft_run['outlook_session'].open()
+
+            old_stdout = sys.stdout
+            captured_output = StringIO()
+            sys.stdout = captured_output
+            try:
+                subject = create_draft_email_individual_to(self._write_to_output, email_template_path, employee, session=draft_run['outlook_session'])
+            finally:
+                sys.stdout = old_stdout
+            warning_output = captured_output.getvalue()
 
-                        if "Unreplaced variables" in warning_output and "WARNING" in warning_output:
-                            emails_with_unreplaced_vars += 1
+            if subject:
+                draft_run['successful_emails'] += 1
+                output_line = f"{str(index).rjust(3)}. {field_display_name}: {emplid}   Subject: {subject}"
 
-                            warning_lines = [line.strip() for line in warning_output.split('\n') if line.strip() and 'WARNING' in line]
-                            if warning_lines:
-                                clean_warning = warning_lines[0].replace('⚠ WARNING: ', '').replace('\u26A0 WARNING: ', '')
-                                output_line += f"   \u26A0 {clean_warning}" # type: ignore
+                if "Unreplaced variables" in warning_output and "WARNING" in warning_output:
+                    draft_run['emails_with_unreplaced_vars'] += 1
 
-                        self._write_to_output(output_line)
-                    else:
-                        failed_emails += 1
-                        self._write_to_output(f"{str(index+1).rjust(3)}. {field_display_name}: {emplid}   \u274C ERROR: Failed to create email")
-                except Exception as e:
-                    failed_emails += 1
-                    self._write_to_output(f"{str(index+1).rjust(3)}. {field_display_name}: {emplid}   \u274C ERROR: Email creation failed - {str(e)}")
+                    warning_lines = [line.strip() for line in warning_output.split('\n') if line.strip() and 'WARNING' in line]
+                    if warning_lines:
+                        clean_warning = warning_lines[0].replace('⚠ WARNING: ', '').replace('\u26A0 WARNING: ', '')
+                        output_line += f"   \u26A0 {clean_warning}" # type: ignore
+
+                self._write_to_output(output_line)
+            else:
+                draft_run['failed_emails'] += 1
+                self._write_to_output(f"{str(index).rjust(3)}. {field_display_name}: {emplid}   \u274C ERROR: Failed to create email")
+        except Exception as e:
+            draft_run['failed_emails'] += 1
+            self._write_to_output(f"{str(index).rjust(3)}. {field_display_name}: {emplid}   \u274C ERROR: Email creation failed - {str(e)}")
+
+    def _finish_individual_emails(self, draft_run: Dict[str, Any]) -> None:
+        if draft_run['outlook_session'] is not None:
+            draft_run['outlook_session'].close()
+
+        successful_emails = draft_run['successful_emails']
+        failed_emails = draft_run['failed_emails']
+        emails_with_unreplaced_vars = draft_run['emails_with_unreplaced_vars']
 
         self._write_to_output(f"\n\U0001F4CA Summary:")
         self._write_to_output(f"  \u2705 Successfully created: {successful_emails} email{'s' if successful_emails != 1 else ''}")
@@ -2016,8 +2114,28 @@ class MainApplicationWindow:
             self._write_to_output(f"  \u26A0 Failed/Skipped: {failed_emails} email{('s' if failed_emails != 1 else '')}")
         if emails_with_unreplaced_vars > 0:
             self._write_to_output(f"   \U0001F4DD Emails with unreplaced variables: {emails_with_unreplaced_vars}")
+        self._write_email_cache_summary()
+        self._write_database_summary()
         self._write_to_output("")
 
+    def _write_email_cache_summary(self) -> None:
+        email_cache = get_email_lookup_cache()
+        if email_cache.hits or email_cache.misses:
+            self._write_to_output(f"  \U0001F5C3 Email cache: {email_cache.hits} hit{'s' if email_cache.hits != 1 else ''}, {email_cache.misses} miss{'es' if email_cache.misses != 1 else ''} ({email_cache.expired} expired)")
+
+    def _write_database_summary(self) -> None:
+        call_lines = get_query_metrics().format_report()
+        if call_lines:
+            self._write_to_output(f"  \u23F1 Database calls:")
+            for line in call_lines:
+                self._write_to_output(f"    - {line}")
+
+        statement_lines = get_statement_registry().format_report()
+        if statement_lines:
+            self._write_to_output(f"  \U0001F5C4 SQL statements:")
+            for line in statement_lines:
+                self._write_to_output(f"    - {line}")
+
     def _create_bcc_email(self, email_template_path: str, employee_data: List[Dict[str, str]]) -> None:
         email_addresses = [employee.get('email', 'Unknown') for employee in employee_data if employee.get('email') and employee['email'].strip() and '@' in employee['email']]
 
@@ -2050,20 +2168,80 @@ class MainApplicationWindow:
             self._write_to_output(output_line)
             plural_check = "s" if len(email_addresses) > 1 else ""
             self._write_to_output(f" {len(email_addresses)} Recipient{plural_check}: {', '.join(email_addresses)}")
+            self._write_email_cache_summary()
+            self._write_database_summary()
         else:
             self._write_to_output("\u274C Failed to create BCC email. Please check the template and employee data.")
 
     def show(self) -> None:
         self._write_to_output("Application started\n")
+        self._load_sql_statements()
+        self._start_directory_watcher()
         self.window.mainloop()
 
+    # Watches the confidential folders so new or deleted files show up in the dropdowns without a restart
+    def _start_directory_watcher(self) -> None:
+        self._directory_watcher = DirectoryWatcher(
+            [get_confidential_csv_index(), get_confidential_template_index()],
+            lambda index, diff: self.window.after(0, self._apply_directory_changes, index, diff),
+            poll_seconds=UIConstants.DIRECTORY_POLL_SECONDS
+        )
+        self._directory_watcher.start()
+
+    # Adds and removes only the changed dropdown entries; a removed selection falls back to the first remaining file
+    def _apply_directory_changes(self, index: DirectoryIndex, diff: DirectoryDiff) -> None:
+        try:
+            is_csv_index = index is get_confidential_csv_index()
+            files = self.csv_files if is_csv_index else self.email_templates
+            dropdown = self.csv_dropdown if is_csv_index else self.email_dropdown
+            empty_text = "No CSV files found" if is_csv_index else "No email templates found"
+            kind = "CSV file" if is_csv_index else "email template"
+
+            files[:] = [file_dict for file_dict in files if list(file_dict.keys())[0] not in diff.removed]
+            known_names = {list(file_dict.keys())[0] for file_dict in files}
+            files.extend({name: path} for name, path in diff.added.items() if name not in known_names)
+
+            for name in diff.added:
+                self._write_to_output(f"\U0001F4C2 New {kind}: {name}")
+            for name in diff.removed:
+                self._write_to_output(f"\U0001F5D1 {kind.capitalize()} removed: {name}")
+
+            names = [list(file_dict.keys())[0] for file_dict in files]
+            selected_name = dropdown.get() # type: ignore
+            dropdown.configure(values=names or [empty_text]) # type: ignore
+
+            if selected_name in diff.removed or (selected_name == empty_text and names):
+                dropdown.set(names[0] if names else empty_text) # type: ignore
+                if is_csv_index:
+                    self._on_csv_dropdown_change(dropdown.get()) # type: ignore
+                else:
+                    self._on_email_dropdown_change(dropdown.get()) # type: ignore
+            self.window.after(100, self._scroll_console_to_bottom)
+        except Exception as e:
+            self._write_to_output(f"\u274C Error updating file lists: {e}")
+
+    # Loads the named SQL statements at startup so missing files or bad bind names show up before the first Submit
+    def _load_sql_statements(self) -> None:
+        statement_registry = get_statement_registry()
+        for error in statement_registry.load_errors:
+            self._write_to_output(f"\u26A0 Warning: SQL statement not loaded - {error}")
+        self._write_to_output(f"\U0001F5C4 Loaded {len(statement_registry.statements)} SQL statement{'s' if len(statement_registry.statements) != 1 else ''} from {statement_registry.directory}\n")
+
     def close(self) -> None:
 
         if self._session_timer:
             self.window.after_cancel(self._session_timer)
             self._session_timer = None
 
+        if self._submit_pipeline:
+            self._submit_pipeline.cancel()
+
+        if self._directory_watcher:
+            self._directory_watcher.stop()
+
         self.credential_manager.clear_all()
+        close_connection_pool()
+        stop_async_database_worker()
 
         sys.stdout = self.original_stdout
         self.window.destroy()
@@ -0,0 +1,124 @@
+import os
+import sys
+import csv
+import random
+from typing import List, Dict, Final, Callable, Any, Tuple
+
+import pytest
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../Utilities")))
+pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+from file_loader import iter_csv_records, clear_csv_file_info_cache
+import columnar_loader
+from columnar_loader import iter_csv_records_columnar
+from field_transformers import create_transformer_functions
+
+#-- CONSTANTS ------------------------------------------------------------------------------------------------------
+row_count:          Final[int] = 3000
+csv_headers:        Final[List[str]] = ["Emplid", "Employee Name", "Department", "Annual Salary", "Bonus", "Notes", "employee-name", "Preferred Name"]
+first_names:        Final[List[str]] = ["maria", "JAMES", "li", "o'brien", "ana-sofia", "fatima", "d'angelo", "ÉLODIE", "straße", "ana\u00a0maria", "  ", "!!!", ""]
+last_names:         Final[List[str]] = ["smith", "GARCIA", "van der berg", "o'connor", "mcdonald", "\tjr.", "ǆemal", ""]
+currency_values:    Final[List[str]] = ["", "  ", "abc", "1.2.3", "-", ".", "5.", ".5", "-0", "(1,234.50)", "1e5", "$ 12", "$1,234.5", "99999999999", "1" * 60,
+                                        "\u0661\u0662\u0663.5", "\u20ac 1.2.3", "\u00a012\u00a0"] # non-ASCII digits, symbol and spaces
+reader_options:     Final[List[Tuple[Any, Any]]] = [(None, None), (7, None), (1000, None), (None, 1234), (64, 999)] # (batch_size, max_rows)
+columnar_chunks:    Final[List[int]] = [columnar_loader.default_columnar_chunk, 500] # one chunk for the whole file, and several
+#-------------------------------------------------------------------------------------------------------------------
+
+# Writes a csv with a BOM and the cases both readers must agree on: names to capitalize, currencies that do and do not
+# parse, blank and whitespace-only lines, empty cells, short rows, long rows and quoted newlines
+@pytest.fixture(scope="module")
+def csv_path(tmp_path_factory: pytest.TempPathFactory) -> str:
+    path = str(tmp_path_factory.mktemp("csv_backend_parity") / "employees.csv")
+    random_generator = random.Random(14)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(csv_headers)
+        for index in range(row_count):
+            row = [
+                f"{index + 1:07d}",
+                f" {random_generator.choice(first_names)} {random_generator.choice(last_names)} ",
+                random_generator.choice([f"D{random_generator.randint(1, 40):04d}", ""]),
+                random_generator.choice(currency_values + [f"${random_generator.randint(20000, 250000):,}.{random_generator.randint(0, 99):02d}"] * 10),
+                random_generator.choice(currency_values + [f"{random_generator.uniform(-100, 5000):.3f}"] * 10),
+                random_generator.choice(["", "on leave", "new hire", "line one\nline two, \"quoted\""]),
+                random_generator.choice(["", "alias"]), # same key as "Employee Name", so it replaces that value
+                f" {random_generator.choice(first_names)} {random_generator.choice(last_names)} ",
+            ]
+            choice = random_generator.random()
+            if choice < 0.05:
+                row = row[:random_generator.randint(1, len(row) - 1)]
+            elif choice < 0.10:
+                row = row + ["extra", "fields"]
+            elif choice < 0.13:
+                file.write(random_generator.choice(["\n", " ,  , ,,,,\n", ",,,,,,\n"]))
+                continue
+            writer.writerow(row)
+    return path
+
+# Runs every test with the whole file in one pandas chunk and again with chunk boundaries inside the file
+@pytest.fixture(autouse=True, params=columnar_chunks, ids=lambda rows: f"chunk{rows}")
+def columnar_chunk(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> int:
+    monkeypatch.setattr(columnar_loader, "default_columnar_chunk", request.param)
+    return request.param
+
+# The transformers print their own warnings, so they get the printer the reader gets, as the window does
+def selected_transformers(printer_function: Callable[[str], None]) -> Dict[str, Callable[[str], str]]:
+    available = create_transformer_functions(printer_function)
+    return {
+        "employee_name":    available["capitalize"],
+        "preferred_name":   available["capitalize"],
+        "annual_salary":    available["currency_with_symbol"],
+        "bonus":            available["currency"],
+        "department":       str.lower, # a transformer the columnar backend has no column operation for
+    }
+
+# Returns (flattened records, printed messages) for one reader
+def read_all(reader: Callable[..., Any], path: str, **options: Any) -> Tuple[List[Dict[str, str]], List[str]]:
+    clear_csv_file_info_cache()
+    messages: List[str] = []
+    records: List[Dict[str, str]] = []
+    for item in reader(messages.append, path, custom_transformers=selected_transformers(messages.append), **options):
+        if options.get('as_table'):
+            records.extend(item.to_records())
+        elif options.get('batch_size'):
+            records.extend(item)
+        else:
+            records.append(item)
+    return records, messages
+
+@pytest.mark.parametrize("batch_size, max_rows", reader_options)
+def test_records_match_row_reader(csv_path: str, batch_size: Any, max_rows: Any) -> None:
+    expected, _ = read_all(iter_csv_records, csv_path, batch_size=batch_size, max_rows=max_rows)
+    actual, _ = read_all(iter_csv_records_columnar, csv_path, batch_size=batch_size, max_rows=max_rows)
+
+    assert len(actual) == len(expected)
+    for record_number, (actual_record, expected_record) in enumerate(zip(actual, expected), start=1):
+        assert actual_record == expected_record, f"record {record_number}"
+
+@pytest.mark.parametrize("batch_size, max_rows", reader_options)
+def test_messages_match_row_reader(csv_path: str, batch_size: Any, max_rows: Any) -> None:
+    _, expected = read_all(iter_csv_records, csv_path, batch_size=batch_size, max_rows=max_rows)
+    _, actual = read_all(iter_csv_records_columnar, csv_path, batch_size=batch_size, max_rows=max_rows)
+
+    assert any("Could not convert" in message for message in expected) # the data must exercise the warnings
+    assert len(actual) == len(expected)
+    for message_number, (actual_message, expected_message) in enumerate(zip(actual, expected), start=1):
+        assert actual_message == expected_message, f"message {message_number}"
+
+@pytest.mark.parametrize("batch_size, max_rows", reader_options)
+def test_table_batches_match_row_reader(csv_path: str, batch_size: Any, max_rows: Any) -> None:
+    def silent(text: str) -> None:
+        pass
+
+    expected = [table.to_records() for table in iter_csv_records(silent, csv_path, custom_transformers=selected_transformers(silent),
+                                                                 batch_size=batch_size, max_rows=max_rows, as_table=True)]
+    actual = [table.to_records() for table in iter_csv_records_columnar(silent, csv_path, custom_transformers=selected_transformers(silent),
+                                                                        batch_size=batch_size, max_rows=max_rows, as_table=True)]
+    assert actual == expected
+
+def test_bom_is_not_part_of_the_first_key(csv_path: str) -> None:
+    with open(csv_path, 'rb') as file:
+        assert file.read(3) == b"\xef\xbb\xbf"
+    records, _ = read_all(iter_csv_records_columnar, csv_path, batch_size=None, max_rows=10)
+    assert list(records[0])[0] == "emplid"